@@ -63,20 +63,46 @@ def define_arguments(argparser):
         "Specify 'none' to disable. Default is 'spinning' if an operating reserve module is used, "
         "otherwise it is 'none'.",
     )
+    argparser.add_argument(
+        "--dr-bid-slots",
+        type=int,
+        default=20,
+        help="Number of demand response bids that can be in the model at the same time "
+        "for each timeseries (default is 20). If all slots are in use, the bid that has "
+        "had zero weight there for the most iterations is removed, or if there is none, "
+        "the one with the lowest weight in the last solution.",
+    )
+    argparser.add_argument(
+        "--dr-bid-prune-iterations",
+        type=int,
+        default=5,
+        help="Move demand response bids for a timeseries out of the model after they have "
+        "had zero weight in all load zones for this many consecutive iterations (default "
+        "is 5). Pruned bids are restored if they could reduce the cost of the current "
+        "solution. Use 0 to keep all bids in the model until their slots are needed.",
+    )
+    argparser.add_argument(
+        "--dr-bid-dedupe-tolerance",
+        type=float,
+        default=1e-6,
+        help="Reuse an existing demand response bid for a timeseries instead of adding a new "
+        "one if all their quantities and benefits differ by no more than this fraction of "
+        "the largest value in the new bid (default is 1e-6).",
+    )
 
 
 def define_components(m):
 
-    # load scipy.optimize; this is done here to avoid loading it during unit tests
+    # load numpy; this is done here to avoid loading it during unit tests
     try:
-        global scipy
-        import scipy.optimize
+        global np
+        import numpy as np
     except ImportError:
         print("=" * 80)
         print(
-            "Unable to load scipy package, which is used by the demand response system."
+            "Unable to load numpy package, which is used by the demand response system."
         )
-        print("Please install this via 'conda install scipy' or 'pip install scipy'.")
+        print("Please install this via 'conda install numpy' or 'pip install numpy'.")
         print("=" * 80)
         raise
 
@@ -141,61 +167,63 @@ def define_components(m):
     # Price Responsive Demand bids
     ##################
 
-    # list of all bids that have been received from the demand system
-    m.DR_BID_LIST = Set(dimen=1, initialize=[], ordered=True)
-    # we need an explicit indexing set for everything that depends on DR_BID_LIST
-    # so we can reconstruct it (and them) each time we add an element to DR_BID_LIST
-    # (not needed, and actually doesn't work -- reconstruct() fails for sets)
-    # m.DR_BIDS_LZ_TP = Set(initialize = lambda m: m.DR_BID_LIST * m.LOAD_ZONES * m.TIMEPOINTS)
-    # m.DR_BIDS_LZ_TS = Set(initialize = lambda m: m.DR_BID_LIST * m.LOAD_ZONES * m.TIMESERIES)
+    # bids received from the demand system are stored in a fixed number of
+    # slots, so adding a bid only changes the values of mutable parameters and
+    # frees the weights for one slot, rather than rebuilding the energy balance
+    # and objective. The weights for empty slots are fixed at zero. Each slot
+    # can hold a different bid in each group of timeseries that share weights
+    # (see DR_BID_GROUPS below); the slot used for each bid in the model is
+    # shown in m.dr_bid_slot (see add_bids()).
+    m.DR_BID_SLOTS = Set(
+        dimen=1,
+        ordered=True,
+        initialize=lambda m: range(1, m.options.dr_bid_slots + 1),
+    )
 
     # data for the individual bids; each load_zone gets one bid for each timeseries,
     # and each bid covers all the timepoints in that timeseries. So we just record
     # the bid for each timepoint for each load_zone.
     m.dr_bid = Param(
-        m.DR_BID_LIST,
+        m.DR_BID_SLOTS,
         m.LOAD_ZONES,
         m.TIMEPOINTS,
         m.DR_PRODUCTS,
+        default=0.0,
         mutable=True,
         within=NonNegativeReals,
     )
 
     # price used to get this bid (only kept for reference)
     m.dr_price = Param(
-        m.DR_BID_LIST,
+        m.DR_BID_SLOTS,
         m.LOAD_ZONES,
         m.TIMEPOINTS,
         m.DR_PRODUCTS,
+        default=0.0,
         mutable=True,
         within=NonNegativeReals,
     )
 
     # the private benefit of serving each bid
     m.dr_bid_benefit = Param(
-        m.DR_BID_LIST, m.LOAD_ZONES, m.TIMESERIES, mutable=True, within=NonNegativeReals
+        m.DR_BID_SLOTS,
+        m.LOAD_ZONES,
+        m.TIMESERIES,
+        default=0.0,
+        mutable=True,
+        within=NonNegativeReals,
     )
 
     # weights to assign to the bids for each timeseries when constructing an optimal demand profile
     m.DRBidWeight = Var(
-        m.DR_BID_LIST, m.LOAD_ZONES, m.TIMESERIES, within=NonNegativeReals
+        m.DR_BID_SLOTS, m.LOAD_ZONES, m.TIMESERIES, within=NonNegativeReals
     )
 
-    # def DR_Convex_Bid_Weight_rule(m, z, ts):
-    #     if len(m.DR_BID_LIST) == 0:
-    #         print "no items in m.DR_BID_LIST, skipping DR_Convex_Bid_Weight constraint"
-    #         return Constraint.Skip
-    #     else:
-    #         print "constructing DR_Convex_Bid_Weight constraint"
-    #         return (sum(m.DRBidWeight[b, z, ts] for b in m.DR_BID_LIST) == 1)
-    #
     # choose a convex combination of bids for each zone and timeseries
     m.DR_Convex_Bid_Weight = Constraint(
         m.LOAD_ZONES,
         m.TIMESERIES,
-        rule=lambda m, z, ts: Constraint.Skip
-        if len(m.DR_BID_LIST) == 0
-        else (sum(m.DRBidWeight[b, z, ts] for b in m.DR_BID_LIST) == 1),
+        rule=lambda m, z, ts: sum(m.DRBidWeight[b, z, ts] for b in m.DR_BID_SLOTS) == 1,
     )
 
     # Since we don't have differentiated prices for each zone, we have to use the same
@@ -204,7 +232,7 @@ def define_components(m):
     # Note: LOAD_ZONES is not an ordered set, so we have to use a trick to get a single
     # arbitrary one to refer to (list(m.LOAD_ZONES)[0] would also work).
     m.DR_Load_Zone_Shared_Bid_Weight = Constraint(
-        m.DR_BID_LIST,
+        m.DR_BID_SLOTS,
         m.LOAD_ZONES,
         m.TIMESERIES,
         rule=lambda m, b, z, ts: m.DRBidWeight[b, z, ts]
@@ -216,20 +244,46 @@ def define_components(m):
     # induce different adjustments in individual timeseries.
     if m.options.dr_flat_pricing:
         m.DR_Flat_Bid_Weight = Constraint(
-            m.DR_BID_LIST,
+            m.DR_BID_SLOTS,
             m.LOAD_ZONES,
             m.TIMESERIES,
             rule=lambda m, b, z, ts: m.DRBidWeight[b, z, ts]
             == m.DRBidWeight[b, z, m.tp_ts[m.TPS_IN_PERIOD[m.ts_period[ts]].first()]],
         )
 
+    # Bids are stored, deduplicated and pruned separately for each group of
+    # timeseries that must use the same bid weights: each timeseries on its
+    # own, or all the timeseries in a period if flat pricing is used (see
+    # DR_Flat_Bid_Weight). Each group is identified by its first timeseries.
+    m.dr_bid_group = Param(
+        m.TIMESERIES,
+        within=m.TIMESERIES,
+        initialize=lambda m, ts: (
+            m.tp_ts[m.TPS_IN_PERIOD[m.ts_period[ts]].first()]
+            if m.options.dr_flat_pricing
+            else ts
+        ),
+    )
+    m.DR_BID_GROUPS = Set(
+        dimen=1,
+        ordered=True,
+        initialize=lambda m: utilities.unique_list(
+            m.dr_bid_group[ts] for ts in m.TIMESERIES
+        ),
+    )
+    m.TS_IN_DR_BID_GROUP = Set(
+        m.DR_BID_GROUPS,
+        within=m.TIMESERIES,
+        initialize=lambda m, g: [ts for ts in m.TIMESERIES if m.dr_bid_group[ts] == g],
+    )
+
     # Optimal level of demand, calculated from available bids (negative, indicating consumption)
     m.FlexibleDemand = Expression(
         m.LOAD_ZONES,
         m.TIMEPOINTS,
         rule=lambda m, z, tp: sum(
             m.DRBidWeight[b, z, m.tp_ts[tp]] * m.dr_bid[b, z, tp, "energy"]
-            for b in m.DR_BID_LIST
+            for b in m.DR_BID_SLOTS
         ),
     )
 
@@ -241,7 +295,7 @@ def define_components(m):
         m.TIMEPOINTS,
         rule=lambda m, z, tp: -sum(
             m.DRBidWeight[b, z, m.tp_ts[tp]] * m.dr_bid[b, z, tp, "energy up"]
-            for b in m.DR_BID_LIST
+            for b in m.DR_BID_SLOTS
         ),
     )
     m.DemandDownReserveSales = Expression(
@@ -249,7 +303,7 @@ def define_components(m):
         m.TIMEPOINTS,
         rule=lambda m, z, tp: -sum(
             m.DRBidWeight[b, z, m.tp_ts[tp]] * m.dr_bid[b, z, tp, "energy down"]
-            for b in m.DR_BID_LIST
+            for b in m.DR_BID_SLOTS
         ),
     )
     if hasattr(m, "ZONES_IN_BALANCING_AREA"):
@@ -286,7 +340,7 @@ def define_components(m):
         rule=lambda m, tp: (-1.0)
         * sum(
             m.DRBidWeight[b, z, m.tp_ts[tp]] * m.dr_bid_benefit[b, z, m.tp_ts[tp]]
-            for b in m.DR_BID_LIST
+            for b in m.DR_BID_SLOTS
             for z in m.LOAD_ZONES
         )
         * m.tp_duration_hrs[tp]
@@ -299,6 +353,20 @@ def define_components(m):
     # variable to store the baseline data
     m.base_data = None
 
+    # dicts for each group of timeseries (see DR_BID_GROUPS), showing all bids
+    # received so far (as lists of bid tuples, see add_bids()), whether or not
+    # they are currently in the model, arrays of their quantities and benefits
+    # (for finding duplicates), the slot used for each bid that is in the
+    # model, and the number of consecutive iterations each of those has had
+    # zero weight; also the bid chosen for each group in the most recent round
+    # and the number of rounds of bids received
+    m.dr_bid_data = dict()
+    m.dr_bid_vector = dict()
+    m.dr_bid_slot = dict()
+    m.dr_bid_zero_weight_iterations = dict()
+    m.dr_current_bid = dict()
+    m.dr_bid_rounds = 0
+
     # # TODO: create a data file that lists which timepoints are grouped into each flat
     # # pricing block; also enforce a requirement that no block can span periods.
     # # Then use that to choose flat prices for each block in each period when flat pricing
@@ -352,7 +420,7 @@ def pre_iterate(m):
     # (e.g., get a bid based on current prices, add bid to model, rebuild components)
 
     # NOTE:
-    # bids must be added to the model here, and the model must be reconstructed here,
+    # bids must be added to the model here,
     # so the model can then be solved and remain in a "solved" state through the end
     # of post-iterate, to avoid problems in final reporting.
 
@@ -452,11 +520,11 @@ def pre_iterate(m):
         # get an estimate of best possible net cost of serving load
         # (if we could completely serve the last bid at the prices we quoted,
         # that would be an optimum; the actual cost may be higher but never lower)
-        b = m.DR_BID_LIST.last()  # current bid number
         best_direct_cost = value(
             sum(
                 sum(
-                    m.prev_marginal_cost[z, tp, prod] * m.dr_bid[b, z, tp, prod]
+                    m.prev_marginal_cost[z, tp, prod]
+                    * m.dr_bid[current_bid_slot(m, ts), z, tp, prod]
                     for z in m.LOAD_ZONES
                     for prod in m.DR_PRODUCTS
                 )
@@ -468,7 +536,10 @@ def pre_iterate(m):
         best_bid_benefit = value(
             sum(
                 (
-                    -sum(m.dr_bid_benefit[b, z, ts] for z in m.LOAD_ZONES)
+                    -sum(
+                        m.dr_bid_benefit[current_bid_slot(m, ts), z, ts]
+                        for z in m.LOAD_ZONES
+                    )
                     * m.tp_duration_hrs[tp]
                     / m.ts_num_tps[ts]
                 )
@@ -594,18 +665,28 @@ def post_iterate(m):
             + tuple("bid " + prod for prod in m.DR_PRODUCTS)
             + ("wtp", "base_price", "base_load"),
         )
-    b = m.DR_BID_LIST.last()  # current bid
     util.append_table(
         m,
         m.LOAD_ZONES,
         m.TIMEPOINTS,
         output_file=os.path.join(outputs_dir, "bid_{t}.csv".format(t=tag)),
-        values=lambda m, z, tp: (b, z, m.tp_ts[tp], m.tp_timestamp[tp])
+        values=lambda m, z, tp: (
+            m.dr_current_bid[m.dr_bid_group[m.tp_ts[tp]]],
+            z,
+            m.tp_ts[tp],
+            m.tp_timestamp[tp],
+        )
         + tuple(m.prev_marginal_cost[z, tp, prod] for prod in m.DR_PRODUCTS)
-        + tuple(m.dr_price[b, z, tp, prod] for prod in m.DR_PRODUCTS)
-        + tuple(m.dr_bid[b, z, tp, prod] for prod in m.DR_PRODUCTS)
+        + tuple(
+            m.dr_price[current_bid_slot(m, m.tp_ts[tp]), z, tp, prod]
+            for prod in m.DR_PRODUCTS
+        )
+        + tuple(
+            m.dr_bid[current_bid_slot(m, m.tp_ts[tp]), z, tp, prod]
+            for prod in m.DR_PRODUCTS
+        )
         + (
-            m.dr_bid_benefit[b, z, m.tp_ts[tp]],
+            m.dr_bid_benefit[current_bid_slot(m, m.tp_ts[tp]), z, m.tp_ts[tp]],
             m.base_data_dict[z, tp][1],
             m.base_data_dict[z, tp][0],
         ),
@@ -619,16 +700,19 @@ def post_iterate(m):
         )
     util.append_table(
         m,
-        m.LOAD_ZONES,
-        m.TIMESERIES,
-        m.DR_BID_LIST,
+        [
+            (z, ts, b)
+            for z in m.LOAD_ZONES
+            for ts in m.TIMESERIES
+            for b in sorted(m.dr_bid_slot[m.dr_bid_group[ts]])
+        ],
         output_file=os.path.join(outputs_dir, "bid_weights_{t}.csv".format(t=tag)),
         values=lambda m, z, ts, b: (
-            len(m.DR_BID_LIST),
+            m.iteration_number + 1,
             z,
             ts,
             b,
-            m.DRBidWeight[b, z, ts],
+            m.DRBidWeight[m.dr_bid_slot[m.dr_bid_group[ts]][b], z, ts],
         ),
     )
 
@@ -665,7 +749,17 @@ def update_demand(m):
     print("attaching new demand bid to model")
     if first_run:
         calibrate_model(m)
+        # all bid slots are empty
+        for w in m.DRBidWeight.values():
+            w.fix(0)
+        for g in m.DR_BID_GROUPS:
+            m.dr_bid_data[g] = dict()
+            m.dr_bid_vector[g] = dict()
+            m.dr_bid_slot[g] = dict()
+            m.dr_bid_zero_weight_iterations[g] = dict()
     else:  # not first run
+        # move unused bids out of the model and restore any that could be useful
+        update_bid_pool(m)
         if m.options.verbose:
             print("m.DRBidWeight:")
             pprint(
@@ -673,7 +767,10 @@ def update_demand(m):
                     (
                         z,
                         ts,
-                        [(b, value(m.DRBidWeight[b, z, ts])) for b in m.DR_BID_LIST],
+                        [
+                            (b, m.DRBidWeight[s, z, ts].value)
+                            for b, s in m.dr_bid_slot[m.dr_bid_group[ts]].items()
+                        ],
                     )
                     for z in m.LOAD_ZONES
                     for ts in m.TIMESERIES
@@ -691,13 +788,13 @@ def update_demand(m):
     add_bids(m, bids)
     # print "m.dr_bid_benefit (first day):"
     # pprint([(b, z, ts, value(m.dr_bid_benefit[b, z, ts]))
-    #     for b in m.DR_BID_LIST
+    #     for b in m.DR_BID_SLOTS
     #     for z in m.LOAD_ZONES
     #     for ts in [m.TIMESERIES.first()]])
 
     # print "m.dr_bid (first day):"
     # print [(b, z, ts, value(m.dr_bid[b, z, ts]))
-    #     for b in m.DR_BID_LIST
+    #     for b in m.DR_BID_SLOTS
     #     for z in m.LOAD_ZONES
     #     for ts in m.TPS_IN_TS[m.TIMESERIES.first()]]
 
@@ -752,7 +849,7 @@ def electricity_marginal_cost(m, z, tp, prod):
 def electricity_demand(m, z, tp, prod):
     """Return total consumption of product prod in load_zone z during timepoint tp (negative if customers supply product)."""
     if prod == "energy":
-        if len(m.DR_BID_LIST) == 0:
+        if not m.dr_current_bid:
             # use zone_demand_mw (base demand) if no bids have been received yet
             # (needed to find flat prices before solving the model the first time)
             demand = m.zone_demand_mw[z, tp]
@@ -865,23 +962,84 @@ def get_bids(m):
     prices = get_prices(m)
 
     # get bids for all load zones and timeseries
+    zones, timeseries = list(m.LOAD_ZONES), list(m.TIMESERIES)
+    demand, wtp = get_bid_arrays(
+        m, zones, timeseries, price_arrays(m, zones, timeseries, prices)
+    )
     bids = []
-    for z in m.LOAD_ZONES:
-        for ts in m.TIMESERIES:
-            demand, wtp = demand_module.bid(m, z, ts, prices[z, ts])
-            # import pdb; pdb.set_trace()
+    for i, z in enumerate(zones):
+        for j, ts in enumerate(timeseries):
+            n = len(m.TPS_IN_TS[ts])
             if m.options.dr_flat_pricing:
                 # assume demand side will not provide reserves, even if they offered some
                 # (at zero price)
-                for (k, v) in demand.items():
-                    if k != "energy":
-                        for i in range(len(v)):
-                            v[i] = 0.0
-            bids.append((z, ts, prices[z, ts], demand, wtp))
+                ts_demand = {
+                    prod: list(d[i, j, :n]) if prod == "energy" else [0.0] * n
+                    for prod, d in demand.items()
+                }
+            else:
+                ts_demand = {prod: list(d[i, j, :n]) for prod, d in demand.items()}
+            bids.append((z, ts, prices[z, ts], ts_demand, float(wtp[i, j])))
 
     return bids
 
 
+def price_arrays(m, load_zones, timeseries, prices):
+    """
+    Convert prices, a dict of {prod: [hourly prices]} dicts indexed by (load_zone,
+    timeseries), into a dict of arrays of prices for each product, with
+    dimensions of (load zone, timeseries, hour). Time series shorter than the
+    longest one are padded with zeros.
+    """
+    shape = (
+        len(load_zones),
+        len(timeseries),
+        max(len(m.TPS_IN_TS[ts]) for ts in timeseries),
+    )
+    arrays = {prod: np.zeros(shape) for prod in m.DR_PRODUCTS}
+    for i, z in enumerate(load_zones):
+        for j, ts in enumerate(timeseries):
+            for prod in m.DR_PRODUCTS:
+                arrays[prod][i, j, : len(m.TPS_IN_TS[ts])] = prices[z, ts][prod]
+    return arrays
+
+
+def get_bid_arrays(m, load_zones, timeseries, prices):
+    """
+    Get bids from the demand system for all the specified load zones and
+    timeseries at once. prices is a dict of price arrays for each product, as
+    produced by price_arrays(), or arrays that can be broadcast to the same
+    shape (e.g., one price per timeseries for all hours). Returns a dict of
+    arrays of demand for each product, with dimensions of (load zone,
+    timeseries, hour), and an array of willingness-to-pay, with dimensions of
+    (load zone, timeseries).
+
+    This uses demand_module.bid_all() if available, which evaluates all the
+    bids in a single pass, otherwise demand_module.bid() is called for each
+    load zone and timeseries.
+    """
+    if hasattr(demand_module, "bid_all"):
+        return demand_module.bid_all(m, load_zones, timeseries, prices)
+
+    shape = (
+        len(load_zones),
+        len(timeseries),
+        max(len(m.TPS_IN_TS[ts]) for ts in timeseries),
+    )
+    prices = {prod: np.broadcast_to(p, shape) for prod, p in prices.items()}
+    demand = {prod: np.zeros(shape) for prod in prices}
+    wtp = np.zeros((len(load_zones), len(timeseries)))
+    for i, z in enumerate(load_zones):
+        for j, ts in enumerate(timeseries):
+            n = len(m.TPS_IN_TS[ts])
+            ts_demand, wtp[i, j] = demand_module.bid(
+                m, z, ts, {prod: list(p[i, j, :n]) for prod, p in prices.items()}
+            )
+            for prod, d in ts_demand.items():
+                demand[prod][i, j, :n] = d
+    return demand, wtp
+
+
 # def zone_period_average_marginal_cost(m, load_zone, period):
 #     avg_cost = value(
 #         sum(
@@ -907,7 +1065,7 @@ def find_flat_prices(m, marginal_costs, revenue_neutral):
     # this is like a transformation on the demand function, where we are
     # now  selling to the LSE rather than directly to the customers
     #
-    # LSE iterates in sub-loop (scipy.optimize.newton) to find flat price:
+    # LSE iterates in sub-loop (solve_flat_prices) to find flat price:
     # set price (e.g., simple average of MC or avg weighted by expected demand)
     # offer price to demand side
     # receive bids
@@ -915,33 +1073,40 @@ def find_flat_prices(m, marginal_costs, revenue_neutral):
     # if > 0: decrease price (q will go up across the board)
     # if < 0: increase price (q will go down across the board) but
 
-    flat_prices = dict()
-    for z in m.LOAD_ZONES:
-        for p in m.PERIODS:
-            price_guess = value(
-                sum(
-                    marginal_costs[z, ts]["energy"][i]
-                    * electricity_demand(m, z, tp, "energy")
-                    * m.tp_weight_in_year[tp]
-                    for ts in m.TS_IN_PERIOD[p]
-                    for i, tp in enumerate(m.TPS_IN_TS[ts])
-                )
-                / sum(
-                    electricity_demand(m, z, tp, "energy") * m.tp_weight_in_year[tp]
-                    for tp in m.TPS_IN_PERIOD[p]
+    zones, periods = list(m.LOAD_ZONES), list(m.PERIODS)
+    price_guess = np.array(
+        [
+            [
+                value(
+                    sum(
+                        marginal_costs[z, ts]["energy"][i]
+                        * electricity_demand(m, z, tp, "energy")
+                        * m.tp_weight_in_year[tp]
+                        for ts in m.TS_IN_PERIOD[p]
+                        for i, tp in enumerate(m.TPS_IN_TS[ts])
+                    )
+                    / sum(
+                        electricity_demand(m, z, tp, "energy") * m.tp_weight_in_year[tp]
+                        for tp in m.TPS_IN_PERIOD[p]
+                    )
                 )
-            )
+                for p in periods
+            ]
+            for z in zones
+        ]
+    )
 
-            if revenue_neutral:
-                # find a flat price that produces revenue equal to marginal costs
-                flat_prices[z, p] = scipy.optimize.newton(
-                    revenue_imbalance, price_guess, args=(m, z, p, marginal_costs)
-                )
-            else:
-                # used in final round, when LSE is considered to have
-                # bought the final constructed quantity at the final
-                # marginal cost
-                flat_prices[z, p] = price_guess
+    if revenue_neutral:
+        # find flat prices that produce revenue equal to marginal costs
+        prices = solve_flat_prices(m, zones, marginal_costs, price_guess)
+    else:
+        # used in final round, when LSE is considered to have
+        # bought the final constructed quantity at the final
+        # marginal cost
+        prices = price_guess
+    flat_prices = {
+        (z, p): prices[i, j] for i, z in enumerate(zones) for j, p in enumerate(periods)
+    }
 
     # construct a collection of flat prices with the right structure
     final_prices = {
@@ -957,109 +1122,426 @@ def find_flat_prices(m, marginal_costs, revenue_neutral):
     return final_prices
 
 
-def revenue_imbalance(flat_price, m, load_zone, period, dynamic_prices):
-    """find demand and revenue that would occur in this load_zone and period with flat prices, and
-    compare to the cost of meeting that demand by purchasing power at the current dynamic prices"""
-    flat_price_revenue = 0.0
-    dynamic_price_revenue = 0.0
-    for ts in m.TS_IN_PERIOD[period]:
-        prices = {
-            prod: [flat_price if prod == "energy" else 0.0] * len(m.TPS_IN_TS[ts])
-            for prod in m.DR_PRODUCTS
-        }
-        demand, wtp = demand_module.bid(m, load_zone, ts, prices)
-        # flat_price_revenue += sum(
-        #     p * d * m.ts_duration_of_tp[ts] * m.ts_scale_to_year[ts]
-        #     for p, d in zip(prices['energy'], demand['energy']
-        # )
-        flat_price_revenue += flat_price * sum(
-            d * m.ts_duration_of_tp[ts] * m.ts_scale_to_year[ts]
-            for d in demand["energy"]
-        )
-        dynamic_price_revenue += sum(
-            p * d * m.ts_duration_of_tp[ts] * m.ts_scale_to_year[ts]
-            for p, d in zip(dynamic_prices[load_zone, ts]["energy"], demand["energy"])
+def solve_flat_prices(m, zones, dynamic_prices, price_guess, tol=1e-8, max_iter=100):
+    """
+    Find flat prices for all the specified load zones and all periods that
+    produce zero revenue imbalance (see revenue_imbalance()), starting from
+    price_guess, an array with dimensions of (load zone, period). All the
+    prices are found simultaneously, using a secant search that falls back to
+    bisection (or doubling the step, until the solution has been bracketed)
+    whenever the secant step would leave the range known to contain the
+    solution. This assumes the revenue imbalance decreases as the flat price
+    increases. Each step evaluates the bids for all load zones and timeseries
+    in a single call to get_bid_arrays().
+    """
+    timeseries = list(m.TIMESERIES)
+    period_number = {p: j for j, p in enumerate(m.PERIODS)}
+    ts_in_period = np.zeros((len(timeseries), len(period_number)))
+    for i, ts in enumerate(timeseries):
+        ts_in_period[i, period_number[m.ts_period[ts]]] = 1.0
+    # weight for each timeseries (hours per timepoint times timeseries per year)
+    ts_weight = np.array(
+        [m.ts_duration_of_tp[ts] * m.ts_scale_to_year[ts] for ts in timeseries]
+    )
+    dynamic_energy_prices = price_arrays(m, zones, timeseries, dynamic_prices)["energy"]
+
+    def imbalance(flat_prices):
+        return revenue_imbalance(
+            m,
+            zones,
+            timeseries,
+            flat_prices,
+            dynamic_energy_prices,
+            ts_in_period,
+            ts_weight,
         )
-    imbalance = dynamic_price_revenue - flat_price_revenue
 
-    print(
-        "{}, {}: price ${} produces revenue imbalance of ${}/year".format(
-            load_zone, period, flat_price, imbalance
+    # the solution lies between low (positive imbalance) and high (negative imbalance)
+    low = np.full(price_guess.shape, -np.inf)
+    high = np.full(price_guess.shape, np.inf)
+    # start with the same secant step as scipy.optimize.newton()
+    x_prev, f_prev = price_guess, imbalance(price_guess)
+    x = price_guess * (1 + 1e-4) + np.where(price_guess >= 0, 1e-4, -1e-4)
+    low = np.where(f_prev > 0, x_prev, low)
+    high = np.where(f_prev < 0, x_prev, high)
+    converged = f_prev == 0
+    x = np.where(converged, x_prev, x)
+    for iteration in range(1, max_iter + 1):
+        f = imbalance(x)
+        low = np.where(f > 0, np.maximum(low, x), low)
+        high = np.where(f < 0, np.minimum(high, x), high)
+        converged |= f == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_new = x - f * (x - x_prev) / (f - f_prev)
+            # use bisection (or expand the search) if the secant step is unusable
+            fallback = ~((x_new > low) & (x_new < high))
+            step = np.maximum(np.abs(x), 1.0)
+            x_new = np.where(
+                fallback,
+                np.where(
+                    np.isfinite(low) & np.isfinite(high),
+                    (low + high) / 2,
+                    np.where(f > 0, x + step, x - step),
+                ),
+                x_new,
+            )
+        x_new = np.where(converged, x, x_new)
+        converged |= np.abs(x_new - x) <= tol * np.maximum(np.abs(x), 1.0)
+        x_prev, f_prev, x = x, f, x_new
+        if converged.all():
+            break
+
+    max_imbalance = np.abs(f_prev).max(initial=0.0)
+    if converged.all():
+        m.logger.info(
+            f"Found revenue-neutral flat prices for {converged.size} load zones "
+            f"and periods after {iteration} steps; largest revenue imbalance is "
+            f"${max_imbalance:,.2f}/year."
         )
-    )
+    else:
+        m.logger.warning(
+            f"WARNING: Revenue-neutral flat prices were not found for "
+            f"{(~converged).sum()} of {converged.size} load zones and periods "
+            f"after {max_iter} steps; largest revenue imbalance is "
+            f"${max_imbalance:,.2f}/year."
+        )
+    return x
 
-    return imbalance
+
+def revenue_imbalance(
+    m, zones, timeseries, flat_prices, dynamic_prices, ts_in_period, ts_weight
+):
+    """find demand and revenue that would occur in each load_zone and period with flat prices, and
+    compare to the cost of meeting that demand by purchasing power at the current dynamic prices.
+
+    flat_prices is an array of prices with dimensions of (load zone, period), and
+    dynamic_prices is an array of energy prices with dimensions of (load zone,
+    timeseries, hour). ts_in_period is a (timeseries, period) array with 1 in the
+    period that contains each timeseries, and ts_weight shows the number of
+    hours per year represented by each timepoint in each timeseries. Returns an
+    array of imbalances in $/year, with dimensions of (load zone, period).
+    """
+    # offer the flat price for energy in all hours (and zero for other products)
+    ts_flat_prices = (flat_prices @ ts_in_period.T)[:, :, None]
+    prices = {
+        prod: ts_flat_prices if prod == "energy" else np.zeros(ts_flat_prices.shape)
+        for prod in m.DR_PRODUCTS
+    }
+    demand, wtp = get_bid_arrays(m, zones, timeseries, prices)
+    # hours beyond the end of each timeseries have zero demand
+    ts_imbalance = (demand["energy"] * (dynamic_prices - ts_flat_prices)).sum(
+        axis=-1
+    ) * ts_weight
+    return ts_imbalance @ ts_in_period
 
 
 def add_bids(m, bids):
     """
     accept a list of bids written as tuples like
-    (z, ts, prod, prices, demand, wtp)
-    where z is the load zone, ts is the timeseries, prod is the product,
-    demand is a list of demand levels for the timepoints during that series (possibly negative, to sell),
+    (z, ts, prices, demand, wtp)
+    where z is the load zone, ts is the timeseries, prices and demand are dicts
+    of lists of prices and demand levels for each product for the timepoints
+    during that series (possibly negative, to sell),
     and wtp is the net private benefit from consuming/selling the amount of power in that bid.
-    Then add that set of bids to the model
+    Then add the bids for each group of timeseries (see DR_BID_GROUPS) to the
+    model, unless they match bids that have already been received for that
+    group (see --dr-bid-dedupe-tolerance), in which case those bids are used
+    instead.
     """
-    # create a bid ID and add it to the list of bids
-    if len(m.DR_BID_LIST) == 0:
-        b = 1
-    else:
-        b = max(m.DR_BID_LIST) + 1
+    m.dr_bid_rounds += 1
+    b = m.dr_bid_rounds
+    group_bids = {g: [] for g in m.DR_BID_GROUPS}
+    for bid in bids:
+        group_bids[m.dr_bid_group[bid[1]]].append(bid)
+
+    new, restored = 0, 0
+    for g, g_bids in group_bids.items():
+        vector = bid_vector(m, g_bids)
+        match = find_duplicate_bid(m, g, vector)
+        if match is None:
+            # store the bid (never reusing the ID of a pruned bid) and add it
+            # to the model
+            m.dr_bid_data[g][b] = g_bids
+            m.dr_bid_vector[g][b] = vector
+            activate_bid(m, b, g)
+            m.dr_current_bid[g] = b
+            new += 1
+        else:
+            if match not in m.dr_bid_slot[g]:
+                activate_bid(m, match, g)
+                restored += 1
+            m.dr_current_bid[g] = match
+    m.logger.info(
+        f"Demand response bid {b} is new in {new} and matches an existing bid in "
+        f"{len(group_bids) - new} of {len(group_bids)} timeseries groups "
+        f"({restored} restored after pruning)."
+    )
+
+    print(
+        "active bids: {n} in {g} timeseries groups".format(
+            n=sum(len(slots) for slots in m.dr_bid_slot.values()), g=len(group_bids)
+        )
+    )
+
+
+def current_bid_slot(m, ts):
+    """Return the slot that holds the most recent bid for timeseries ts."""
+    g = m.dr_bid_group[ts]
+    return m.dr_bid_slot[g][m.dr_current_bid[g]]
 
-    m.DR_BID_LIST.add(b)
 
-    # add the bids for each load zone and timepoint to the dr_bid list
-    for (z, ts, prices, demand, wtp) in bids:
+def activate_bid(m, b, g):
+    """
+    Store bid b for timeseries group g from m.dr_bid_data in an empty slot in
+    the model and free the weights for that slot in those timeseries. If there
+    are no empty slots for this group, another bid is removed to make room (see
+    evict_bid()), or if there is none that can be removed, the number of slots
+    is doubled.
+    """
+    used_slots = set(m.dr_bid_slot[g].values())
+    empty_slots = [s for s in m.DR_BID_SLOTS if s not in used_slots]
+    if not empty_slots:
+        if not evict_bid(m, g):
+            add_bid_slots(m, len(m.DR_BID_SLOTS))
+        return activate_bid(m, b, g)
+
+    s = empty_slots[0]
+    m.dr_bid_slot[g][b] = s
+    m.dr_bid_zero_weight_iterations[g][b] = 0
+
+    # add the bids for each load zone and timepoint to the slot
+    for (z, ts, prices, demand, wtp) in m.dr_bid_data[g][b]:
         # record the private benefit
-        m.dr_bid_benefit[b, z, ts] = wtp
+        m.dr_bid_benefit[s, z, ts] = wtp
+        # free the weight; it has no value until the model is solved again
+        m.DRBidWeight[s, z, ts].unfix()
+        m.DRBidWeight[s, z, ts].value = None
         # record the level of demand for each timepoint
         for prod in m.DR_PRODUCTS:
             for i, tp in enumerate(m.TPS_IN_TS[ts]):
-                m.dr_bid[b, z, tp, prod] = demand[prod][i]
-                m.dr_price[b, z, tp, prod] = prices[prod][i]
-
-    print("len(m.DR_BID_LIST): {l}".format(l=len(m.DR_BID_LIST)))
-    print("m.DR_BID_LIST: {b}".format(b=[x for x in m.DR_BID_LIST]))
-
-    # reconstruct the components that depend on m.DR_BID_LIST, m.dr_bid_benefit and m.dr_bid
-    m.DRBidWeight.reconstruct()
-    m.DR_Convex_Bid_Weight.reconstruct()
-    m.DR_Load_Zone_Shared_Bid_Weight.reconstruct()
-    if hasattr(m, "DR_Flat_Bid_Weight"):
-        m.DR_Flat_Bid_Weight.reconstruct()
-    m.FlexibleDemand.reconstruct()
-    m.DemandUpReserveSales.reconstruct()
-    m.DemandDownReserveSales.reconstruct()
-    if hasattr(m, "DemandResponseSlackUp"):
-        m.DemandResponseSlackUp.reconstruct()
-        m.DemandResponseSlackDown.reconstruct()
-    if hasattr(m, "Limit_DemandResponseSpinningReserveUp"):
-        m.Limit_DemandResponseSpinningReserveUp.reconstruct()
-        m.Limit_DemandResponseSpinningReserveDown.reconstruct()
-
-    m.DR_Welfare_Cost.reconstruct()
-    # it seems like we have to reconstruct the higher-level components that depend on these
-    # ones (even though these are Expressions), because otherwise they refer to objects that
-    # used to be returned by the Expression but aren't any more (e.g., versions of DRBidWeight
-    # that no longer exist in the model).
-    # (i.e., Energy_Balance refers to the items returned by FlexibleDemand instead of referring
-    # to FlexibleDemand itself)
-    m.Zone_Energy_Balance.reconstruct()
-    if hasattr(m, "Aggregate_Spinning_Reserve_Details"):
-        m.Aggregate_Spinning_Reserve_Details.reconstruct()
-    if hasattr(m, "Satisfy_Spinning_Reserve_Up_Requirement"):
-        m.Satisfy_Spinning_Reserve_Up_Requirement.reconstruct()
-        m.Satisfy_Spinning_Reserve_Down_Requirement.reconstruct()
-    # reconstruct_energy_balance(m)
-    m.SystemCostPerPeriod.reconstruct()
-    m.SystemCost.reconstruct()
+                m.dr_bid[s, z, tp, prod] = demand[prod][i]
+                m.dr_price[s, z, tp, prod] = prices[prod][i]
+
+
+def evict_bid(m, g):
+    """
+    Remove a bid for timeseries group g from the model to make room for a new
+    one: the bid that has had zero weight for the most iterations or, if all of
+    them were used in the last solution, the one with the lowest total weight.
+    The current bid and bids added since the last solution are never removed.
+    Returns False if there is no bid that can be removed.
+    """
+    candidates = []
+    for b, s in m.dr_bid_slot[g].items():
+        weights = [
+            m.DRBidWeight[s, z, ts].value
+            for z in m.LOAD_ZONES
+            for ts in m.TS_IN_DR_BID_GROUP[g]
+        ]
+        if b != m.dr_current_bid.get(g) and None not in weights:
+            candidates.append(
+                (m.dr_bid_zero_weight_iterations[g][b], -sum(weights), -b)
+            )
+    if not candidates:
+        return False
+    deactivate_bid(m, -max(candidates)[2], g)
+    return True
+
+
+def deactivate_bid(m, b, g):
+    """
+    Remove bid b for timeseries group g from the model by fixing the weights
+    for its slot at zero in those timeseries; it can be restored later from
+    m.dr_bid_data.
+    """
+    s = m.dr_bid_slot[g].pop(b)
+    del m.dr_bid_zero_weight_iterations[g][b]
+    for z in m.LOAD_ZONES:
+        for ts in m.TS_IN_DR_BID_GROUP[g]:
+            m.DRBidWeight[s, z, ts].fix(0)
+
+
+def bid_vector(m, bids):
+    """Return an array of all the quantities and benefits in a list of bid tuples."""
+    return np.concatenate(
+        [
+            np.concatenate([demand[prod] for prod in m.DR_PRODUCTS] + [[wtp]])
+            for (z, ts, prices, demand, wtp) in bids
+        ]
+    )
+
+
+def find_duplicate_bid(m, g, new):
+    """
+    Return the ID of a bid previously received for timeseries group g (active
+    or pruned) whose quantities and benefits all match those in new (see
+    bid_vector()) within --dr-bid-dedupe-tolerance, or None if there is no
+    such bid.
+    """
+    tolerance = m.options.dr_bid_dedupe_tolerance * max(np.abs(new).max(), 1.0)
+    for b, old in m.dr_bid_vector[g].items():
+        if np.abs(old - new).max() <= tolerance:
+            return b
+    return None
+
+
+def update_bid_pool(m):
+    """
+    Remove bids that have had zero weight in a timeseries group for
+    --dr-bid-prune-iterations consecutive iterations from the model, and
+    restore any pruned bids that would cost less than the current solution in
+    their timeseries, based on the marginal costs from the last solution (i.e.,
+    pruned bids with a negative reduced cost). Bids are only restored into
+    empty slots, leaving one free for the next bid.
+    """
+    for g in m.DR_BID_GROUPS:
+        for b, s in m.dr_bid_slot[g].items():
+            if all(
+                abs(value(m.DRBidWeight[s, z, ts])) <= 1e-9
+                for z in m.LOAD_ZONES
+                for ts in m.TS_IN_DR_BID_GROUP[g]
+            ):
+                m.dr_bid_zero_weight_iterations[g][b] += 1
+            else:
+                m.dr_bid_zero_weight_iterations[g][b] = 0
+    if m.options.dr_bid_prune_iterations <= 0:
+        return
+
+    # cost of the current solution in each timeseries, calculated the same way
+    # as prev_cost in pre_iterate(); a pruned bid with lower cost at the same
+    # marginal costs would improve the solution if it were available
+    current_cost = {
+        ts: value(
+            sum(
+                (
+                    sum(
+                        m.prev_marginal_cost[z, tp, prod] * m.prev_demand[z, tp, prod]
+                        for z in m.LOAD_ZONES
+                        for prod in m.DR_PRODUCTS
+                    )
+                    + m.DR_Welfare_Cost[tp]
+                )
+                * m.bring_timepoint_costs_to_base_year[tp]
+                for tp in m.TPS_IN_TS[ts]
+            )
+        )
+        for ts in m.TIMESERIES
+    }
+    pruned, restored = 0, 0
+    for g in m.DR_BID_GROUPS:
+        g_pruned = [
+            b
+            for b in m.dr_bid_slot[g]
+            if b != m.dr_current_bid[g]
+            and m.dr_bid_zero_weight_iterations[g][b]
+            >= m.options.dr_bid_prune_iterations
+        ]
+        for b in g_pruned:
+            deactivate_bid(m, b, g)
+        pruned += len(g_pruned)
+
+        g_cost = sum(current_cost[ts] for ts in m.TS_IN_DR_BID_GROUP[g])
+        candidates = []
+        for b, bids in m.dr_bid_data[g].items():
+            if b in m.dr_bid_slot[g] or b in g_pruned:
+                continue
+            bid_cost = sum(
+                (
+                    sum(
+                        m.prev_marginal_cost[z, tp, prod] * demand[prod][i]
+                        for prod in m.DR_PRODUCTS
+                    )
+                    - wtp * m.tp_duration_hrs[tp] / m.ts_num_tps[ts]
+                )
+                * m.bring_timepoint_costs_to_base_year[tp]
+                for (z, ts, prices, demand, wtp) in bids
+                for i, tp in enumerate(m.TPS_IN_TS[ts])
+            )
+            if bid_cost < g_cost - 1e-6 * max(abs(g_cost), 1.0):
+                candidates.append((bid_cost, b))
+        # restore the most promising bids first
+        free_slots = len(m.DR_BID_SLOTS) - len(m.dr_bid_slot[g]) - 1
+        for bid_cost, b in sorted(candidates)[: max(free_slots, 0)]:
+            activate_bid(m, b, g)
+            restored += 1
+
+    if pruned or restored:
+        m.logger.info(
+            f"Pruned {pruned} and restored {restored} demand response bids; "
+            f"{sum(len(slots) for slots in m.dr_bid_slot.values())} of "
+            f"{sum(len(data) for data in m.dr_bid_data.values())} bids are active "
+            f"in {len(m.DR_BID_GROUPS)} timeseries groups."
+        )
+
+
+def add_bid_slots(m, n):
+    """
+    Add n slots to DR_BID_SLOTS (with weights fixed at zero) and rebuild the
+    components that depend on it. This is only needed if there are too few
+    slots to hold the current bid and the ones added since the last solution
+    (see evict_bid()), since the rest of the model is rebuilt too.
+    """
+    m.logger.warning(
+        f"WARNING: adding {n} demand response bid slots and rebuilding the model; "
+        "use a higher value for --dr-bid-slots to avoid this."
+    )
+    new_slots = range(len(m.DR_BID_SLOTS) + 1, len(m.DR_BID_SLOTS) + n + 1)
+    for s in new_slots:
+        m.DR_BID_SLOTS.add(s)
+        for z in m.LOAD_ZONES:
+            for ts in m.TIMESERIES:
+                m.DRBidWeight[s, z, ts].fix(0)
+
+    # reconstruct the components that depend on m.DR_BID_SLOTS
+    # (optional ones are only present with some settings)
+    component_names = [
+        "DR_Convex_Bid_Weight",
+        "DR_Load_Zone_Shared_Bid_Weight",
+        "DR_Flat_Bid_Weight",  # optional
+        "FlexibleDemand",
+        "DemandUpReserveSales",
+        "DemandDownReserveSales",
+        "DemandResponseSlackUp",  # optional
+        "DemandResponseSlackDown",  # optional
+        "Limit_DemandResponseSpinningReserveUp",  # optional
+        "Limit_DemandResponseSpinningReserveDown",  # optional
+        "DR_Welfare_Cost",
+        # it seems like we have to reconstruct the higher-level components that depend on these
+        # ones (even though these are Expressions), because otherwise they refer to objects that
+        # used to be returned by the Expression but aren't any more (e.g., versions of DRBidWeight
+        # that no longer exist in the model).
+        # (i.e., Energy_Balance refers to the items returned by FlexibleDemand instead of referring
+        # to FlexibleDemand itself)
+        "Zone_Energy_Balance",
+        "Aggregate_Spinning_Reserve_Details",  # optional
+        "Satisfy_Spinning_Reserve_Up_Requirement",  # optional
+        "Satisfy_Spinning_Reserve_Down_Requirement",  # optional
+        "SystemCostPerPeriod",
+        "SystemCost",
+    ]
+    components = [getattr(m, c) for c in component_names if hasattr(m, c)]
+    for c in components:
+        reconstruct(c)
+
+    # tell the persistent solver (if any) to resend these
+    m.mark_changed(*components)
+
+
+def reconstruct(component):
+    """
+    Rebuild component from its rule (component.reconstruct() was removed in
+    Pyomo 6.0).
+    """
+    component.clear()
+    component._constructed = False
+    component.construct()
 
 
 def reconstruct_energy_balance(m):
     """Reconstruct Energy_Balance constraint, preserving dual values (if present)."""
     # copy the existing Energy_Balance object
     old_Energy_Balance = dict(m.Zone_Energy_Balance)
-    m.Zone_Energy_Balance.reconstruct()
+    reconstruct(m.Zone_Energy_Balance)
     # TODO: now that this happens just before a solve, there may be no need to
     # preserve duals across the reconstruct().
     if m.iteration_number > 0:
@@ -1201,7 +1683,6 @@ def summary_values(m):
     # note: if switching to using the offered prices, then you may have to use None
     # as the customer payment during iteration 0, since m.dr_price[last_bid, z, tp, prod]
     # may not be defined yet.
-    last_bid = m.DR_BID_LIST.last()
     values.extend(
         [
             sum(
@@ -1249,7 +1730,6 @@ def write_results(m, include_iter_num=True):
     avg_ts_scale = float(sum(m.ts_scale_to_year[ts] for ts in m.TIMESERIES)) / len(
         m.TIMESERIES
     )
-    last_bid = m.DR_BID_LIST.last()
 
     # get final prices that will be charged to customers (not necessarily
     # the same as the final prices they were offered, if iteration was
@@ -1266,7 +1746,7 @@ def write_results(m, include_iter_num=True):
         (lz, tp, prod): value(
             sum(
                 m.DRBidWeight[b, lz, ts] * m.dr_bid[b, lz, tp, prod]
-                for b in m.DR_BID_LIST
+                for b in m.DR_BID_SLOTS
             )
         )
         for lz in m.LOAD_ZONES
@@ -1340,8 +1820,14 @@ def write_results(m, include_iter_num=True):
         )
         + tuple(getattr(m, component)[z, t] for component in m.Zone_Power_Injections)
         + tuple(getattr(m, component)[z, t] for component in m.Zone_Power_Withdrawals)
-        + tuple(m.dr_price[last_bid, z, t, prod] for prod in m.DR_PRODUCTS)
-        + tuple(m.dr_bid[last_bid, z, t, prod] for prod in m.DR_PRODUCTS)
+        + tuple(
+            m.dr_price[current_bid_slot(m, m.tp_ts[t]), z, t, prod]
+            for prod in m.DR_PRODUCTS
+        )
+        + tuple(
+            m.dr_bid[current_bid_slot(m, m.tp_ts[t]), z, t, prod]
+            for prod in m.DR_PRODUCTS
+        )
         + tuple(electricity_marginal_cost(m, z, t, prod) for prod in m.DR_PRODUCTS)
         + tuple(final_prices[z, t, prod] for prod in m.DR_PRODUCTS)
         + tuple(final_quantities[z, t, prod] for prod in m.DR_PRODUCTS)
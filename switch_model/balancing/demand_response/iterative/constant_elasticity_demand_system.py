@@ -1,15 +1,26 @@
 from __future__ import division
 
 
-def calibrate(base_data, dr_elasticity_scenario=3):
-    """Accept a list of tuples showing [base hourly loads], and [base hourly prices] for each
-    location (load_zone) and date (time_series). Store these for later reference by bid().
+def define_arguments(argparser):
+    argparser.add_argument(
+        "--dr-elasticity-scenario",
+        type=int,
+        default=3,
+        help="Choose a scenario of customer elasticity (1-3), defining the share of "
+        "load that can be shifted between hours (10%%, 20%% or 30%%).",
+    )
+
+
+def calibrate(m, base_data):
+    """Accept a list of tuples showing load_zone, time_series, [base hourly loads], [base hourly prices]
+    for each load_zone and time_series (day). Store these for later reference by bid() and bid_all().
     """
     # import numpy; we delay till here to avoid interfering with unit tests
     global np
     import numpy as np
 
     global base_load_dict, base_price_dict, elasticity_scenario
+    global zone_index, ts_index, base_loads, base_prices, valid_hours
     # build dictionaries (indexed lists) of base loads and prices
     # store the load and price vectors as numpy arrays (vectors) for faste calculation later
     base_load_dict = {
@@ -20,34 +31,92 @@ def calibrate(base_data, dr_elasticity_scenario=3):
         (z, ts): np.array(base_prices, float)
         for (z, ts, base_loads, base_prices) in base_data
     }
-    elasticity_scenario = dr_elasticity_scenario
+    elasticity_scenario = m.options.dr_elasticity_scenario
 
+    # also store base loads and prices as 3-d arrays, indexed by load zone,
+    # time series and hour, for use by bid_all(). Time series with fewer hours
+    # than the longest one are padded with zero load and a price of 1.
+    zone_index = {}
+    ts_index = {}
+    for (z, ts) in base_load_dict:
+        zone_index.setdefault(z, len(zone_index))
+        ts_index.setdefault(ts, len(ts_index))
+    shape = (
+        len(zone_index),
+        len(ts_index),
+        max(len(bl) for bl in base_load_dict.values()),
+    )
+    base_loads = np.zeros(shape)
+    base_prices = np.ones(shape)
+    valid_hours = np.zeros(shape, dtype=bool)
+    for (z, ts), bl in base_load_dict.items():
+        i, j, n = zone_index[z], ts_index[ts], len(bl)
+        base_loads[i, j, :n] = bl
+        base_prices[i, j, :n] = base_price_dict[z, ts]
+        valid_hours[i, j, :n] = True
 
-def bid(load_zone, time_series, prices):
-    """Accept a vector of current prices, for a particular location (load_zone) and day (time_series).
-    Return a tuple showing hourly load levels and willingness to pay for those loads (relative to the
-    loads achieved at the base_price).
+
+def bid(m, load_zone, time_series, prices):
+    """Accept a dictionary of vectors of current prices for each product, for a particular location
+    (load_zone) and day (time_series). Return a tuple showing a dictionary of hourly quantities of each
+    product and willingness to pay for those quantities (relative to the loads achieved at the base_price).
 
     This version assumes that part of the load is price elastic with constant elasticity of 0.1 and no
     substitution between hours (this part is called "elastic load" below), and the rest of the load is inelastic
-    in total volume, but schedules itself to the cheapest hours (this part is called "shiftable load")."""
+    in total volume, but schedules itself to the cheapest hours (this part is called "shiftable load").
+    Customers do not offer reserves, so zero quantities are returned for all products other than energy.
+    """
+    # pad the price vectors to the length of the longest time series
+    n = len(prices["energy"])
+    price_arrays = {}
+    for prod, v in prices.items():
+        price_arrays[prod] = np.zeros((1, 1, base_loads.shape[-1]))
+        price_arrays[prod][0, 0, :n] = v
+    demand, wtp = bid_all(m, [load_zone], [time_series], price_arrays)
+    return ({prod: list(d[0, 0, :n]) for prod, d in demand.items()}, float(wtp[0, 0]))
+
+
+def bid_all(m, load_zones, time_series, prices):
+    """Calculate bids for many load zones and time series at once.
+
+    prices is a dictionary of arrays of prices for each product, with dimensions
+    of (load zone, time series, hour), or that can be broadcast to that shape
+    (e.g., prices[:, :, None] to apply a single price to all hours). The hour
+    dimension must be as long as the longest time series given to calibrate();
+    prices for hours beyond the end of shorter time series are ignored.
+
+    Returns a tuple showing a dictionary of arrays of hourly quantities of each
+    product, with dimensions of (load zone, time series, hour), and an array of
+    willingness to pay for those quantities, with dimensions of (load zone,
+    time series). Quantities are zero for hours beyond the end of each time
+    series. See bid() for a description of the demand system.
+    """
 
     elasticity = 0.1
     shiftable_share = 0.1 * elasticity_scenario  # 1-3
 
-    # convert prices to a numpy vector, and make non-zero
-    # to avoid errors when raising to a negative power
-    p = np.maximum(1.0, np.array(prices, float))
+    # get arrays of base loads and prices for these locations and dates
+    idx = np.ix_(
+        [zone_index[z] for z in load_zones], [ts_index[ts] for ts in time_series]
+    )
+    bl = base_loads[idx]
+    bp = base_prices[idx]
+    valid = valid_hours[idx]
 
-    # get vectors of base loads and prices for this location and date
-    bl = base_load_dict[load_zone, time_series]
-    bp = base_price_dict[load_zone, time_series]
+    # make prices non-zero to avoid errors when raising to a negative power
+    # and use base prices for hours beyond the end of each time series
+    p = np.where(valid, np.maximum(1.0, prices["energy"]), bp)
 
     # spread shiftable load among all minimum-cost hours,
     # shaped like the original load during those hours (so base prices result in base loads)
-    mins = p == np.min(p)
-    shiftable_load = np.zeros(len(p))
-    shiftable_load[mins] = bl[mins] * shiftable_share * np.sum(bl) / sum(bl[mins])
+    p_min = np.where(valid, p, np.inf).min(axis=-1, keepdims=True)
+    min_load = np.where(valid & (p == p_min), bl, 0.0)
+    shiftable_load = (
+        min_load
+        * shiftable_share
+        * bl.sum(axis=-1, keepdims=True)
+        / min_load.sum(axis=-1, keepdims=True)
+    )
 
     # the shiftable load is inelastic, so wtp is the same high number, regardless of when the load is served
     # so _relative_ wtp is always zero
@@ -60,14 +129,18 @@ def bid(load_zone, time_series, prices):
     # if p < bp, consumer surplus decreases as we move from p to bp, so cs_p - cs_p0
     # (given by this integral) is positive.
     elastic_load_cs_diff = np.sum(
-        (1 - (p / bp) ** (1 - elasticity)) * bp * elastic_base_load / (1 - elasticity)
+        (1 - (p / bp) ** (1 - elasticity)) * bp * elastic_base_load / (1 - elasticity),
+        axis=-1,
     )
     # _relative_ amount actually paid for elastic load under current price, vs base price
-    base_elastic_load_paid = np.sum(bp * elastic_base_load)
-    elastic_load_paid = np.sum(p * elastic_load)
+    base_elastic_load_paid = np.sum(bp * elastic_base_load, axis=-1)
+    elastic_load_paid = np.sum(p * elastic_load, axis=-1)
     elastic_load_paid_diff = elastic_load_paid - base_elastic_load_paid
 
-    demand = shiftable_load + elastic_load
+    energy = shiftable_load + elastic_load
+    demand = {
+        prod: energy if prod == "energy" else np.zeros_like(energy) for prod in prices
+    }
     wtp = shiftable_load_wtp + elastic_load_cs_diff + elastic_load_paid_diff
 
     return (demand, wtp)
@@ -0,0 +1,490 @@
+# Copyright (c) 2015-2022 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2.0, which is in the LICENSE file.
+
+"""
+Benders decomposition solver used by `switch solve --benders`.
+
+The constructed model is extracted into a sparse matrix (see
+switch_model.fast_writer), so all constraints come from the standard module
+rules. Columns for the investment variables (BuildGen, BuildMinGenCap,
+BuildUnits, BuildStorageEnergy, BuildTx and BuildLocalTD, plus any components
+named with --benders-master-vars) form the master problem. The remaining
+columns are divided into independent subproblems: two columns are in the same
+subproblem if they appear together in any constraint. Usually this gives one
+subproblem per timeseries, but timeseries are joined if they share any
+dispatch variables or constraints (e.g., fuel supply tiers or annual limits
+that apply to a whole period). Subproblems must be linear programs.
+
+Each iteration solves the master problem (an LP or MILP) to choose the
+investment variables, then solves the subproblems in parallel worker
+processes with those investments, and adds an optimality cut to the master
+problem for each subproblem, based on the duals of its constraints. Each
+subproblem may violate its constraints that include investment variables at
+a high cost per unit (--benders-penalty), so it can give a cut even if the
+investments are not sufficient. Iteration continues until the upper bound
+from the best solution found so far is within --benders-tolerance of the
+lower bound from the master problem. Then the best solution is loaded into
+the model, with duals for all subproblem constraints.
+
+Master problems and subproblems are solved with HiGHS via highspy. Worker
+processes keep their subproblems loaded between iterations, so each solve
+starts from the previous solution.
+"""
+
+import multiprocessing, time
+
+import numpy as np
+from pyomo.environ import minimize
+from pyomo.opt import TerminationCondition
+
+from switch_model.fast_writer import MatrixModel, highs_lp, make_results
+from switch_model.utilities import StepTimer
+
+# investment variables assigned to the master problem
+master_var_names = [
+    "BuildGen",
+    "BuildMinGenCap",
+    "BuildUnits",
+    "BuildStorageEnergy",
+    "BuildTx",
+    "BuildLocalTD",
+]
+
+
+def import_highspy():
+    try:
+        import highspy
+    except ImportError:
+        print(
+            "Unable to import highspy, which is needed to solve with "
+            "--benders. Please install it via 'pip install highspy'."
+        )
+        raise
+    return highspy
+
+
+def find_blocks(mm, is_master):
+    """
+    Assign each column and row of the MatrixModel to a subproblem (block).
+    Returns (col_block, row_block), with -1 for master columns and rows.
+    Non-master columns that share a row are in the same block; non-master
+    columns that appear in no rows are all put in one block.
+    """
+    nz_col = np.repeat(np.arange(mm.n_cols), np.diff(mm.col_start))
+    nz_row = mm.row_index
+    sub = ~is_master[nz_col]
+    r, c = nz_row[sub], nz_col[sub]
+
+    # label each column with the lowest column number in its connected
+    # component, by alternately taking the minimum across each row and
+    # jumping to the label's own label
+    label = np.arange(mm.n_cols)
+    while True:
+        row_min = np.full(mm.n_rows, mm.n_cols)
+        np.minimum.at(row_min, r, label[c])
+        new_label = label.copy()
+        np.minimum.at(new_label, c, row_min[r])
+        while True:
+            jumped = new_label[new_label]
+            if np.array_equal(jumped, new_label):
+                break
+            new_label = jumped
+        if np.array_equal(new_label, label):
+            break
+        label = new_label
+
+    in_rows = np.zeros(mm.n_cols, dtype=bool)
+    in_rows[c] = True
+    orphans = ~is_master & ~in_rows
+    if orphans.any():
+        label[orphans] = np.flatnonzero(orphans)[0]
+    label[is_master] = -1
+    # renumber blocks as 0, 1, 2, ... in order of first column
+    labels, col_block = np.unique(label, return_inverse=True)
+    col_block = col_block - (1 if labels[0] == -1 else 0)
+    col_block[is_master] = -1
+
+    row_block = np.full(mm.n_rows, -1)
+    row_block[r] = col_block[c]
+    return col_block, row_block
+
+
+class Subproblem(object):
+    """
+    Linear subproblem for one block of columns and rows, with elastic
+    variables for each row that includes master columns.
+    """
+
+    def __init__(self, mm, cols, rows, master_pos, penalty):
+        self.cols = cols
+        self.rows = rows
+        n_cols, n_rows = len(cols), len(rows)
+        col_local = {c: i for i, c in enumerate(cols.tolist())}
+        row_local = np.full(mm.n_rows, -1)
+        row_local[rows] = np.arange(n_rows)
+
+        block_coo = [], [], []  # rows, cols, coefs
+        link_coo = [], [], []  # rows, master positions, coefs
+        for i, c in enumerate(cols.tolist()):
+            nz = slice(mm.col_start[c], mm.col_start[c + 1])
+            block_coo[0].append(row_local[mm.row_index[nz]])
+            block_coo[1].append(np.full(nz.stop - nz.start, i))
+            block_coo[2].append(mm.coef[nz])
+        for c, pos in master_pos.items():
+            nz = slice(mm.col_start[c], mm.col_start[c + 1])
+            local = row_local[mm.row_index[nz]]
+            mine = local >= 0
+            if mine.any():
+                link_coo[0].append(local[mine])
+                link_coo[1].append(np.full(mine.sum(), pos))
+                link_coo[2].append(mm.coef[nz][mine])
+        self.link_rows, self.link_pos, self.link_coef = (
+            np.concatenate(a) if a else np.zeros(0) for a in link_coo
+        )
+        self.link_rows = self.link_rows.astype(np.int64)
+        self.link_pos = self.link_pos.astype(np.int64)
+
+        # add elastic columns (+1 and -1) for each row with master columns
+        elastic_rows = np.unique(self.link_rows)
+        n_elastic = len(elastic_rows)
+        block_coo[0].extend([elastic_rows, elastic_rows])
+        block_coo[1].extend(
+            [
+                n_cols + np.arange(n_elastic),
+                n_cols + n_elastic + np.arange(n_elastic),
+            ]
+        )
+        block_coo[2].extend([np.ones(n_elastic), -np.ones(n_elastic)])
+        b_rows, b_cols, b_coef = (np.concatenate(a) for a in block_coo)
+        order = np.argsort(b_cols, kind="stable")
+        total_cols = n_cols + 2 * n_elastic
+        col_start = np.zeros(total_cols + 1, dtype=np.int64)
+        col_start[1:] = np.cumsum(np.bincount(b_cols, minlength=total_cols))
+
+        self.n_cols = n_cols
+        self.n_elastic = n_elastic
+        self.penalty = penalty
+        self.cost = np.concatenate([mm.obj_coef[cols], np.full(2 * n_elastic, penalty)])
+        self.col_lower = np.concatenate([mm.col_lower[cols], np.zeros(2 * n_elastic)])
+        self.col_upper = np.concatenate(
+            [mm.col_upper[cols], np.full(2 * n_elastic, np.inf)]
+        )
+        self.row_lower = mm.row_lower[rows]
+        self.row_upper = mm.row_upper[rows]
+        self.col_start = col_start
+        self.row_index = b_rows[order].astype(np.int32)
+        self.coef = b_coef[order]
+        self.highs = None
+
+    def load(self):
+        highspy = import_highspy()
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.highs.passModel(
+            highs_lp(
+                self.cost,
+                self.col_lower,
+                self.col_upper,
+                self.row_lower,
+                self.row_upper,
+                self.col_start,
+                self.row_index,
+                self.coef,
+            )
+        )
+
+    def solve(self, x, penalty=None):
+        """
+        Solve the subproblem with master variables set to x (an array of
+        master column values). Returns (objective, cut positions, cut
+        coefficients, column values, row duals, elastic violation).
+        """
+        highspy = import_highspy()
+        if self.highs is None:
+            self.load()
+        h = self.highs
+        shift = np.bincount(
+            self.link_rows,
+            weights=self.link_coef * x[self.link_pos],
+            minlength=len(self.rows),
+        )
+        h.changeRowsBounds(
+            len(self.rows),
+            np.arange(len(self.rows), dtype=np.int32),
+            np.clip(self.row_lower - shift, -highspy.kHighsInf, highspy.kHighsInf),
+            np.clip(self.row_upper - shift, -highspy.kHighsInf, highspy.kHighsInf),
+        )
+        if self.n_elastic:
+            elastic = np.arange(self.n_cols, self.n_cols + 2 * self.n_elastic)
+            h.changeColsCost(
+                len(elastic),
+                elastic.astype(np.int32),
+                np.full(len(elastic), self.penalty if penalty is None else penalty),
+            )
+        h.run()
+        status = h.getModelStatus()
+        if status != highspy.HighsModelStatus.kOptimal:
+            return (h.modelStatusToString(status),) + (None,) * 5
+        solution = h.getSolution()
+        values = np.array(solution.col_value)
+        duals = np.array(solution.row_dual)
+        objective = h.getInfo().objective_function_value
+        # derivative of objective with respect to each master variable
+        # (row bounds move by -coef * x, and duals give d(objective)/d(bound))
+        grad = np.zeros(len(x))
+        np.add.at(grad, self.link_pos, -self.link_coef * duals[self.link_rows])
+        cut_pos = np.unique(self.link_pos)
+        violation = values[self.n_cols :].sum()
+        return (
+            objective,
+            cut_pos,
+            grad[cut_pos],
+            values[: self.n_cols],
+            duals,
+            violation,
+        )
+
+
+def worker(conn, subproblems):
+    """
+    Solve the assigned subproblems each time a request is received from the
+    main process, and send back the results.
+    """
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        x, penalty, full = request
+        results = []
+        for k, sp in subproblems.items():
+            objective, cut_pos, cut_coef, values, duals, violation = sp.solve(
+                x, penalty
+            )
+            if not full:
+                values = duals = None
+            results.append((k, objective, cut_pos, cut_coef, values, duals, violation))
+        conn.send(results)
+    conn.close()
+
+
+class SubproblemPool(object):
+    """
+    Solve subproblems in worker processes (or in this process if jobs is 1).
+    """
+
+    def __init__(self, subproblems, jobs):
+        self.subproblems = subproblems
+        self.workers = []
+        if jobs > 1:
+            for j in range(min(jobs, len(subproblems))):
+                assigned = {k: sp for k, sp in enumerate(subproblems) if k % jobs == j}
+                parent_conn, child_conn = multiprocessing.Pipe()
+                p = multiprocessing.Process(
+                    target=worker, args=(child_conn, assigned), daemon=True
+                )
+                p.start()
+                self.workers.append((p, parent_conn))
+
+    def solve(self, x, penalty=None, full=False):
+        if not self.workers:
+            results = []
+            for k, sp in enumerate(self.subproblems):
+                r = sp.solve(x, penalty)
+                if not full:
+                    r = r[:3] + (None, None) + r[5:]
+                results.append((k,) + r)
+        else:
+            for p, conn in self.workers:
+                conn.send((x, penalty, full))
+            results = [r for p, conn in self.workers for r in conn.recv()]
+        return sorted(results, key=lambda r: r[0])
+
+    def close(self):
+        for p, conn in self.workers:
+            conn.send(None)
+            p.join()
+
+
+def solve_benders(model):
+    """
+    Solve the model by Benders decomposition and return a Pyomo results
+    object holding the best solution found (not yet loaded into the model).
+    """
+    highspy = import_highspy()
+    timer = StepTimer()
+    options = model.options
+    mm = MatrixModel(model)
+    if mm.sense != minimize:
+        raise ValueError("--benders can only be used with minimization models.")
+
+    names = set(master_var_names) | set(options.benders_master_vars)
+    is_master = np.array(
+        [v.parent_component().name in names for v in mm.vars], dtype=bool
+    )
+    col_block, row_block = find_blocks(mm, is_master)
+    n_blocks = col_block.max() + 1
+    sub_integer = mm.integer & ~is_master
+    if sub_integer.any():
+        components = sorted(
+            {mm.vars[j].parent_component().name for j in np.flatnonzero(sub_integer)}
+        )
+        raise ValueError(
+            "Benders subproblems must be linear programs, but these integer "
+            f"variables are not in the master problem: {', '.join(components)}. "
+            "You can add them to the master problem with --benders-master-vars."
+        )
+
+    master_cols = np.flatnonzero(is_master)
+    master_pos = {c: i for i, c in enumerate(master_cols.tolist())}
+    n_master = len(master_cols)
+    penalty = options.benders_penalty
+    if penalty is None:
+        # high enough to discourage violations, but low enough to avoid
+        # numerical problems in the master problem from very steep cuts
+        penalty = 10 * max(np.abs(mm.obj_coef).max(initial=0), 1)
+
+    col_order = np.argsort(col_block, kind="stable")
+    col_splits = np.searchsorted(col_block[col_order], np.arange(n_blocks + 1))
+    row_order = np.argsort(row_block, kind="stable")
+    row_splits = np.searchsorted(row_block[row_order], np.arange(n_blocks + 1))
+    subproblems = [
+        Subproblem(
+            mm,
+            col_order[col_splits[k] : col_splits[k + 1]],
+            row_order[row_splits[k] : row_splits[k + 1]],
+            master_pos,
+            penalty,
+        )
+        for k in range(n_blocks)
+    ]
+    model.logger.info(
+        f"Divided model into a master problem with {n_master} columns and "
+        f"{n_blocks} subproblems with up to "
+        f"{max((sp.n_cols for sp in subproblems), default=0)} columns "
+        f"in {timer.step_time():.2f} s."
+    )
+
+    # master problem: master columns, then one cost column per subproblem
+    master_rows = np.flatnonzero(row_block == -1)
+    row_local = np.full(mm.n_rows, -1)
+    row_local[master_rows] = np.arange(len(master_rows))
+    starts, indices, coefs = [0], [], []
+    for c in master_cols.tolist():
+        nz = slice(mm.col_start[c], mm.col_start[c + 1])
+        local = row_local[mm.row_index[nz]]
+        keep = local >= 0
+        indices.append(local[keep])
+        coefs.append(mm.coef[nz][keep])
+        starts.append(starts[-1] + keep.sum())
+    starts.extend([starts[-1]] * n_blocks)
+
+    pool = SubproblemPool(subproblems, options.benders_jobs)
+    try:
+        # lower bound for each subproblem's cost, with no limit from the
+        # master variables
+        bounds = pool.solve(np.zeros(n_master), penalty=0)
+        theta_lower = np.array(
+            [-np.inf if r[1] is None or isinstance(r[1], str) else r[1] for r in bounds]
+        )
+
+        master = highspy.Highs()
+        master.setOptionValue("output_flag", bool(options.tee))
+        master.setOptionValue("mip_rel_gap", 0.0)
+        master.passModel(
+            highs_lp(
+                np.concatenate([mm.obj_coef[master_cols], np.ones(n_blocks)]),
+                np.concatenate([mm.col_lower[master_cols], theta_lower]),
+                np.concatenate([mm.col_upper[master_cols], np.full(n_blocks, np.inf)]),
+                mm.row_lower[master_rows],
+                mm.row_upper[master_rows],
+                np.array(starts, dtype=np.int64),
+                np.concatenate(indices).astype(np.int32)
+                if indices
+                else np.zeros(0, dtype=np.int32),
+                np.concatenate(coefs) if coefs else np.zeros(0),
+                integer=np.concatenate(
+                    [mm.integer[master_cols], np.zeros(n_blocks, dtype=bool)]
+                )
+                if mm.integer[master_cols].any()
+                else None,
+            )
+        )
+
+        best = None  # (upper bound, master values)
+        lower = -np.inf
+        termination = TerminationCondition.maxIterations
+        for iteration in range(1, options.benders_max_iterations + 1):
+            master.run()
+            status = master.getModelStatus()
+            if status != highspy.HighsModelStatus.kOptimal:
+                raise RuntimeError(
+                    "Benders master problem could not be solved: "
+                    + master.modelStatusToString(status)
+                )
+            solution = np.array(master.getSolution().col_value)
+            x = solution[:n_master]
+            lower = master.getInfo().objective_function_value + mm.obj_constant
+
+            results = pool.solve(x)
+            failed = [r for r in results if isinstance(r[1], str) or r[1] is None]
+            if failed:
+                raise RuntimeError(
+                    f"Benders subproblem {failed[0][0]} could not be solved: "
+                    f"{failed[0][1]}"
+                )
+            upper = (
+                mm.obj_coef[master_cols] @ x
+                + sum(r[1] for r in results)
+                + mm.obj_constant
+            )
+            if best is None or upper < best[0]:
+                best = (upper, x)
+            gap = (best[0] - lower) / max(abs(best[0]), 1)
+            model.logger.info(
+                f"Benders iteration {iteration}: lower bound {lower:.6g}, "
+                f"upper bound {best[0]:.6g}, gap {gap:.3g} "
+                f"({timer.step_time():.2f} s)."
+            )
+            if gap <= options.benders_tolerance:
+                termination = TerminationCondition.optimal
+                break
+
+            # add cuts: theta_k - grad @ x >= objective_k - grad @ x_hat
+            for k, objective, cut_pos, cut_coef, _, _, _ in results:
+                master.addRow(
+                    objective - cut_coef @ x[cut_pos],
+                    highspy.kHighsInf,
+                    len(cut_pos) + 1,
+                    np.append(cut_pos, n_master + k).astype(np.int32),
+                    np.append(-cut_coef, 1.0),
+                )
+
+        # recover subproblem solutions for the best master solution
+        upper, x = best
+        results = pool.solve(x, full=True)
+    finally:
+        pool.close()
+
+    violation = sum(r[6] for r in results)
+    if violation > 1e-6:
+        model.logger.warning(
+            f"WARNING: The Benders solution violates constraints by a total of "
+            f"{violation:.3g}. The model may be infeasible, or you may need "
+            f"to use a higher --benders-penalty (currently {penalty:.3g})."
+        )
+    values = np.zeros(mm.n_cols)
+    values[master_cols] = x
+    duals = np.zeros(mm.n_rows)
+    for (k, _, _, _, sp_values, sp_duals, _), sp in zip(results, subproblems):
+        values[sp.cols] = sp_values
+        duals[sp.rows] = sp_duals
+    return make_results(
+        mm,
+        "benders",
+        termination,
+        f"Benders decomposition stopped with gap {(upper - lower) / max(abs(upper), 1):.3g}",
+        upper - mm.obj_constant,
+        values,
+        duals,
+        None,
+    )
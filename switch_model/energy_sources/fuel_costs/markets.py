@@ -11,6 +11,7 @@ from __future__ import division
 import os
 import csv
 from pyomo.environ import *
+from switch_model.generators.core.build import gen_index_maps
 from switch_model.utilities import unique_list
 
 dependencies = (
@@ -327,23 +328,19 @@ def define_components(mod):
     # Components to link aggregate fuel consumption from project
     # dispatch into market framework
 
+    def rfms_for_gen(m, g):
+        rfms = []
+        for f in gen_index_maps(m).fuels_for_gen(g):
+            try:
+                rfms.append(m.zone_fuel_rfm[m.gen_load_zone[g], f])
+            except KeyError:  # no rfm provides this fuel
+                pass
+        return rfms
+
     def GENS_FOR_RFM_PERIOD_rule(m, rfm, p):
-        # Construct and cache list of gens for each rfm/period, then return them
-        # as needed
-        try:
-            d = m.GENS_FOR_RFM_PERIOD_dict
-        except AttributeError:
-            d = m.GENS_FOR_RFM_PERIOD_dict = dict()
-            for g in m.FUEL_BASED_GENS:
-                for f in m.FUELS_FOR_GEN[g]:
-                    try:
-                        _rfm = m.zone_fuel_rfm[m.gen_load_zone[g], f]
-                    except KeyError:  # no rfm provides this fuel
-                        pass
-                    else:
-                        for _p in m.PERIODS_FOR_GEN[g]:
-                            d.setdefault((_rfm, _p), []).append(g)
-        return d.pop((rfm, p), [])  # pop releases memory
+        # use a shared, cached grouping of gens by rfm and period
+        d = gen_index_maps(m).gens_by_key_period("rfm", lambda g: rfms_for_gen(m, g))
+        return d.get((rfm, p), [])
 
     mod.GENS_FOR_RFM_PERIOD = Set(
         mod.REGIONAL_FUEL_MARKETS,
@@ -10,6 +10,7 @@ from __future__ import division
 from pyomo.environ import *
 import os
 import pandas as pd
+from switch_model.reporting import record_data_frame
 
 dependencies = "switch_model.timescales"
 
@@ -352,6 +353,7 @@ def post_solve(instance, outdir):
         if instance.options.sorted_output:
             df.sort_index(inplace=True)
         df.to_csv(os.path.join(outdir, "electricity_cost.csv"))
+        record_data_frame(instance, "electricity_cost", df)
 
     # Itemized annual costs
     annualized_costs = [
@@ -392,3 +394,4 @@ def post_solve(instance, outdir):
     if instance.options.sorted_output:
         df.sort_index(inplace=True)
     df.to_csv(os.path.join(outdir, "costs_itemized.csv"))
+    record_data_frame(instance, "costs_itemized", df)
@@ -6,6 +6,7 @@ Defines generation projects build-outs.
 """
 
 import os
+import numpy as np
 from pyomo.environ import *
 from switch_model.financials import capital_recovery_factor as crf
 from switch_model.reporting import write_table
@@ -570,6 +571,191 @@ def define_components(mod):
     mod.Cost_Components_Per_Period.append("TotalGenFixedCosts")
 
 
+def define_dynamic_components(mod):
+    """
+    Release_Gen_Index_Maps frees the shared index maps (see gen_index_maps())
+    once all the components that use them have been constructed. This is
+    defined here, after all modules' regular components, so it runs after the
+    last set that is sliced from the maps, regardless of module order.
+    """
+
+    def rule(m):
+        if hasattr(m, "_gen_index_maps"):
+            del m._gen_index_maps
+
+    mod.Release_Gen_Index_Maps = BuildAction(rule=rule)
+
+
+def gen_index_maps(m):
+    """
+    Return the GenIndexMaps object for model instance m, creating it the first
+    time this is called. This should only be called while constructing
+    components that come after PERIODS_FOR_GEN and FUELS_FOR_GEN and are
+    defined in define_components(); the maps are released after those are
+    constructed (see define_dynamic_components()).
+    """
+    try:
+        return m._gen_index_maps
+    except AttributeError:
+        m._gen_index_maps = GenIndexMaps(m)
+        return m._gen_index_maps
+
+
+def _csr(lists):
+    """
+    Convert a list of lists of integers into compressed sparse row form:
+    an array of start positions (one more than the number of lists) and a
+    single array of all the members.
+    """
+    ptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(l) for l in lists])
+    idx = np.fromiter((i for l in lists for i in l), dtype=np.int64, count=int(ptr[-1]))
+    return ptr, idx
+
+
+class GenIndexMaps(object):
+    """
+    Sparse incidence maps between generation projects, periods, timepoints and
+    fuels, shared by the modules that need to slice these sets. Pyomo's
+    indexed sets are slow to slice and cross, so each relationship is stored
+    once as compressed integer arrays (positions in GENERATION_PROJECTS,
+    PERIODS, TIMEPOINTS and FUELS) and converted back to set members on
+    request. All lists follow the same order as the Pyomo sets they mirror,
+    e.g., timepoints for a project are in order of PERIODS_FOR_GEN and then
+    TPS_IN_PERIOD.
+    """
+
+    def __init__(self, m):
+        self.gens = list(m.GENERATION_PROJECTS)
+        self.periods = list(m.PERIODS)
+        self.timepoints = list(m.TIMEPOINTS)
+        self.fuels = list(m.FUELS)
+        self.gen_pos = {g: i for i, g in enumerate(self.gens)}
+        self.period_pos = {p: i for i, p in enumerate(self.periods)}
+        tp_pos = {t: i for i, t in enumerate(self.timepoints)}
+        fuel_pos = {f: i for i, f in enumerate(self.fuels)}
+
+        # gen -> active periods and the transpose, period -> active gens
+        self.gen_period_ptr, self.gen_period_idx = _csr(
+            [[self.period_pos[p] for p in m.PERIODS_FOR_GEN[g]] for g in self.gens]
+        )
+        gen_of_entry = np.repeat(
+            np.arange(len(self.gens)), np.diff(self.gen_period_ptr)
+        )
+        # stable sort keeps gens in GENERATION_PROJECTS order within each period
+        order = np.argsort(self.gen_period_idx, kind="stable")
+        self.period_gen_idx = gen_of_entry[order]
+        self.period_gen_ptr = np.zeros(len(self.periods) + 1, dtype=np.int64)
+        self.period_gen_ptr[1:] = np.cumsum(
+            np.bincount(self.gen_period_idx, minlength=len(self.periods))
+        )
+
+        # period -> timepoints
+        self.period_tp_ptr, self.period_tp_idx = _csr(
+            [[tp_pos[t] for t in m.TPS_IN_PERIOD[p]] for p in self.periods]
+        )
+
+        # gen -> active timepoints (timepoints of all active periods)
+        self.gen_tp_ptr, self.gen_tp_idx = _csr(
+            [
+                [
+                    t
+                    for p in self._slice(self.gen_period_ptr, self.gen_period_idx, i)
+                    for t in self._slice(self.period_tp_ptr, self.period_tp_idx, p)
+                ]
+                for i in range(len(self.gens))
+            ]
+        )
+
+        # gen -> fuels (empty for non-fuel-based gens)
+        self.gen_fuel_ptr, self.gen_fuel_idx = _csr(
+            [
+                [fuel_pos[f] for f in m.FUELS_FOR_GEN[g]]
+                if g in m.FUEL_BASED_GENS
+                else []
+                for g in self.gens
+            ]
+        )
+
+        # cache for groupings built by gens_by_key_period()
+        self._grouped = {}
+
+    @staticmethod
+    def _slice(ptr, idx, i):
+        return idx[ptr[i] : ptr[i + 1]].tolist()
+
+    def _lookup(self, labels, ptr, idx, i):
+        return [labels[j] for j in idx[ptr[i] : ptr[i + 1]].tolist()]
+
+    def periods_for_gen(self, g):
+        return self._lookup(
+            self.periods, self.gen_period_ptr, self.gen_period_idx, self.gen_pos[g]
+        )
+
+    def gens_in_period(self, p):
+        return self._lookup(
+            self.gens, self.period_gen_ptr, self.period_gen_idx, self.period_pos[p]
+        )
+
+    def tps_for_gen(self, g):
+        return self._lookup(
+            self.timepoints, self.gen_tp_ptr, self.gen_tp_idx, self.gen_pos[g]
+        )
+
+    def tps_for_gen_in_period(self, g, p):
+        i = self.period_pos[p]
+        if i in self._slice(self.gen_period_ptr, self.gen_period_idx, self.gen_pos[g]):
+            return self._lookup(
+                self.timepoints, self.period_tp_ptr, self.period_tp_idx, i
+            )
+        else:
+            return []
+
+    def fuels_for_gen(self, g):
+        return self._lookup(
+            self.fuels, self.gen_fuel_ptr, self.gen_fuel_idx, self.gen_pos[g]
+        )
+
+    def gen_tps(self, gens):
+        """Return a list of (g, t) for all active timepoints of the gens."""
+        tps = self.timepoints
+        ptr, idx = self.gen_tp_ptr, self.gen_tp_idx
+        result = []
+        for g in gens:
+            i = self.gen_pos[g]
+            result.extend((g, tps[j]) for j in idx[ptr[i] : ptr[i + 1]].tolist())
+        return result
+
+    def gen_tp_fuels(self, gens):
+        """Return a list of (g, t, f) for all active timepoints and fuels of the gens."""
+        result = []
+        for g in gens:
+            fuels = self.fuels_for_gen(g)
+            result.extend((g, t, f) for t in self.tps_for_gen(g) for f in fuels)
+        return result
+
+    def gens_by_key_period(self, name, get_keys):
+        """
+        Return a dict showing which gens are active in each (key, period)
+        combination, where get_keys(g) gives the keys (e.g., fuel markets)
+        that gen g is associated with. The dict is built the first time it
+        is requested with this name and cached for later calls.
+        """
+        try:
+            return self._grouped[name]
+        except KeyError:
+            pass
+        grouped = self._grouped[name] = dict()
+        for g in self.gens:
+            keys = get_keys(g)
+            if keys:
+                periods = self.periods_for_gen(g)
+                for k in keys:
+                    for p in periods:
+                        grouped.setdefault((k, p), []).append(g)
+        return grouped
+
+
 def load_inputs(mod, switch_data, inputs_dir):
     """
 
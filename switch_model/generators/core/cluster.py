@@ -0,0 +1,275 @@
+# Copyright (c) 2015-2022 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2.0, which is in the LICENSE file.
+
+"""
+Combine identical generation projects into clusters when inputs are loaded,
+to reduce the size and symmetry of the model, and report results for the
+original projects.
+
+Fleets of identical units (e.g., peaking plants or diesel generators) are
+often entered as separate projects, which multiplies the number of variables
+and constraints, and with discrete commitment (generators.core.commit.discrete)
+or discrete builds (generators.core.gen_discrete_build), creates many
+interchangeable integer variables that slow down the MIP solver. When this
+module is included, all projects whose input data are identical (technology,
+load zone, energy source, heat rate curve, costs, unit size, capacity
+factors, build years, etc.) are replaced by a single cluster project before
+the model is constructed. The cluster's capacity limit and predetermined
+capacity (build_gen_predetermined and build_gen_energy_predetermined) are the
+totals for its members, so with discrete commitment or builds, the cluster
+has one integer variable for the number of units committed or built instead
+of one for each project. Each cluster is named "cluster_" followed by the
+name of its first member.
+
+Projects are not clustered if they have a nonzero gen_min_build_capacity
+(which applies to each project separately) or if they are referred to
+anywhere in the input data other than as the first element of an index or a
+set member (e.g., as a value in another table).
+
+After solving, the generic output files (e.g., DispatchGen.csv, CommitGen.csv
+and BuildGen.csv) for continuous variables indexed by project are rewritten
+with one row for each member of each cluster, allocating the cluster's value
+in proportion to the members' predetermined capacity (or capacity limit if
+none is predetermined, or equally if neither is specified). Results for
+integer variables and other output files are reported for the cluster as a
+whole. The members of each cluster and their shares are saved in
+gen_clusters.csv.
+
+This module should be listed after all other modules that read generator
+data and after switch_model.reporting.
+
+GEN_CLUSTER_MEMBERS is a set of (cluster, project) tuples showing the
+original projects in each cluster, and gen_cluster_share[cluster, project]
+is the share of the cluster allocated to each member when reporting results.
+"""
+
+import os
+from pyomo.environ import *
+from switch_model.reporting import (
+    generic_index_columns,
+    generic_result_table,
+    write_generic_result,
+    write_table,
+)
+
+dependencies = (
+    "switch_model.timescales",
+    "switch_model.balancing.load_zones",
+    "switch_model.financials",
+    "switch_model.energy_sources.properties",
+    "switch_model.generators.core.build",
+    "switch_model.generators.core.dispatch",
+    "switch_model.reporting",
+)
+
+# post_solve() rewrites files saved by switch_model.reporting, so it must run
+# after that module finishes, even with --post-solve-workers
+parallel_post_solve = False
+
+# parameters that are added together for the members of a cluster; all others
+# must be identical
+additive_params = [
+    "gen_capacity_limit_mw",
+    "build_gen_predetermined",
+    "build_gen_energy_predetermined",
+]
+# parameters that can differ between members (the first member's value is
+# used for the cluster)
+ignored_params = ["gen_dbid"]
+
+
+def define_components(mod):
+    mod.GEN_CLUSTER_MEMBERS = Set(dimen=2)
+    mod.gen_cluster_share = Param(mod.GEN_CLUSTER_MEMBERS, within=PercentFraction)
+
+
+def post_load_inputs(mod, switch_data):
+    """
+    Replace identical projects with clusters in the data loaded by all
+    modules.
+    """
+    data = switch_data.data()
+    clusters = find_gen_clusters(data)
+    members = [(c, g) for c, gens in clusters.items() for g in gens]
+    shares = cluster_shares(data, clusters)
+    if clusters:
+        apply_gen_clusters(data, clusters)
+        mod.logger.info(
+            f"Combined {len(members)} identical generation projects into "
+            f"{len(clusters)} clusters."
+        )
+    data["GEN_CLUSTER_MEMBERS"] = {None: members}
+    data["gen_cluster_share"] = shares
+
+
+def index_tuple(key):
+    return key if isinstance(key, tuple) else (key,)
+
+
+def gens_referenced(value, gens):
+    """Return the set of projects mentioned anywhere in value."""
+    if isinstance(value, (list, tuple, set)):
+        return set().union(*(gens_referenced(v, gens) for v in value))
+    try:
+        return {value} if value in gens else set()
+    except TypeError:  # unhashable
+        return set()
+
+
+def find_gen_clusters(data):
+    """
+    Return a dict of cluster names and lists of member projects, for all
+    groups of two or more projects with identical data (except
+    additive_params and ignored_params).
+    """
+    gens = data["GENERATION_PROJECTS"][None]
+    gen_set = set(gens)
+    signature = {g: [] for g in gens}
+    excluded = set()
+    for name, component_data in data.items():
+        if name == "GENERATION_PROJECTS" or name in ignored_params:
+            continue
+        for key, value in component_data.items():
+            if key is None and isinstance(value, list):
+                # members of a non-indexed set
+                for member in value:
+                    member = index_tuple(member)
+                    excluded |= gens_referenced(member[1:], gen_set)
+                    if member[0] in gen_set:
+                        signature[member[0]].append(repr((name, member[1:])))
+                continue
+            key = index_tuple(key)
+            excluded |= gens_referenced(key[1:], gen_set)
+            if key[0] in gen_set:
+                if name in additive_params:
+                    value = None
+                signature[key[0]].append(repr((name, key[1:], value)))
+            else:
+                excluded |= gens_referenced(value, gen_set)
+    min_build = data.get("gen_min_build_capacity", {})
+    excluded |= {g for g in gens if min_build.get(g, 0)}
+
+    groups = {}
+    for g in gens:
+        if g not in excluded:
+            groups.setdefault(tuple(sorted(signature[g])), []).append(g)
+    clusters = {
+        "cluster_" + group[0]: group for group in groups.values() if len(group) > 1
+    }
+    conflicts = gen_set.intersection(clusters)
+    if conflicts:
+        raise ValueError(
+            f"Unable to create generator clusters, because projects named "
+            f"{', '.join(sorted(conflicts))} already exist."
+        )
+    return clusters
+
+
+def cluster_shares(data, clusters):
+    """
+    Return a dict of the share of each cluster to allocate to each member,
+    indexed by (cluster, project), based on predetermined capacity, capacity
+    limit or equal shares.
+    """
+    predetermined = {}
+    for (g, *other), value in data.get("build_gen_predetermined", {}).items():
+        predetermined[g] = predetermined.get(g, 0) + value
+    limit = data.get("gen_capacity_limit_mw", {})
+    shares = {}
+    for c, gens in clusters.items():
+        for size in [predetermined, limit, {}]:
+            weights = [size.get(g, 0) for g in gens]
+            if sum(weights) > 0:
+                break
+        else:
+            weights = [1] * len(gens)
+        total = sum(weights)
+        shares.update(((c, g), w / total) for g, w in zip(gens, weights))
+    return shares
+
+
+def apply_gen_clusters(data, clusters):
+    """
+    Replace each clustered project with its cluster in data (the dict from a
+    DataPortal), adding together the members' values for additive_params.
+    """
+    new_name = {g: c for c, gens in clusters.items() for g in gens}
+
+    def rename(index):
+        t = index_tuple(index)
+        if t[0] not in new_name:
+            return index
+        elif isinstance(index, tuple):
+            return (new_name[t[0]],) + t[1:]
+        else:
+            return new_name[t[0]]
+
+    for name, component_data in list(data.items()):
+        if name in {"GEN_CLUSTER_MEMBERS", "gen_cluster_share"}:
+            continue
+        new_data = {}
+        for key, value in component_data.items():
+            if key is None and isinstance(value, list):
+                # set members; keep the first occurrence of each cluster
+                members = {}
+                for member in value:
+                    members.setdefault(rename(member), None)
+                new_data[key] = list(members)
+                continue
+            new_key = rename(key)
+            if new_key != key and new_key in new_data:
+                if name in additive_params:
+                    new_data[new_key] += value
+                # otherwise keep the value from the first member
+            else:
+                new_data[new_key] = value
+        data[name] = new_data
+
+
+def post_solve(m, outdir):
+    """
+    Rewrite generic results for continuous variables indexed by project to
+    show each member of each cluster, and save gen_clusters.csv.
+    """
+    if len(m.GEN_CLUSTER_MEMBERS) == 0:
+        return
+    members = {}
+    for c, g in m.GEN_CLUSTER_MEMBERS:
+        members.setdefault(c, []).append((g, m.gen_cluster_share[c, g]))
+
+    if not m.options.skip_generic_output:
+        for var in m.component_objects(Var):
+            if not var.is_indexed() or any(
+                v.is_integer() or v.is_binary() for v in var.values()
+            ):
+                continue
+            headings, rows = generic_result_table(var, m.options.sorted_output)
+            if not any(row[0] in members for row in rows):
+                continue
+            new_rows = []
+            for row in rows:
+                if row[0] in members:
+                    new_rows.extend(
+                        (g,) + row[1:-1] + (None if row[-1] is None else row[-1] * s,)
+                        for g, s in members[row[0]]
+                    )
+                else:
+                    new_rows.append(row)
+            if m.options.sorted_output:
+                new_rows.sort()
+            write_generic_result(
+                m,
+                outdir,
+                var.name,
+                headings,
+                new_rows,
+                index_columns=generic_index_columns(var, headings),
+            )
+
+    write_table(
+        m,
+        m.GEN_CLUSTER_MEMBERS,
+        output_file=os.path.join(outdir, "gen_clusters.csv"),
+        headings=("GEN_CLUSTER", "GENERATION_PROJECT", "gen_cluster_share"),
+        values=lambda m, c, g: (c, g, m.gen_cluster_share[c, g]),
+    )
@@ -13,6 +13,7 @@ from __future__ import division
 
 import os, itertools
 from pyomo.environ import *
+from switch_model.utilities import ReportExpression
 
 dependencies = (
     "switch_model.timescales",
@@ -24,6 +25,26 @@ dependencies = (
 )
 
 
+def define_arguments(argparser):
+    group = argparser.add_argument_group(__name__)
+    group.add_argument(
+        "--min-up-down-formulation",
+        default="window",
+        choices=["window", "running-total"],
+        help=(
+            "Formulation for the minimum uptime and downtime constraints. "
+            "'window' (default) sums the startups or shutdowns over the "
+            "lookback window in each constraint, so each constraint has one "
+            "term per timepoint in the window. 'running-total' adds variables "
+            "for the running total of startups and shutdowns through each "
+            "timeseries and takes the difference between two of these in each "
+            "constraint, which gives a much sparser model when windows span "
+            "many timepoints (e.g., 24-hour minimum downtime with 15-minute "
+            "timepoints)."
+        ),
+    )
+
+
 def define_components(mod):
     """
 
@@ -142,6 +163,18 @@ def define_components(mod):
     Enforce_Min_Uptime and Enforce_Min_Downtime constraints, and are
     probably not useful elsewhere.
 
+    StartupGenCapacityRunningTotal[(g, t) in UPTIME_CONSTRAINED_GEN_TPS] and
+    ShutdownGenCapacityRunningTotal[(g, t) in DOWNTIME_CONSTRAINED_GEN_TPS]
+    are only defined if --min-up-down-formulation running-total is
+    specified. They are the total capacity started up or shut down from the
+    start of the timeseries through timepoint t, defined by the constraints
+    Define_StartupGenCapacityRunningTotal and
+    Define_ShutdownGenCapacityRunningTotal. The minimum uptime and downtime
+    constraints then use the difference between two running totals (plus the
+    total for the whole timeseries if the window wraps around the start of
+    the circular timeseries) instead of one term for each timepoint in the
+    window. Both formulations give the same feasible region.
+
     Enforce_Min_Uptime[(g, t) in UPTIME_CONSTRAINED_GEN_TPS] and
     Enforce_Min_Downtime[(g, t) in DOWNTIME_CONSTRAINED_GEN_TPS]
     are constraints that ensure that unit commitment respects the minimum
@@ -253,10 +286,11 @@ def define_components(mod):
         mod.GEN_TPS,
         rule=lambda m, g, t: (m.CommitGen[g, t] <= m.CommitUpperLimit[g, t]),
     )
-    mod.CommitSlackUp = Expression(
+    # these are only constructed if used by another module
+    mod.CommitSlackUp = ReportExpression(
         mod.GEN_TPS, rule=lambda m, g, t: (m.CommitUpperLimit[g, t] - m.CommitGen[g, t])
     )
-    mod.CommitSlackDown = Expression(
+    mod.CommitSlackDown = ReportExpression(
         mod.GEN_TPS, rule=lambda m, g, t: (m.CommitGen[g, t] - m.CommitLowerLimit[g, t])
     )
     # StartupGenCapacity & ShutdownGenCapacity (at start of each timepoint)
@@ -296,18 +330,6 @@ def define_components(mod):
         mod.GENERATION_PROJECTS, within=NonNegativeReals, default=0.0
     )
 
-    def hrs_to_num_tps(m, hrs, t):
-        return int(round(hrs / m.ts_duration_of_tp[m.tp_ts[t]]))
-
-    def time_window(m, t, hrs, add_one=False):
-        """Return a the set of timepoints, starting at t and going
-        back the specified number of hours"""
-        n = hrs_to_num_tps(m, hrs, t)
-        if add_one:
-            n += 1
-        window = [m.TPS_IN_TS[m.tp_ts[t]].prevw(t, i) for i in range(n)]
-        return window
-
     mod.UPTIME_CONSTRAINED_GEN_TPS = Set(
         dimen=2,
         initialize=lambda m: [
@@ -328,16 +350,65 @@ def define_components(mod):
             if hrs_to_num_tps(m, m.gen_min_downtime[g], t) > 0
         ],
     )
-    mod.Enforce_Min_Uptime = Constraint(
-        mod.UPTIME_CONSTRAINED_GEN_TPS,
-        doc="All capacity turned on in the last x hours must still be on now",
-        rule=lambda m, g, t: (
-            m.CommitGen[g, t]
-            >= sum(
+
+    def running_total_rule(var_name, total_name):
+        def rule(m, g, t):
+            tps, i = tp_position(m, t)
+            var = getattr(m, var_name)
+            total = getattr(m, total_name)
+            if i == 0:
+                return total[g, t] == var[g, t]
+            else:
+                return total[g, t] == total[g, tps[i - 1]] + var[g, t]
+
+        return rule
+
+    if mod.options.min_up_down_formulation == "running-total":
+        mod.StartupGenCapacityRunningTotal = Var(
+            mod.UPTIME_CONSTRAINED_GEN_TPS, within=NonNegativeReals
+        )
+        mod.Define_StartupGenCapacityRunningTotal = Constraint(
+            mod.UPTIME_CONSTRAINED_GEN_TPS,
+            rule=running_total_rule(
+                "StartupGenCapacity", "StartupGenCapacityRunningTotal"
+            ),
+        )
+        mod.ShutdownGenCapacityRunningTotal = Var(
+            mod.DOWNTIME_CONSTRAINED_GEN_TPS, within=NonNegativeReals
+        )
+        mod.Define_ShutdownGenCapacityRunningTotal = Constraint(
+            mod.DOWNTIME_CONSTRAINED_GEN_TPS,
+            rule=running_total_rule(
+                "ShutdownGenCapacity", "ShutdownGenCapacityRunningTotal"
+            ),
+        )
+
+    def recent_startups(m, g, t):
+        if m.options.min_up_down_formulation == "running-total":
+            return window_sum(
+                m, m.StartupGenCapacityRunningTotal, g, t, m.gen_min_uptime[g]
+            )
+        else:
+            return sum(
                 m.StartupGenCapacity[g, t_prior]
                 for t_prior in time_window(m, t, m.gen_min_uptime[g])
             )
-        ),
+
+    def recent_shutdowns(m, g, t):
+        if m.options.min_up_down_formulation == "running-total":
+            return window_sum(
+                m, m.ShutdownGenCapacityRunningTotal, g, t, m.gen_min_downtime[g]
+            )
+        else:
+            return sum(
+                m.ShutdownGenCapacity[g, t_prior]
+                for t_prior in time_window(m, t, m.gen_min_downtime[g])
+            )
+
+    mod.Enforce_Min_Uptime = Constraint(
+        mod.UPTIME_CONSTRAINED_GEN_TPS,
+        doc="All capacity turned on in the last x hours must still be on now",
+        rule=lambda m, g, t: (m.CommitGen[g, t] >= recent_startups(m, g, t)),
     )
     # Matthias notes on Enforce_Min_Downtime: The max(...) term finds the
     # largest fraction of capacity that could have been committed in the last
@@ -374,10 +445,7 @@ def define_components(mod):
                     )
                 )
             )
-            - sum(
-                m.ShutdownGenCapacity[g, t_prior]
-                for t_prior in time_window(m, t, m.gen_min_downtime[g])
-            )
+            - recent_shutdowns(m, g, t)
         ),
     )
 
@@ -423,6 +491,54 @@ def define_components(mod):
     )
 
 
+def hrs_to_num_tps(m, hrs, t):
+    return int(round(hrs / m.ts_duration_of_tp[m.tp_ts[t]]))
+
+
+def tp_position(m, t):
+    """Return the list of timepoints in t's timeseries and t's position
+    in it; these are found once for all timeseries."""
+    try:
+        positions = m._tp_position_in_ts
+    except AttributeError:
+        positions = m._tp_position_in_ts = dict()
+        for ts in m.TIMESERIES:
+            tps = list(m.TPS_IN_TS[ts])
+            for i, _t in enumerate(tps):
+                positions[_t] = (tps, i)
+    return positions[t]
+
+
+def time_window(m, t, hrs, add_one=False):
+    """Return a the set of timepoints, starting at t and going
+    back the specified number of hours"""
+    n = hrs_to_num_tps(m, hrs, t)
+    if add_one:
+        n += 1
+    tps, i = tp_position(m, t)
+    window = [tps[(i - j) % len(tps)] for j in range(n)]
+    return window
+
+
+def window_sum(m, running_total, g, t, hrs):
+    """Return an expression for the sum of a variable over the time
+    window ending at t, using its running total through each timepoint
+    of the (circular) timeseries, running_total[g, t]."""
+    n = hrs_to_num_tps(m, hrs, t)
+    tps, i = tp_position(m, t)
+    # whole laps around the timeseries, then the remaining timepoints
+    laps, n = divmod(n, len(tps))
+    expr = laps * running_total[g, tps[-1]] if laps else 0
+    if n > 0:
+        expr += running_total[g, t]
+        if i >= n:
+            expr -= running_total[g, tps[i - n]]
+        else:
+            # window wraps around the start of the timeseries
+            expr += running_total[g, tps[-1]] - running_total[g, tps[i - n + len(tps)]]
+    return expr
+
+
 def load_inputs(mod, switch_data, inputs_dir):
     """
 
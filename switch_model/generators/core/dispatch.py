@@ -13,11 +13,13 @@ from __future__ import division
 import logging
 import os, collections
 
+import numpy as np
 import pandas as pd
 from pyomo.environ import *
 
-from switch_model.reporting import write_table
-from switch_model.utilities import unwrap
+from switch_model.generators.core.build import gen_index_maps
+from switch_model.reporting import write_table, record_data_frame
+from switch_model.utilities import unwrap, ReportExpression
 
 dependencies = (
     "switch_model.timescales",
@@ -154,20 +156,12 @@ def define_components(mod):
 
     """
 
-    def period_active_gen_rule(m, period):
-        if not hasattr(m, "period_active_gen_dict"):
-            m.period_active_gen_dict = dict()
-            for (_g, _period) in m.GEN_PERIODS:
-                m.period_active_gen_dict.setdefault(_period, []).append(_g)
-        result = m.period_active_gen_dict.pop(period)
-        if len(m.period_active_gen_dict) == 0:
-            delattr(m, "period_active_gen_dict")
-        return result
-
+    # These sets are sliced from shared index maps (see gen_index_maps()),
+    # which is much faster than filtering or crossing Pyomo's indexed sets.
     mod.GENS_IN_PERIOD = Set(
         mod.PERIODS,
         dimen=1,
-        initialize=period_active_gen_rule,
+        initialize=lambda m, p: gen_index_maps(m).gens_in_period(p),
         doc="The set of projects active in a given period.",
     )
 
@@ -175,55 +169,32 @@ def define_components(mod):
         mod.GENERATION_PROJECTS,
         dimen=1,
         within=mod.TIMEPOINTS,
-        initialize=lambda m, g: (
-            tp for p in m.PERIODS_FOR_GEN[g] for tp in m.TPS_IN_PERIOD[p]
-        ),
+        initialize=lambda m, g: gen_index_maps(m).tps_for_gen(g),
     )
 
-    def init(m, gen, period):
-        try:
-            d = m._TPS_FOR_GEN_IN_PERIOD_dict
-        except AttributeError:
-            d = m._TPS_FOR_GEN_IN_PERIOD_dict = dict()
-            for _gen in m.GENERATION_PROJECTS:
-                for t in m.TPS_FOR_GEN[_gen]:
-                    d.setdefault((_gen, m.tp_period[t]), []).append(t)
-        result = d.pop((gen, period), [])
-        if not d:  # all gone, delete the attribute
-            del m._TPS_FOR_GEN_IN_PERIOD_dict
-        return result
-
     mod.TPS_FOR_GEN_IN_PERIOD = Set(
         mod.GENERATION_PROJECTS,
         mod.PERIODS,
         dimen=1,
         within=mod.TIMEPOINTS,
-        initialize=init,
+        initialize=lambda m, g, p: gen_index_maps(m).tps_for_gen_in_period(g, p),
     )
 
     mod.GEN_TPS = Set(
         dimen=2,
-        initialize=lambda m: (
-            (g, tp) for g in m.GENERATION_PROJECTS for tp in m.TPS_FOR_GEN[g]
-        ),
+        initialize=lambda m: gen_index_maps(m).gen_tps(m.GENERATION_PROJECTS),
     )
     mod.VARIABLE_GEN_TPS = Set(
         dimen=2,
-        initialize=lambda m: (
-            (g, tp) for g in m.VARIABLE_GENS for tp in m.TPS_FOR_GEN[g]
-        ),
+        initialize=lambda m: gen_index_maps(m).gen_tps(m.VARIABLE_GENS),
     )
     mod.FUEL_BASED_GEN_TPS = Set(
         dimen=2,
-        initialize=lambda m: (
-            (g, tp) for g in m.FUEL_BASED_GENS for tp in m.TPS_FOR_GEN[g]
-        ),
+        initialize=lambda m: gen_index_maps(m).gen_tps(m.FUEL_BASED_GENS),
     )
     mod.GEN_TP_FUELS = Set(
         dimen=3,
-        initialize=lambda m: (
-            (g, t, f) for (g, t) in m.FUEL_BASED_GEN_TPS for f in m.FUELS_FOR_GEN[g]
-        ),
+        initialize=lambda m: gen_index_maps(m).gen_tp_fuels(m.FUEL_BASED_GENS),
     )
 
     mod.GenCapacityInTP = Expression(
@@ -349,25 +320,23 @@ def define_components(mod):
         ),
     )
 
-    def DispatchEmissions_rule(m, g, t, f):
-        if g not in m.CCS_EQUIPPED_GENS:
-            return m.GenFuelUseRate[g, t, f] * (
-                m.f_co2_intensity[f] + m.f_upstream_co2_intensity[f]
-            )
-        else:
-            ccs_emission_frac = 1 - m.gen_ccs_capture_efficiency[g]
-            return m.GenFuelUseRate[g, t, f] * (
-                m.f_co2_intensity[f] * ccs_emission_frac + m.f_upstream_co2_intensity[f]
-            )
-
-    mod.DispatchEmissions = Expression(mod.GEN_TP_FUELS, rule=DispatchEmissions_rule)
-    mod.AnnualEmissions = Expression(
+    # These expressions are usually only needed for reporting, so they are
+    # only constructed if another module uses them (e.g., carbon_policies).
+    mod.DispatchEmissions = ReportExpression(
+        mod.GEN_TP_FUELS,
+        rule=lambda m, g, t, f: (
+            m.GenFuelUseRate[g, t, f] * gen_fuel_emission_rate(m, g, f)
+        ),
+        values=DispatchEmissions_values,
+    )
+    mod.AnnualEmissions = ReportExpression(
         mod.PERIODS,
         rule=lambda m, period: sum(
             m.DispatchEmissions[g, t, f] * m.tp_weight_in_year[t]
             for (g, t, f) in m.GEN_TP_FUELS
             if m.tp_period[t] == period
         ),
+        values=AnnualEmissions_values,
         doc="The system's annual emissions, in metric tonnes of CO2 per year.",
     )
 
@@ -382,6 +351,41 @@ def define_components(mod):
     mod.Cost_Components_Per_TP.append("GenVariableOMCostsInTP")
 
 
+def gen_fuel_emission_rate(m, g, f):
+    """
+    Return the emissions (tCO2/MMBtu) from burning fuel f in generator g,
+    after any carbon capture.
+    """
+    if g not in m.CCS_EQUIPPED_GENS:
+        return m.f_co2_intensity[f] + m.f_upstream_co2_intensity[f]
+    else:
+        ccs_emission_frac = 1 - m.gen_ccs_capture_efficiency[g]
+        return m.f_co2_intensity[f] * ccs_emission_frac + m.f_upstream_co2_intensity[f]
+
+
+def DispatchEmissions_values(m):
+    """Calculate values of DispatchEmissions from the current fuel use."""
+    keys = list(m.GEN_TP_FUELS)
+    fuel_use = [m.GenFuelUseRate[k].value for k in keys]
+    if None in fuel_use:
+        raise ValueError(
+            "No value for uninitialized NumericValue object "
+            f"{m.GenFuelUseRate[keys[fuel_use.index(None)]].name}"
+        )
+    fuel_use = np.array(fuel_use, dtype=float)
+    rate = np.array([value(gen_fuel_emission_rate(m, g, f)) for g, t, f in keys])
+    # adding 0.0 turns -0.0 fuel use from the solver into 0.0 emissions
+    return dict(zip(keys, (fuel_use * rate + 0.0).tolist()))
+
+
+def AnnualEmissions_values(m):
+    """Calculate values of AnnualEmissions from the current fuel use."""
+    emissions = {p: 0.0 for p in m.PERIODS}
+    for (g, t, f), e in m.DispatchEmissions.evaluate().items():
+        emissions[m.tp_period[t]] += e * m.tp_weight_in_year[t]
+    return emissions
+
+
 def load_inputs(mod, switch_data, inputs_dir):
     """
 
@@ -436,6 +440,7 @@ def post_solve(instance, outdir):
         + tuple(m.DispatchGen[p, t] if (p, t) in m.GEN_TPS else 0.0 for p in gen_proj),
     )
 
+    emissions = instance.DispatchEmissions.evaluate()
     dispatch_normalized_dat = []
     for g, t in instance.GEN_TPS:
         p = instance.tp_period[t]
@@ -457,11 +462,9 @@ def post_solve(instance, outdir):
                 * instance.gen_variable_om[g]
                 * instance.tp_weight_in_year[t]
             ),
-            "DispatchEmissions_tCO2_per_typical_yr": value(
-                sum(
-                    instance.DispatchEmissions[g, t, f] * instance.tp_weight_in_year[t]
-                    for f in instance.FUELS_FOR_GEN[g]
-                )
+            "DispatchEmissions_tCO2_per_typical_yr": sum(
+                emissions[g, t, f] * instance.tp_weight_in_year[t]
+                for f in instance.FUELS_FOR_GEN[g]
             )
             if instance.gen_uses_fuel[g]
             else 0,
@@ -491,6 +494,7 @@ def post_solve(instance, outdir):
     if instance.options.sorted_output:
         dispatch_full_df.sort_index(inplace=True)
     dispatch_full_df.to_csv(os.path.join(outdir, "dispatch.csv"))
+    record_data_frame(instance, "dispatch", dispatch_full_df)
 
     summary_columns = [
         "Energy_GWh_typical_yr",
@@ -564,6 +568,9 @@ def post_solve(instance, outdir):
     gen_sum.to_csv(
         os.path.join(outdir, "gen_project_annual_summary.csv"), columns=summary_columns
     )
+    record_data_frame(
+        instance, "gen_project_annual_summary", gen_sum, columns=summary_columns
+    )
 
     zone_sum = gen_sum.groupby(
         ["gen_tech", "gen_load_zone", "gen_energy_source", "period"]
@@ -573,12 +580,18 @@ def post_solve(instance, outdir):
         os.path.join(outdir, "dispatch_zonal_annual_summary.csv"),
         columns=summary_columns,
     )
+    record_data_frame(
+        instance, "dispatch_zonal_annual_summary", zone_sum, columns=summary_columns
+    )
 
     annual_summary = zone_sum.groupby(["gen_tech", "gen_energy_source", "period"]).sum()
     annual_summary = add_cap_factor_and_lcoe(annual_summary)
     annual_summary.to_csv(
         os.path.join(outdir, "dispatch_annual_summary.csv"), columns=summary_columns
     )
+    record_data_frame(
+        instance, "dispatch_annual_summary", annual_summary, columns=summary_columns
+    )
 
     import warnings
 
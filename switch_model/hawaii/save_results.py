@@ -22,6 +22,7 @@ from __future__ import division
 
 import os
 from collections import defaultdict
+import pandas as pd
 from pyomo.environ import *
 import switch_model.hawaii.util as util
 import switch_model.financials as financials
@@ -180,6 +181,73 @@ def DispatchGenByFuel(m, g, tp, fuel):
     return result
 
 
+def gen_tp_results(m):
+    """Return a pandas DataFrame with one row for each (project, timepoint) in
+    GEN_TPS, showing the project's load zone, technology and energy source, the
+    timepoint's period and weight, and the values of DispatchGen and
+    DispatchUpperLimit. Values are read from the model once, so the reports
+    below can summarize them by grouping this table instead of scanning all
+    projects for every cell."""
+    gen_tps = list(m.GEN_TPS)
+    gens = [g for g, t in gen_tps]
+    tps = [t for g, t in gen_tps]
+    return pd.DataFrame(
+        {
+            "gen": gens,
+            "timepoint": tps,
+            "load_zone": [m.gen_load_zone[g] for g in gens],
+            "period": [m.tp_period[t] for t in tps],
+            "tech": [m.gen_tech[g] for g in gens],
+            "energy_source": [m.gen_energy_source[g] for g in gens],
+            "uses_fuel": [bool(m.gen_uses_fuel[g]) for g in gens],
+            "tp_weight_in_year": [m.tp_weight_in_year[t] for t in tps],
+            "dispatch": [value(m.DispatchGen[g, t]) for g, t in gen_tps],
+            "upper_limit": [value(m.DispatchUpperLimit[g, t]) for g, t in gen_tps],
+        },
+        columns=[
+            "gen",
+            "timepoint",
+            "load_zone",
+            "period",
+            "tech",
+            "energy_source",
+            "uses_fuel",
+            "tp_weight_in_year",
+            "dispatch",
+            "upper_limit",
+        ],
+    )
+
+
+def gen_tp_fuel_results(m, gen_tps):
+    """Return a pandas DataFrame with one row for each (project, timepoint,
+    fuel) in GEN_TP_FUELS, with the columns of gen_tps (from gen_tp_results())
+    plus the fuel and the share of dispatch attributed to it, calculated the
+    same way as DispatchGenByFuel()."""
+    fuel_use = pd.DataFrame(
+        [(g, t, f, value(v)) for (g, t, f), v in m.GenFuelUseRate.items()],
+        columns=["gen", "timepoint", "fuel", "fuel_use"],
+    )
+    df = fuel_use.merge(gen_tps, on=["gen", "timepoint"], sort=False)
+    by_gen_tp = df.groupby(["gen", "timepoint"], sort=False)["fuel_use"]
+    total_fuel = by_gen_tp.transform("sum")
+    n_fuels = by_gen_tp.transform("size")
+    # allocate power production proportional to amount of each fuel used, or
+    # evenly between fuels if no fuel was used (see DispatchGenByFuel())
+    df["dispatch_by_fuel"] = (
+        (df["fuel_use"] * df["dispatch"] / total_fuel)
+        .where(total_fuel != 0.0, df["dispatch"] / n_fuels)
+        .where(df["dispatch"] != 0.0, 0.0)
+    )
+    return df
+
+
+def grouped_sum(df, keys, column):
+    """Return a dict of the totals of column in df for each combination of
+    keys that occurs in df. Keys are tuples if more than one is given."""
+    return df.groupby(keys, sort=False)[column].sum().to_dict()
+
+
 def write_results(m, outputs_dir):
     tag = "_" + m.options.scenario_name if m.options.scenario_name else ""
 
@@ -227,6 +295,35 @@ def write_results(m, outputs_dir):
         for s in m.Zone_Power_Injections
         if s not in {"ZoneTotalCentralDispatch", "ZoneTotalDistributedDispatch"}
     )
+    # extract dispatch and fuel use once, then total them by load zone,
+    # timepoint and period for each fuel, energy source and technology
+    gen_tps = gen_tp_results(m)
+    gen_tp_fuels = gen_tp_fuel_results(m, gen_tps)
+    # production in GWh
+    gen_tps["production"] = gen_tps["dispatch"] * gen_tps["tp_weight_in_year"] * 0.001
+    gen_tp_fuels["production"] = (
+        gen_tp_fuels["dispatch_by_fuel"] * gen_tp_fuels["tp_weight_in_year"] * 0.001
+    )
+    non_fuel_gen_tps = gen_tps[~gen_tps["uses_fuel"]].assign(
+        curtailment=lambda df: df["upper_limit"] - df["dispatch"]
+    )
+
+    zone_fuel_tp = ["load_zone", "fuel", "timepoint"]
+    zone_source_tp = ["load_zone", "energy_source", "timepoint"]
+    fuel_dispatch = grouped_sum(gen_tp_fuels, zone_fuel_tp, "dispatch_by_fuel")
+    source_dispatch = grouped_sum(non_fuel_gen_tps, zone_source_tp, "dispatch")
+    source_curtailment = grouped_sum(non_fuel_gen_tps, zone_source_tp, "curtailment")
+    tech_dispatch = grouped_sum(gen_tps, ["load_zone", "tech", "timepoint"], "dispatch")
+    fuel_production = grouped_sum(
+        gen_tp_fuels, ["load_zone", "fuel", "period"], "production"
+    )
+    source_production = grouped_sum(
+        non_fuel_gen_tps, ["load_zone", "energy_source", "period"], "production"
+    )
+    tech_production = grouped_sum(
+        gen_tps, ["load_zone", "tech", "period"], "production"
+    )
+
     avg_ts_scale = float(sum(m.ts_scale_to_year[ts] for ts in m.TIMESERIES)) / len(
         m.TIMESERIES
     )
@@ -245,39 +342,10 @@ def write_results(m, outputs_dir):
         + ("spinning_reserve_provision", "spinning_reserve_requirement")
         + ("marginal_cost", "peak_day"),
         values=lambda m, z, t: (z, m.tp_period[t], m.tp_timestamp[t])
-        + tuple(
-            sum(
-                DispatchGenByFuel(m, p, t, f)
-                for p in m.GENS_BY_FUEL[f]
-                if (p, t) in m.GEN_TPS and m.gen_load_zone[p] == z
-            )
-            for f in m.FUELS
-        )
-        + tuple(
-            sum(
-                util.get(m.DispatchGen, (p, t), 0.0)
-                for p in m.GENS_BY_NON_FUEL_ENERGY_SOURCE[s]
-                if m.gen_load_zone[p] == z
-            )
-            for s in m.NON_FUEL_ENERGY_SOURCES
-        )
-        + tuple(
-            sum(
-                util.get(m.DispatchGen, (g, t), 0.0)
-                for g in m.GENS_BY_TECHNOLOGY[tech]
-                if m.gen_load_zone[g] == z
-            )
-            for tech in non_fuel_techs
-        )
-        + tuple(
-            sum(
-                util.get(m.DispatchUpperLimit, (p, t), 0.0)
-                - util.get(m.DispatchGen, (p, t), 0.0)
-                for p in m.GENS_BY_NON_FUEL_ENERGY_SOURCE[s]
-                if m.gen_load_zone[p] == z
-            )
-            for s in m.NON_FUEL_ENERGY_SOURCES
-        )
+        + tuple(fuel_dispatch.get((z, f, t), 0) for f in m.FUELS)
+        + tuple(source_dispatch.get((z, s, t), 0) for s in m.NON_FUEL_ENERGY_SOURCES)
+        + tuple(tech_dispatch.get((z, tech, t), 0) for tech in non_fuel_techs)
+        + tuple(source_curtailment.get((z, s, t), 0) for s in m.NON_FUEL_ENERGY_SOURCES)
         + tuple(getattr(m, component)[z, t] for component in m.Zone_Power_Injections)
         + tuple(getattr(m, component)[z, t] for component in m.Zone_Power_Withdrawals)
         + (  # save spinning reserve requirements and provisions; note: this assumes one zone per balancing area
@@ -448,6 +516,31 @@ def write_results(m, outputs_dir):
 
     built_energy_source = tuple(sorted(set(gen_energy_source(g) for g in built_gens)))
 
+    # capacity of each project in each period, and capacity that was used
+    gen_periods = pd.DataFrame(
+        [
+            (
+                m.gen_load_zone[g],
+                m.gen_tech[g],
+                gen_energy_source(g),
+                pe,
+                value(m.GenCapacity[g, pe]),
+            )
+            for g in built_gens
+            for pe in m.PERIODS
+        ],
+        columns=["load_zone", "tech", "energy_source", "period", "capacity"],
+    )
+    gen_periods["used_capacity"] = gen_periods["capacity"].where(
+        [(g, pe) in operate_gen_in_period for g in built_gens for pe in m.PERIODS],
+        0.0,
+    )
+    zone_tech_period = ["load_zone", "tech", "period"]
+    zone_source_period = ["load_zone", "energy_source", "period"]
+    tech_cap_used = grouped_sum(gen_periods, zone_tech_period, "used_capacity")
+    source_cap = grouped_sum(gen_periods, zone_source_period, "capacity")
+    source_cap_used = grouped_sum(gen_periods, zone_source_period, "used_capacity")
+
     tech_cap = defaultdict(float)
     for (g, p), cap in m.GenCapacity.items():
         tech_cap[m.gen_load_zone[g], m.gen_tech[g], p] += cap
@@ -498,14 +591,7 @@ def write_results(m, outputs_dir):
             z,
             pe,
         )
-        + tuple(
-            sum(
-                (m.GenCapacity[g, pe] if ((g, pe) in operate_gen_in_period) else 0.0)
-                for g in built_gens
-                if m.gen_tech[g] == t and m.gen_load_zone[g] == z
-            )
-            for t in built_tech
-        )
+        + tuple(tech_cap_used.get((z, t, pe), 0) for t in built_tech)
         + (
             m.Pumped_Hydro_Capacity_MW[z, pe]
             if hasattr(m, "Pumped_Hydro_Capacity_MW")
@@ -528,14 +614,7 @@ def write_results(m, outputs_dir):
             z,
             pe,
         )
-        + tuple(
-            sum(
-                m.GenCapacity[g, pe]
-                for g in built_gens
-                if gen_energy_source(g) == s and m.gen_load_zone[g] == z
-            )
-            for s in built_energy_source
-        )
+        + tuple(source_cap.get((z, s, pe), 0) for s in built_energy_source)
         + (
             m.Pumped_Hydro_Capacity_MW[z, pe]
             if hasattr(m, "Pumped_Hydro_Capacity_MW")
@@ -557,14 +636,7 @@ def write_results(m, outputs_dir):
             z,
             pe,
         )
-        + tuple(
-            sum(
-                (m.GenCapacity[g, pe] if ((g, pe) in operate_gen_in_period) else 0.0)
-                for g in built_gens
-                if gen_energy_source(g) == s and m.gen_load_zone[g] == z
-            )
-            for s in built_energy_source
-        )
+        + tuple(source_cap_used.get((z, s, pe), 0) for s in built_energy_source)
         + (
             m.Pumped_Hydro_Capacity_MW[z, pe]
             if hasattr(m, "Pumped_Hydro_Capacity_MW")
@@ -585,15 +657,7 @@ def write_results(m, outputs_dir):
             z,
             pe,
         )
-        + tuple(
-            sum(
-                m.DispatchGen[g, tp] * m.tp_weight_in_year[tp] * 0.001  # MWh -> GWh
-                for g in built_gens
-                if m.gen_tech[g] == t and m.gen_load_zone[g] == z
-                for tp in m.TPS_FOR_GEN_IN_PERIOD[g, pe]
-            )
-            for t in built_tech
-        )
+        + tuple(tech_production.get((z, t, pe), 0) for t in built_tech)
         + tuple(  # ad hoc techs: hydrogen, pumped storage, etc.
             sum(
                 comp[z, tp] * m.tp_weight_in_year[tp] * 0.001
@@ -626,26 +690,8 @@ def write_results(m, outputs_dir):
             z,
             pe,
         )
-        + tuple(
-            sum(
-                DispatchGenByFuel(m, g, tp, f)
-                * m.tp_weight_in_year[tp]
-                * 0.001  # MWh -> GWh
-                for g in m.GENS_BY_FUEL[f]
-                if m.gen_load_zone[g] == z
-                for tp in m.TPS_FOR_GEN_IN_PERIOD[g, pe]
-            )
-            for f in m.FUELS
-        )
-        + tuple(
-            sum(
-                m.DispatchGen[g, tp] * m.tp_weight_in_year[tp] * 0.001  # MWh -> GWh
-                for g in m.GENS_BY_NON_FUEL_ENERGY_SOURCE[s]
-                if m.gen_load_zone[g] == z
-                for tp in m.TPS_FOR_GEN_IN_PERIOD[g, pe]
-            )
-            for s in m.NON_FUEL_ENERGY_SOURCES
-        )
+        + tuple(fuel_production.get((z, f, pe), 0) for f in m.FUELS)
+        + tuple(source_production.get((z, s, pe), 0) for s in m.NON_FUEL_ENERGY_SOURCES)
         + tuple(  # ad hoc techs: hydrogen, pumped storage, etc.
             sum(
                 comp[z, tp] * m.tp_weight_in_year[tp] * 0.001
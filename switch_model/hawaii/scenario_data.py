@@ -1,6 +1,7 @@
 from __future__ import print_function
 
-import time, sys, collections, os, itertools
+import time, sys, collections, os, itertools, shutil
+import concurrent.futures
 from textwrap import dedent
 from switch_model import __version__ as switch_version
 from switch_model.utilities import iteritems
@@ -62,6 +63,11 @@ pguser = os.getenv("PGUSER", "")
 # NOTE: write_table() will automatically convert null values to '.',
 # so pyomo will recognize them as missing data
 
+# NOTE: if args["db_connections"] is greater than 1, queries are run in
+# parallel, using up to that many simultaneous connections to the database
+# server. The results are written the same way as above, so the .csv files are
+# identical either way.
+
 
 def write_tables(*pos_args, **kw_args):
     if pos_args or "args" in kw_args:
@@ -113,17 +119,20 @@ def write_tables_implementation(args, alt_args={}, scenarios=[]):
     # from write_base_tables and then passing it to write_alternative_tables,
     # but it works pretty well as is.
 
+    # forget tables written in earlier calls (data may have changed since then)
+    written_queries.clear()
+
     # write version marker file
     with open(make_file_path("switch_inputs_version.txt", args), "w") as f:
         f.write(switch_version)
 
     # write base tables
-    write_base_tables(args)
+    base_queries = write_base_tables(args)
 
     # write alternative tables
     data_aliases = {}
     for a in alt_args:
-        data_aliases[a["tag"]] = write_alternative_tables(args, a)
+        data_aliases[a["tag"]] = write_alternative_tables(args, a, base_queries)
 
     # write scenarios.txt
     scenario_args = []
@@ -153,14 +162,18 @@ def write_tables_implementation(args, alt_args={}, scenarios=[]):
 
 def write_base_tables(args):
     queries = get_queries(args)
-    for table, query in queries:
-        write_table(make_file_path(table, args), query)
+    write_query_tables(
+        [(make_file_path(table, args), query) for table, query in queries], args
+    )
+    return queries
 
 
-def write_alternative_tables(base_args, alt_args):
+def write_alternative_tables(base_args, alt_args, base_queries=None):
     # add alt_args to base_args, then check for queries that are
     # added, modified or dropped
-    base_queries = dict(get_queries(base_args))
+    if base_queries is None:
+        base_queries = get_queries(base_args)
+    base_queries = dict(base_queries)
     full_alt_args = dict(itertools.chain(base_args.items(), alt_args.items()))
     alt_queries = dict(get_queries(full_alt_args))
     # get location for files created by alt_args, relative to files created by base_args
@@ -169,6 +182,7 @@ def write_alternative_tables(base_args, alt_args):
     )
     # find differences and run alt queries
     aliases = []
+    jobs = []
     for table, query in alt_queries.items():
         if table not in base_queries or query != base_queries[table]:
             # new or altered table
@@ -179,12 +193,13 @@ def write_alternative_tables(base_args, alt_args):
                 new_table = table_base + "." + full_alt_args["tag"] + table_ext
             else:
                 new_table = os.path.join(alt_relative_path, table)
-            write_table(make_file_path(new_table, base_args), query)
+            jobs.append((make_file_path(new_table, base_args), query))
             # note: if regular files are in inputs and alternative files are in
             # inputs_alt, then this will set file.csv=../inputs_alt/file.csv,
             # and then --input-alias will just do a simple translation of
             # file.csv, resulting in inputs/../inputs_alt/file.csv
             aliases.append((table, new_table))
+    write_query_tables(jobs, full_alt_args)
     # exclude tables that are omitted in the alternative case
     aliases.extend((t, "none") for t, q in base_queries.items() if t not in alt_queries)
     return aliases
@@ -1411,23 +1426,142 @@ def add_one_row_literal(queries, table, arg_names, args):
     )
 
 
+# tables already written during this call to write_tables(), by query text
+written_queries = {}
+
+
+def write_query_tables(jobs, args):
+    """
+    Run the queries in `jobs` (a list of (output_file, query) tuples) and save
+    the results in the matching files. Queries that have already been run
+    (e.g., for a different file with the same query) are copied from the
+    earlier file instead of being run again. If args["db_connections"] is
+    greater than 1, the queries are run in parallel using a pool of up to
+    that many connections.
+    """
+    new_jobs = []
+    duplicate_jobs = []
+    for output_file, query in jobs:
+        if query in written_queries:
+            print(
+                "Copying {} to {} (same query)".format(
+                    written_queries[query], output_file
+                )
+            )
+            shutil.copyfile(written_queries[query], output_file)
+        elif any(query == q for f, q in new_jobs):
+            # duplicate query in this batch; copy after it has been run
+            duplicate_jobs.append((output_file, query))
+        else:
+            new_jobs.append((output_file, query))
+
+    n_connections = min(args.get("db_connections", 1), len(new_jobs))
+    if n_connections <= 1:
+        for output_file, query in new_jobs:
+            write_table(output_file, query)
+            written_queries[query] = output_file
+    else:
+        db_cursor()  # report any connection problems before starting threads
+        pool = connection_pool(n_connections)
+
+        def run(job):
+            output_file, query = job
+            con = pool.getconn()
+            try:
+                start = time.time()
+                save_query_results(con, output_file, query)
+                print(
+                    "Wrote {file} (time taken: {dur:.2f}s)".format(
+                        file=output_file, dur=time.time() - start
+                    )
+                )
+                sys.stdout.flush()
+            finally:
+                pool.putconn(con)
+            return job
+
+        print(
+            "Writing {} tables using {} database connections".format(
+                len(new_jobs), n_connections
+            )
+        )
+        try:
+            with concurrent.futures.ThreadPoolExecutor(n_connections) as executor:
+                for output_file, query in executor.map(run, new_jobs):
+                    written_queries[query] = output_file
+        finally:
+            pool.closeall()
+
+    # copy any tables that were duplicated within this batch
+    for output_file, query in duplicate_jobs:
+        print(
+            "Copying {} to {} (same query)".format(written_queries[query], output_file)
+        )
+        shutil.copyfile(written_queries[query], output_file)
+
+
+def connection_pool(n_connections):
+    """
+    Return a thread-safe pool of up to `n_connections` read-only connections
+    to the database server, with the same settings as db_cursor().
+    """
+    import psycopg2.pool
+
+    class ReadOnlyConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+        def getconn(self, *args, **kwargs):
+            con = super().getconn(*args, **kwargs)
+            if not con.autocommit:
+                con.set_session(readonly=True, autocommit=True)
+            return con
+
+    return ReadOnlyConnectionPool(
+        1, n_connections, database=pgdatabase, host=pghost, user=pguser
+    )
+
+
 def write_table(output_file, query):
     print("Writing {file} ...".format(file=output_file), end=" ")
     sys.stdout.flush()  # display the part line to the user
 
     start = time.time()
-    cur = db_cursor()
-    try:
-        cur.execute(query)
-    except:
-        print("\nError running the following query:\n{}\n".format(query.decode()))
-        raise
-    with open(output_file, "w") as f:
-        writerow(f, [d[0] for d in cur.description])  # header
-        writerows(f, cur)  # data
+    save_query_results(db_cursor().connection, output_file, query)
     print("time taken: {dur:.2f}s".format(dur=time.time() - start))
 
 
+# number of rows to fetch from the database server at a time
+query_itersize = 10000
+
+
+def save_query_results(con, output_file, query):
+    """
+    Run `query` using connection `con` and save the results in `output_file`.
+    Rows are streamed from a server-side (named) cursor, query_itersize at a
+    time, so large tables are never held in memory on the client all at once.
+    """
+    # server-side cursors only exist within a transaction
+    autocommit = con.autocommit
+    con.autocommit = False
+    try:
+        with con.cursor(name="switch_query_results") as cur:
+            cur.itersize = query_itersize
+            try:
+                cur.execute(query)
+                # column names are not available until the first fetch
+                rows = cur.fetchmany(query_itersize)
+            except:
+                print(
+                    "\nError running the following query:\n{}\n".format(query.decode())
+                )
+                raise
+            with open(output_file, "w") as f:
+                writerow(f, [d[0] for d in cur.description])  # header
+                writerows(f, rows)
+                writerows(f, cur)  # remaining rows, fetched as needed
+    finally:
+        con.rollback()
+        con.autocommit = autocommit
+
+
 def stringify(val):
     if val is None:
         out = "."
@@ -16,6 +16,10 @@ from pyomo.core.base.numvalue import native_numeric_types
 import switch_model.solve
 from switch_model.utilities import iteritems
 
+# post_solve() re-solves the model, so it must finish before other modules
+# report results, even with --post-solve-workers
+parallel_post_solve = False
+
 # This uses define_dynamic_components instead of define_components, to ensure
 # that whatever components it needs to access will already be constructed. This
 # should be placed high in the module list so that the post-solve smoothing code
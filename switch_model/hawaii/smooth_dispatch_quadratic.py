@@ -5,6 +5,10 @@ from __future__ import print_function
 from pyomo.environ import *
 import switch_model.solve
 
+# post_solve() re-solves the model, so it must finish before other modules
+# report results, even with --post-solve-workers
+parallel_post_solve = False
+
 
 def define_components(m):
     if m.options.solver in ("cplex", "cplexamp", "gurobi", "gurobi_ampl"):
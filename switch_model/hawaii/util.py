@@ -1,5 +1,6 @@
 from __future__ import print_function
 from switch_model.utilities import string_types
+from switch_model.reporting import record_table
 import csv, sys, time, itertools
 from pyomo.environ import value
 import __main__ as main
@@ -40,15 +41,23 @@ def append_table(model, *indexes, **kwargs):
     # create a master indexing set
     # this is a list of lists, even if only one list was specified
     idx = itertools.product(*indexes)
+    rows = [tuple(value(v) for v in values(model, *unpack_elements(x))) for x in idx]
     with open(output_file, "a") as f:
         w = csv.writer(f, dialect="switch-csv")
         # write the data
         # import pdb
         # if 'rfm' in output_file:
         #     pdb.set_trace()
-        w.writerows(
-            tuple(value(v) for v in values(model, *unpack_elements(x))) for x in idx
-        )
+        w.writerows(rows)
+
+    if getattr(model.options, "results_db", None) is not None:
+        # save a copy in the results database, using the headings from the
+        # file (which may have been created in an earlier run); rows are added
+        # to any earlier copy of this table unless write_table() just created it
+        with open(output_file) as f:
+            headings = next(csv.reader(f, dialect="switch-csv"))
+        append = not kwargs.get("new_table", False)
+        record_table(model, output_file, headings, rows, append=append)
 
 
 def unpack_elements(tup):
@@ -79,7 +88,7 @@ def write_table(model, *indexes, **kwargs):
     start = time.time()
 
     create_table(**kwargs)
-    append_table(model, *indexes, **kwargs)
+    append_table(model, *indexes, new_table=True, **kwargs)
 
     print("time taken: {dur:.2f}s".format(dur=time.time() - start))
 
@@ -11,7 +11,15 @@ import switch_model
 
 
 def main():
-    cmds = ["solve", "solve-scenarios", "test", "upgrade", "--version"]
+    cmds = [
+        "solve",
+        "solve-scenarios",
+        "test",
+        "upgrade",
+        "reduce-time",
+        "solve-rolling",
+        "--version",
+    ]
     if len(sys.argv) >= 2 and sys.argv[1] in cmds:
         # If users run a script from the command line, the location of the script
         # gets added to the start of sys.path; if they call a module from the
@@ -37,6 +45,10 @@ def main():
             from .test import main
         elif cmd == "upgrade":
             from switch_model.upgrade import main
+        elif cmd == "reduce-time":
+            from switch_model.time_reduction import main
+        elif cmd == "solve-rolling":
+            from switch_model.rolling_horizon import main
         main()
     else:
         print(
@@ -25,8 +25,11 @@ dependencies = "switch_model.financials"
 
 
 import os
+import re
 import csv
 import itertools
+import sqlite3
+import numpy as np
 
 try:
     # Python 2
@@ -34,7 +37,7 @@ try:
 except ImportError:
     import pickle
 from pyomo.environ import value, Var, Expression
-from switch_model.utilities import make_iterable
+from switch_model.utilities import make_iterable, ReportExpression
 
 csv.register_dialect(
     "switch-csv",
@@ -65,6 +68,26 @@ def define_arguments(argparser):
         action="extend",
         help="List of expressions to save in addition to variables; can also be 'all' or 'none'.",
     )
+    argparser.add_argument(
+        "--generic-output-formats",
+        "--generic-output-format",
+        dest="generic_output_formats",
+        nargs="+",
+        choices=["csv", "parquet", "feather"],
+        default=["csv"],
+        help="Format(s) to use when saving generic variable and expression "
+        "results (default is csv). Parquet and feather require the pyarrow "
+        "package.",
+    )
+    argparser.add_argument(
+        "--results-db",
+        default=None,
+        help="SQLite database file in which to save copies of all the tables "
+        "written by post-solve functions (in addition to the usual output "
+        "files). Each table gets scenario and iteration columns, so the same "
+        "file can be used for several runs or a whole scenario queue; results "
+        "for a scenario and iteration replace any saved previously.",
+    )
 
 
 def write_table(instance, *indexes, **kwargs):
@@ -76,48 +99,87 @@ def write_table(instance, *indexes, **kwargs):
     values = kwargs["values"]
     digits = kwargs.get("digits", 6)
 
+    idx = list(itertools.product(*indexes))
+    if instance.options.sorted_output:
+        idx.sort()
+
+    # Build all the rows first, then format them in one batch and write them
+    # in bulk.
+    try:
+        rows = [values(instance, *unpack_elements(x)) for x in idx]
+    except TypeError:  # lambda got wrong number of arguments
+        # use old code, which doesn't unpack the indices
+        # TODO: flatten x (unpack tuples) like Pyomo before calling values()
+        # That may cause problems elsewhere though...
+        rows = [values(instance, *x) for x in idx]
+        print(
+            "DEPRECATION WARNING: switch_model.reporting.write_table() was called with a function"
+        )
+        print(
+            "that expects multidimensional index values to be stored in tuples, but Switch now unpacks"
+        )
+        print(
+            "these tuples automatically. Please update your code to work with unpacked index values."
+        )
+        print("Problem occured with {}.".format(values.__code__))
+
     with open(output_file, "w") as f:
         w = csv.writer(f, dialect="switch-csv")
         # write header row
         w.writerow(list(headings))
         # write the data
-        def format_row(row):
-            row = [value(v) for v in row]
-            sig_digits = "{0:." + str(digits) + "g}"
-            for (i, v) in enumerate(row):
-                if isinstance(v, float):
-                    if abs(v) < 1e-10:
-                        row[i] = 0
-                    else:
-                        row[i] = sig_digits.format(v)
-            return tuple(row)
-
-        idx = list(itertools.product(*indexes))
-        if instance.options.sorted_output:
-            idx.sort()
+        w.writerows(format_rows(rows, digits))
+    record_table(instance, output_file, headings, rows)
 
-        try:
-            w.writerows(
-                format_row(row=values(instance, *unpack_elements(x))) for x in idx
-            )
-        except TypeError:  # lambda got wrong number of arguments
-            # use old code, which doesn't unpack the indices
-            w.writerows(
-                # TODO: flatten x (unpack tuples) like Pyomo before calling values()
-                # That may cause problems elsewhere though...
-                format_row(row=values(instance, *x))
-                for x in idx
-            )
-            print(
-                "DEPRECATION WARNING: switch_model.reporting.write_table() was called with a function"
-            )
-            print(
-                "that expects multidimensional index values to be stored in tuples, but Switch now unpacks"
-            )
-            print(
-                "these tuples automatically. Please update your code to work with unpacked index values."
-            )
-            print("Problem occured with {}.".format(values.__code__))
+
+def format_rows(rows, digits=6):
+    """
+    Evaluate any Pyomo components in rows (a list of row tuples) and return a
+    list of rows ready to write to a CSV file. Floating point values are
+    written with the specified number of significant digits, and values
+    smaller than 1e-10 are written as 0. Floats are gathered from the whole
+    table into an array and clipped in one step, instead of cell by cell.
+    """
+    rows = [[value(v) for v in row] for row in rows]
+    cells = [
+        (r, c)
+        for r, row in enumerate(rows)
+        for c, v in enumerate(row)
+        if isinstance(v, float)
+    ]
+    if cells:
+        floats = np.array([rows[r][c] for r, c in cells], dtype=float)
+        text = list(map(("%." + str(digits) + "g").__mod__, floats.tolist()))
+        for i in np.flatnonzero(np.abs(floats) < 1e-10).tolist():
+            text[i] = 0
+        for (r, c), t in zip(cells, text):
+            rows[r][c] = t
+    return rows
+
+
+def write_data_frame(df, output_file, output_format):
+    """
+    Write a pandas DataFrame to output_file in the specified format ("csv",
+    "parquet" or "feather").
+    """
+    if output_format == "csv":
+        df.to_csv(output_file, index=False)
+        return
+    try:
+        import pyarrow
+    except ImportError:
+        print(
+            "Unable to import pyarrow, which is needed to save results in "
+            f"{output_format} format. Please install it via 'conda install "
+            "pyarrow' or 'pip install pyarrow'."
+        )
+        raise
+    if output_format == "parquet":
+        df.to_parquet(output_file, index=False)
+    elif output_format == "feather":
+        df.to_feather(output_file)
+    else:
+        raise ValueError(f"Unknown output format {output_format}.")
 
 
 def unpack_elements(items):
@@ -164,36 +226,17 @@ def save_generic_results(instance, outdir, sorted_output):
         components += [getattr(instance, c) for c in instance.options.save_expressions]
 
     missing_val_list = []
+    key_positions = {}
     for var in components:
-        output_file = os.path.join(outdir, "%s.csv" % var.name)
-        with open(output_file, "w") as fh:
-            writer = csv.writer(fh, dialect="switch-csv")
-            if var.is_indexed():
-                index_name = var.index_set().name
-                index_dimen = var.index_set().dimen
-                if index_dimen is UnknownSetDimen:
-                    # Need to specify dimen even if it's 1 in Pyomo 5.7+. We
-                    # could potentially use
-                    # pyomo.dataportal.process_data._guess_set_dimen() but it is
-                    # undocumented and not needed if all the sets have dimen
-                    # specified, which they do now.
-                    raise ValueError(
-                        f"Set {index_name} has unknown dimen; unable to infer "
-                        f"number of index columns to write to {var.name}.csv."
-                    )
-                # Write column headings
-                writer.writerow(
-                    [f"{index_name}_{i+1}" for i in range(index_dimen)] + [var.name]
-                )
-                # Results are saved in the order of the index set by default.
-                # Lexicographic sorting is available if wanted.
-                items = sorted(var.items()) if sorted_output else list(var.items())
-                for key, obj in items:
-                    writer.writerow(tuple(make_iterable(key)) + (get_value(obj),))
-            else:
-                # single-valued variable
-                writer.writerow([var.name])
-                writer.writerow([get_value(obj)])
+        headings, rows = generic_result_table(var, sorted_output)
+        write_generic_result(
+            instance,
+            outdir,
+            var.name,
+            headings,
+            rows,
+            index_columns=generic_index_columns(var, headings, key_positions),
+        )
     if missing_val_list:
         msg = (
             "WARNING: {} {}. This "
@@ -217,6 +260,259 @@ def save_generic_results(instance, outdir, sorted_output):
             print(msg)
 
 
+def generic_result_table(var, sorted_output=False):
+    """
+    Return headings and rows to save for a Var or Expression in the generic
+    output files, with one row per index and the value in the last column.
+    """
+    if var.is_indexed():
+        index_name = var.index_set().name
+        index_dimen = var.index_set().dimen
+        if index_dimen is UnknownSetDimen:
+            # Need to specify dimen even if it's 1 in Pyomo 5.7+. We
+            # could potentially use
+            # pyomo.dataportal.process_data._guess_set_dimen() but it is
+            # undocumented and not needed if all the sets have dimen
+            # specified, which they do now.
+            raise ValueError(
+                f"Set {index_name} has unknown dimen; unable to infer "
+                f"number of index columns to write to {var.name}.csv."
+            )
+        headings = [f"{index_name}_{i+1}" for i in range(index_dimen)] + [var.name]
+        # Results are saved in the order of the index set by default.
+        # Lexicographic sorting is available if wanted.
+        if isinstance(var, ReportExpression) and not var._constructed:
+            # report values without constructing the expression
+            items = list(var.evaluate().items())
+            if sorted_output:
+                items.sort()
+            rows = [tuple(make_iterable(key)) + (val,) for key, val in items]
+        else:
+            items = sorted(var.items()) if sorted_output else list(var.items())
+            rows = [tuple(make_iterable(key)) for key, obj in items]
+            vals = get_values([obj for key, obj in items])
+            rows = [row + (val,) for row, val in zip(rows, vals)]
+    else:
+        # single-valued variable
+        headings = [var.name]
+        rows = [(get_value(var),)]
+    return headings, rows
+
+
+def generic_index_columns(var, headings, cache=None):
+    """
+    Return the headings of the index columns in the generic results table for
+    var (see generic_result_table()) that hold periods, load zones or
+    timepoints, so they can be indexed in the --results-db database. These
+    are found from the sets that make up the index of var: PERIODS, LOAD_ZONES
+    or TIMEPOINTS themselves, or other sets whose members all belong to one of
+    those, checked one position at a time for multi-dimensional sets like
+    GEN_TPS. The positions found for each set are stored in cache (a dict),
+    if provided. Returns an empty list if --results-db was not specified.
+    """
+    m = var.model()
+    if getattr(m.options, "results_db", None) is None or not var.is_indexed():
+        return []
+    if cache is None:
+        cache = {}
+    key_sets = [
+        getattr(m, name)
+        for name in ("PERIODS", "LOAD_ZONES", "TIMEPOINTS")
+        if hasattr(m, name)
+    ]
+    positions = []
+    for s in var.index_set().subsets():
+        if s.name not in cache:
+            if any(s is k for k in key_sets):
+                cache[s.name] = [True]
+            else:
+                members = [set() for i in range(s.dimen)]
+                for key in s:
+                    for i, v in enumerate(make_iterable(key)):
+                        members[i].add(v)
+                cache[s.name] = [
+                    bool(vals) and any(all(v in k for v in vals) for k in key_sets)
+                    for vals in members
+                ]
+        positions.extend(cache[s.name])
+    return [h for h, is_key in zip(headings, positions) if is_key]
+
+
+def write_generic_result(instance, outdir, name, headings, rows, index_columns=()):
+    """
+    Save a table of generic results to outdir as name.csv (and/or other
+    formats specified by --generic-output-formats). index_columns lists any
+    headings that should be indexed in the --results-db database (see
+    generic_index_columns()).
+    """
+    for output_format in instance.options.generic_output_formats:
+        output_file = os.path.join(outdir, f"{name}.{output_format}")
+        if output_format == "csv":
+            with open(output_file, "w") as fh:
+                writer = csv.writer(fh, dialect="switch-csv")
+                writer.writerow(headings)
+                writer.writerows(rows)
+        else:
+            import pandas as pd
+
+            write_data_frame(
+                pd.DataFrame(rows, columns=headings), output_file, output_format
+            )
+    record_table(instance, name, headings, rows, index_columns=index_columns)
+
+
+def record_table(m, output_file, headings, rows, append=False, index_columns=()):
+    """
+    Hold a copy of a table written to output_file, to be saved in the
+    --results-db database by save_results_db(). Does nothing if --results-db
+    was not specified. The table is named for output_file, without any
+    scenario or iteration tag, and replaces any earlier table with the same
+    name and iteration (like overwriting the file), unless append is True.
+    The table will be indexed by the columns in index_columns, in addition to
+    any with names that look like period, load zone or timepoint columns (see
+    indexed_column_pattern).
+    """
+    if getattr(m.options, "results_db", None) is None:
+        return
+    try:
+        pending = m._results_db_tables
+    except AttributeError:
+        pending = m._results_db_tables = {}
+    name = results_table_name(m, output_file)
+    iteration = getattr(m, "iteration_number", None)
+    rows = [[db_value(v) for v in row] for row in rows]
+    if append and (name, iteration) in pending:
+        pending[name, iteration][1].extend(rows)
+    else:
+        pending[name, iteration] = (list(headings), rows, list(index_columns))
+
+
+def results_table_name(m, output_file):
+    """
+    Return the name to use in the results database for the table saved in
+    output_file, i.e., the file name without the extension, iteration number
+    (e.g., _0003) or scenario name (e.g., _scenario_name).
+    """
+    name = os.path.splitext(os.path.basename(output_file))[0]
+    node = getattr(m, "iteration_node", ())
+    if node:
+        name = re.sub("".join(f"_0*{i}" for i in node) + "$", "", name)
+    tag = "_" + m.options.scenario_name if m.options.scenario_name else ""
+    if tag and name.endswith(tag):
+        name = name[: -len(tag)]
+    return name.rstrip("_")
+
+
+def record_data_frame(m, output_file, df, columns=None):
+    """
+    Hold a copy of a pandas DataFrame written to output_file (with its index
+    and the specified columns, if any), to be saved by save_results_db(). See
+    record_table().
+    """
+    if getattr(m.options, "results_db", None) is None:
+        return
+    if columns is not None:
+        df = df[columns]
+    df = df.reset_index()
+    record_table(m, output_file, df.columns, df.itertuples(index=False, name=None))
+
+
+def db_value(v):
+    """Convert v to a value that can be stored in an SQLite database."""
+    if hasattr(v, "is_numeric_type"):  # Pyomo component or expression
+        v = value(v)
+    if isinstance(v, np.generic):
+        v = v.item()
+    elif not isinstance(v, (str, int, float, type(None))):
+        v = str(v)
+    return v
+
+
+# names of columns to index in the results database, e.g., period,
+# gen_load_zone or timepoint_label (index columns of generic results tables
+# are identified from the component's index sets instead, see
+# generic_index_columns())
+indexed_column_pattern = re.compile(
+    r"(\w+_)?(zones?|periods?|timepoints?|timeseries|timestamp)(_label|_\d+)?$",
+    re.IGNORECASE,
+)
+
+
+def save_results_db(m):
+    """
+    Save all tables held by record_table() to the --results-db database, in a
+    single transaction. Columns are added to existing tables as needed, and
+    each table is indexed by scenario and iteration and by any period, load
+    zone or timepoint columns (see record_table()).
+    """
+    pending = getattr(m, "_results_db_tables", None)
+    if not pending:
+        return
+    scenario = m.options.scenario_name or ""
+    # allow time for other processes in the same scenario queue to finish
+    # writing
+    con = sqlite3.connect(m.options.results_db, timeout=300)
+    try:
+        with con:  # commit all the changes at once
+            for (name, iteration), (headings, rows, index_columns) in pending.items():
+                columns = unique_names(["scenario", "iteration"] + headings)
+                indexed = {
+                    c
+                    for c, h in zip(columns[2:], headings)
+                    if h in index_columns or indexed_column_pattern.match(c)
+                }
+                table = quote_name(name)
+                con.execute(f"CREATE TABLE IF NOT EXISTS {table} (scenario, iteration)")
+                existing = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+                for c in columns:
+                    if c not in existing:
+                        con.execute(f"ALTER TABLE {table} ADD COLUMN {quote_name(c)}")
+                for c in columns:
+                    if c == "scenario" or c in indexed:
+                        keys = ["scenario", "iteration"] if c == "scenario" else [c]
+                        con.execute(
+                            f"CREATE INDEX IF NOT EXISTS {quote_name(name + '_' + c)} "
+                            f"ON {table} ({', '.join(map(quote_name, keys))})"
+                        )
+                con.execute(
+                    f"DELETE FROM {table} WHERE scenario = ? AND iteration IS ?",
+                    (scenario, iteration),
+                )
+                con.executemany(
+                    f"INSERT INTO {table} ({', '.join(map(quote_name, columns))}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    ([scenario, iteration] + row for row in rows),
+                )
+    finally:
+        con.close()
+    m.logger.info(
+        f"Saved {len(pending)} table{'' if len(pending) == 1 else 's'} in "
+        f"{m.options.results_db}."
+    )
+    pending.clear()
+
+
+def unique_names(headings):
+    """
+    Return a list of column names based on headings, adding a suffix to any
+    repeated names (e.g., fuels and technologies with the same name in
+    energy_sources.csv). SQLite column names are not case-sensitive.
+    """
+    names = []
+    for h in map(str, headings):
+        name, n = h, 1
+        while name.lower() in (x.lower() for x in names):
+            n += 1
+            name = f"{h}_{n}"
+        names.append(name)
+    return names
+
+
+def quote_name(name):
+    """Quote a table or column name for use in an SQL statement."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
 def get_value(obj, missing_val_list=[]):
     """
     Retrieve value of one element of a Variable or Expression, converting
@@ -242,6 +538,18 @@ def get_value(obj, missing_val_list=[]):
     return val
 
 
+def get_values(objs):
+    """
+    Retrieve values for a list of elements of a Variable or Expression, in
+    the same form as get_value(). Values of variables are read directly in
+    one pass, which is much faster than evaluating each one separately.
+    """
+    if all(obj.ctype is Var for obj in objs):
+        return [obj.value for obj in objs]
+    else:
+        return [get_value(obj) for obj in objs]
+
+
 def save_total_cost_value(instance, outdir):
     with open(os.path.join(outdir, "total_cost.txt"), "w") as fh:
         fh.write("{}\n".format(value(instance.SystemCost)))
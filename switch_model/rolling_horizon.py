@@ -0,0 +1,560 @@
+# Copyright (c) 2015-2022 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2.0, which is in the LICENSE file.
+
+"""
+Solve a production-cost model as a series of shorter rolling-horizon windows.
+
+This is run as `switch solve-rolling` in place of `switch solve`, for models
+where all build decisions are fixed in advance (e.g., via
+gen_build_predetermined.csv), so each window only needs to choose dispatch.
+The timeseries in each period are treated as a chronological sequence and
+split into windows of --window-size timeseries. Each window is solved as a
+separate model, with all of its timepoints joined into a single timeseries.
+--window-overlap additional timeseries are added to the end of each window as
+a look-ahead; these are solved but their results are discarded.
+
+Windows are solved in order, with the storage state of charge and committed
+capacity at the end of each window (before the look-ahead) used as the
+starting state for the next window. To use multiple processors, each
+period's windows can also be divided into --segments independent sequences,
+which are solved in parallel by --jobs worker processes. The first window of
+each period or segment has no starting state, so it uses circular indexing
+like a normal Switch timeseries; the first window of each segment after the
+first also starts --window-overlap timeseries early, to give a more
+realistic state at the start of the results.
+
+Inputs for each window are written to temporary directories and solved with
+solve.main(), with this module added to the module list to apply the
+starting state. Then the results for each window are stitched together into
+DispatchGen.csv, ChargeStorage.csv, StateOfCharge.csv, CommitGen.csv (where
+relevant) and energy_balance_duals.csv in the outputs directory.
+rolling_horizon_windows.csv in the outputs directory lists the timepoints and
+objective value for each window.
+
+Each window gets weights for its timepoints that make it fill the whole
+period, so the window's costs are on the same scale as the full model.
+Duals are scaled back to the original timepoint weights before they are
+saved. Constraints that cover a whole period (e.g., annual limits on fuel
+use or storage cycling) are applied separately within each window. Minimum
+up- and down-time constraints wrap around within each window. Inputs with
+tables indexed by timeseries (e.g., hydro_timeseries.csv) can only be used
+with single-timeseries windows and no overlap.
+"""
+
+import csv, multiprocessing, os, shutil, sys, tempfile, time
+
+from pyomo.environ import *
+
+from switch_model.utilities import _ArgumentParser
+from switch_model.time_reduction import (
+    read_csv,
+    write_csv,
+    write_filtered_inputs,
+    timeseries_columns,
+)
+
+# columns that identify the investment period in input tables
+period_columns = {"period", "periods", "investment_period"}
+initial_state_of_charge_file = "rolling_horizon_initial_state_of_charge.csv"
+initial_commit_file = "rolling_horizon_initial_commit.csv"
+
+
+def define_components(mod):
+    """
+    Components used to set the starting state for each window when solving
+    with `switch solve-rolling`.
+
+    INITIAL_STATE_OF_CHARGE_GENS is the set of storage projects with a
+    specified state of charge at the start of each timeseries, given by
+    initial_state_of_charge[g] (MWh).
+
+    INITIAL_COMMIT_GENS is the set of projects with specified committed
+    capacity at the start of each timeseries, given by initial_commit[g]
+    (MW).
+
+    For these projects, the first timepoint of each timeseries follows
+    from the initial state, instead of the last timepoint of the
+    timeseries.
+    """
+    mod.INITIAL_STATE_OF_CHARGE_GENS = Set(dimen=1, within=mod.GENERATION_PROJECTS)
+    mod.initial_state_of_charge = Param(
+        mod.INITIAL_STATE_OF_CHARGE_GENS, within=NonNegativeReals
+    )
+    mod.INITIAL_COMMIT_GENS = Set(dimen=1, within=mod.GENERATION_PROJECTS)
+    mod.initial_commit = Param(mod.INITIAL_COMMIT_GENS, within=NonNegativeReals)
+    mod.TS_FIRST_TPS = Set(
+        dimen=1,
+        initialize=lambda m: [m.TPS_IN_TS[ts].first() for ts in m.TIMESERIES],
+    )
+
+
+def define_dynamic_components(mod):
+    # These are defined here so the storage and commitment components will
+    # already exist, whatever order the modules were loaded in.
+    released = []
+    if hasattr(mod, "Track_State_Of_Charge"):
+        mod.INITIAL_STATE_OF_CHARGE_GEN_TPS = Set(
+            dimen=2,
+            initialize=lambda m: [
+                (g, t)
+                for g in m.INITIAL_STATE_OF_CHARGE_GENS
+                for t in m.TS_FIRST_TPS
+                if (g, t) in m.STORAGE_GEN_TPS
+            ],
+        )
+        mod.Track_Initial_State_Of_Charge = Constraint(
+            mod.INITIAL_STATE_OF_CHARGE_GEN_TPS,
+            rule=lambda m, g, t: m.StateOfCharge[g, t]
+            == m.initial_state_of_charge[g]
+            + (
+                m.ChargeStorage[g, t] * m.gen_storage_efficiency[g]
+                - m.DispatchGen[g, t]
+            )
+            * m.tp_duration_hrs[t],
+        )
+        released.append(("Track_State_Of_Charge", "INITIAL_STATE_OF_CHARGE_GEN_TPS"))
+
+    if hasattr(mod, "Commit_StartupGenCapacity_ShutdownGenCapacity_Consistency"):
+        mod.INITIAL_COMMIT_GEN_TPS = Set(
+            dimen=2,
+            initialize=lambda m: [
+                (g, t)
+                for g in m.INITIAL_COMMIT_GENS
+                for t in m.TS_FIRST_TPS
+                if (g, t) in m.GEN_TPS
+            ],
+        )
+        mod.Initial_Commit_StartupGenCapacity_ShutdownGenCapacity_Consistency = (
+            Constraint(
+                mod.INITIAL_COMMIT_GEN_TPS,
+                rule=lambda m, g, t: m.initial_commit[g]
+                + m.StartupGenCapacity[g, t]
+                - m.ShutdownGenCapacity[g, t]
+                == m.CommitGen[g, t],
+            )
+        )
+        released.append(
+            (
+                "Commit_StartupGenCapacity_ShutdownGenCapacity_Consistency",
+                "INITIAL_COMMIT_GEN_TPS",
+            )
+        )
+
+    # turn off the circular versions of the constraints replaced above
+    def rule(m):
+        for constraint, index in released:
+            for key in getattr(m, index):
+                getattr(m, constraint)[key].deactivate()
+
+    mod.Release_Circular_Initial_State = BuildAction(rule=rule)
+
+
+def load_inputs(mod, switch_data, inputs_dir):
+    """
+    Import the starting state for each timeseries, if available. These files
+    are created automatically by `switch solve-rolling`.
+
+    rolling_horizon_initial_state_of_charge.csv
+        GENERATION_PROJECT, initial_state_of_charge
+
+    rolling_horizon_initial_commit.csv
+        GENERATION_PROJECT, initial_commit
+    """
+    switch_data.load_aug(
+        optional=True,
+        filename=os.path.join(inputs_dir, initial_state_of_charge_file),
+        index=mod.INITIAL_STATE_OF_CHARGE_GENS,
+        param=(mod.initial_state_of_charge,),
+    )
+    switch_data.load_aug(
+        optional=True,
+        filename=os.path.join(inputs_dir, initial_commit_file),
+        index=mod.INITIAL_COMMIT_GENS,
+        param=(mod.initial_commit,),
+    )
+
+
+def add_parser_args(parser):
+    parser.add_argument(
+        "--window-size",
+        type=int,
+        default=1,
+        help="Number of timeseries to report from each window (default is 1).",
+    )
+    parser.add_argument(
+        "--window-overlap",
+        type=int,
+        default=1,
+        help="Number of additional timeseries to solve as a look-ahead at the "
+        "end of each window (default is 1).",
+    )
+    parser.add_argument(
+        "--segments",
+        type=int,
+        default=None,
+        help="Number of independent sequences of windows to create in each "
+        "period, which can be solved in parallel (default is the same as --jobs).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes to use (default is 1).",
+    )
+
+
+def main(args=None):
+    from switch_model import solve
+
+    if args is None:
+        args = solve.get_option_file_args(extra_args=sys.argv[1:])
+    parser = _ArgumentParser(
+        allow_abbrev=False,
+        description="Solve a production-cost model as a series of windows. "
+        "Other arguments are passed to `switch solve` for each window.",
+    )
+    add_parser_args(parser)
+    rolling_options, solve_args = parser.parse_known_args(args=args)
+    if rolling_options.segments is None:
+        rolling_options.segments = rolling_options.jobs
+
+    dirs_parser = _ArgumentParser(allow_abbrev=False, add_help=False)
+    dirs_parser.add_argument("--inputs-dir", default="inputs")
+    dirs_parser.add_argument("--outputs-dir", default="outputs")
+    dirs = dirs_parser.parse_known_args(args=solve_args)[0]
+
+    segments = define_windows(
+        dirs.inputs_dir,
+        rolling_options.window_size,
+        rolling_options.window_overlap,
+        rolling_options.segments,
+    )
+    os.makedirs(dirs.outputs_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="rolling_horizon_", dir=dirs.outputs_dir)
+    solve_args = solve_args + [
+        "--include-module",
+        __name__,
+        "--no-post-solve",
+        "--no-save-solution",
+    ]
+    if "dual" not in solve_args:
+        solve_args += ["--suffix", "dual"]
+    tasks = [(dirs.inputs_dir, work_dir, solve_args, s) for s in segments]
+
+    print(
+        f"Solving {sum(len(s) for s in segments)} windows in {len(segments)} "
+        f"sequence(s) with {rolling_options.jobs} worker(s)."
+    )
+    try:
+        if rolling_options.jobs > 1:
+            with multiprocessing.Pool(rolling_options.jobs) as pool:
+                results = pool.map(solve_segment, tasks, chunksize=1)
+        else:
+            results = [solve_segment(task) for task in tasks]
+    finally:
+        shutil.rmtree(work_dir)
+
+    write_results(dirs.inputs_dir, dirs.outputs_dir, results)
+    print(f"Saved rolling-horizon results in {dirs.outputs_dir}.")
+
+
+def define_windows(inputs_dir, window_size, overlap, n_segments):
+    """
+    Divide the timeseries in inputs_dir into windows and return a list of
+    segments, each of which is a list of windows to be solved in order.
+    Each window is a dict identifying the period, the timeseries to solve
+    and the timeseries to report.
+    """
+    if window_size < 1 or overlap < 0 or n_segments < 1:
+        raise ValueError(
+            "--window-size and --segments must be at least 1 and "
+            "--window-overlap must be at least 0."
+        )
+    timeseries = read_csv(os.path.join(inputs_dir, "timeseries.csv"))
+    segments = []
+    for period, group in timeseries.groupby("ts_period", sort=False):
+        ts_list = group["TIMESERIES"].tolist()
+        starts = list(range(0, len(ts_list), window_size))
+        n = min(n_segments, len(starts))
+        for s in range(n):
+            segment_starts = starts[s * len(starts) // n : (s + 1) * len(starts) // n]
+            segment = []
+            for i, start in enumerate(segment_starts):
+                end = start + window_size
+                # add look-back at the start of later segments
+                first = max(start - overlap, 0) if (i == 0 and s > 0) else start
+                segment.append(
+                    {
+                        "name": f"{period}_{start}",
+                        "period": period,
+                        "timeseries": ts_list[first : end + overlap],
+                        "reported_timeseries": ts_list[start:end],
+                        "initial_state": i > 0,
+                    }
+                )
+            segments.append(segment)
+    return segments
+
+
+def write_window_inputs(inputs_dir, window_inputs_dir, window, state):
+    """
+    Write inputs for one window, with all its timepoints in one timeseries,
+    and the specified initial state (if any).
+    """
+    timeseries = read_csv(os.path.join(inputs_dir, "timeseries.csv"))
+    timepoints = read_csv(os.path.join(inputs_dir, "timepoints.csv"))
+    timeseries["ts_scale_to_period"] = timeseries["ts_scale_to_period"].astype(float)
+    ts_info = timeseries.set_index("TIMESERIES")
+
+    # total hours in the period, which the window must fill
+    in_period = ts_info[ts_info["ts_period"] == window["period"]]
+    period_hours = (
+        in_period["ts_scale_to_period"]
+        * in_period["ts_num_tps"].astype(float)
+        * in_period["ts_duration_of_tp"].astype(float)
+    ).sum()
+
+    window_ts = ts_info.loc[window["timeseries"]]
+    if window_ts["ts_duration_of_tp"].nunique() > 1:
+        raise ValueError(
+            f"Timeseries {', '.join(window['timeseries'])} have different "
+            "timepoint durations, so they cannot be solved in the same window."
+        )
+    duration = float(window_ts["ts_duration_of_tp"].iloc[0])
+    tps = timepoints[timepoints["timeseries"].isin(window["timeseries"])].copy()
+    # keep timepoints in chronological (timeseries) order
+    tps["order"] = tps["timeseries"].map(
+        {ts: i for i, ts in enumerate(window["timeseries"])}
+    )
+    tps = tps.sort_values("order", kind="stable").drop(columns="order")
+    scale = period_hours / (len(tps) * duration)
+
+    new_timeseries = ts_info.loc[window["timeseries"][:1]].reset_index()
+    new_timeseries["TIMESERIES"] = window["name"]
+    new_timeseries["ts_num_tps"] = str(len(tps))
+    new_timeseries["ts_scale_to_period"] = repr(float(scale))
+    # factor to convert duals back to the original weights of each timepoint
+    weight_factor = {
+        tp: ts_info.loc[ts, "ts_scale_to_period"] / scale
+        for tp, ts in zip(tps["timepoint_id"], tps["timeseries"])
+    }
+    reported_tps = set(
+        tps.loc[tps["timeseries"].isin(window["reported_timeseries"]), "timepoint_id"]
+    )
+    tps["timeseries"] = window["name"]
+
+    # check for tables that can't be used with joined timeseries; other
+    # tables are filtered by write_filtered_inputs()
+    if len(window["timeseries"]) > 1:
+        for file in os.listdir(inputs_dir):
+            if file.endswith(".csv") and file not in {
+                "timeseries.csv",
+                "timepoints.csv",
+            }:
+                with open(os.path.join(inputs_dir, file)) as f:
+                    header = f.readline().strip().lower().split(",")
+                if timeseries_columns.intersection(header):
+                    raise ValueError(
+                        f"{file} has data for individual timeseries, so it can "
+                        "only be used with --window-size 1 --window-overlap 0."
+                    )
+    else:
+        new_timeseries["TIMESERIES"] = window["timeseries"][0]
+        tps["timeseries"] = window["timeseries"][0]
+
+    write_filtered_inputs(inputs_dir, window_inputs_dir, new_timeseries, tps)
+    drop_other_periods(window_inputs_dir, window["period"])
+
+    if state is not None:
+        for file, col, values in [
+            (initial_state_of_charge_file, "initial_state_of_charge", state["soc"]),
+            (initial_commit_file, "initial_commit", state["commit"]),
+        ]:
+            with open(os.path.join(window_inputs_dir, file), "w", newline="") as f:
+                w = csv.writer(f, lineterminator="\n")
+                w.writerow(["GENERATION_PROJECT", col])
+                w.writerows(values.items())
+    return reported_tps, weight_factor
+
+
+def drop_other_periods(inputs_dir, period):
+    """
+    Remove all periods except `period` from inputs_dir, along with rows of
+    other tables that refer to them. Capacity must be fixed via
+    gen_build_predetermined.csv, so gen_build_costs.csv rows for other
+    periods are only kept if they are also predetermined.
+    """
+    periods = read_csv(os.path.join(inputs_dir, "periods.csv"))
+    other_periods = set(periods["INVESTMENT_PERIOD"]) - {period}
+    if not other_periods:
+        return
+    write_csv(
+        periods[periods["INVESTMENT_PERIOD"] == period],
+        os.path.join(inputs_dir, "periods.csv"),
+    )
+    predetermined = set()
+    path = os.path.join(inputs_dir, "gen_build_predetermined.csv")
+    if os.path.exists(path):
+        df = read_csv(path)
+        predetermined = set(zip(df["GENERATION_PROJECT"], df["build_year"]))
+    for file in sorted(os.listdir(inputs_dir)):
+        if not file.endswith(".csv") or file == "periods.csv":
+            continue
+        path = os.path.join(inputs_dir, file)
+        with open(path) as f:
+            header = f.readline().strip().split(",")
+        if file == "gen_build_costs.csv":
+            df = read_csv(path)
+            keep = [
+                y not in other_periods or (g, y) in predetermined
+                for g, y in zip(df["GENERATION_PROJECT"], df["build_year"])
+            ]
+            write_csv(df[keep], path)
+            continue
+        for col in header:
+            if col.lower() in period_columns:
+                df = read_csv(path)
+                write_csv(df[~df[col].isin(other_periods)], path)
+                break
+
+
+def solve_segment(task):
+    """
+    Solve a sequence of windows, passing the state at the end of each one to
+    the next, and return a list of results for each window.
+    """
+    from switch_model import solve
+
+    inputs_dir, work_dir, solve_args, segment = task
+    state = None
+    results = []
+    for window in segment:
+        window_dir = os.path.join(work_dir, window["name"])
+        reported_tps, weight_factor = write_window_inputs(
+            inputs_dir,
+            os.path.join(window_dir, "inputs"),
+            window,
+            state if window["initial_state"] else None,
+        )
+        start = time.time()
+        m = solve.main(
+            args=solve_args
+            + [
+                "--inputs-dir",
+                os.path.join(window_dir, "inputs"),
+                "--outputs-dir",
+                os.path.join(window_dir, "outputs"),
+            ]
+        )
+        result, state = window_results(m, window, reported_tps, weight_factor)
+        result["solve_time"] = time.time() - start
+        results.append(result)
+        shutil.rmtree(window_dir)
+    return results
+
+
+def window_results(m, window, reported_tps, weight_factor):
+    """
+    Return a dict of results for the reported timepoints in the window, and
+    the state at the end of the last reported timepoint.
+    """
+    tps = [t for t in m.TIMEPOINTS if str(t) in reported_tps]
+    reported = set(tps)
+    last_tp = tps[-1]
+    result = {
+        "window": window["name"],
+        "period": window["period"],
+        "timeseries": window["timeseries"],
+        "reported_timeseries": window["reported_timeseries"],
+        "objective": value(m.SystemCost),
+    }
+
+    def get_values(component, index):
+        return [
+            (g, str(t), value(component[g, t])) for (g, t) in index if t in reported
+        ]
+
+    result["DispatchGen"] = get_values(m.DispatchGen, m.GEN_TPS)
+    state = {"soc": {}, "commit": {}}
+    if hasattr(m, "StateOfCharge"):
+        result["ChargeStorage"] = get_values(m.ChargeStorage, m.STORAGE_GEN_TPS)
+        result["StateOfCharge"] = get_values(m.StateOfCharge, m.STORAGE_GEN_TPS)
+        state["soc"] = {
+            g: value(m.StateOfCharge[g, last_tp])
+            for g in m.STORAGE_GENS
+            if (g, last_tp) in m.STORAGE_GEN_TPS
+        }
+    if hasattr(m, "CommitGen"):
+        result["CommitGen"] = get_values(m.CommitGen, m.GEN_TPS)
+        state["commit"] = {
+            g: value(m.CommitGen[g, last_tp])
+            for g in m.GENERATION_PROJECTS
+            if (g, last_tp) in m.GEN_TPS
+        }
+    result["energy_balance_duals"] = [
+        (z, str(t), m.dual[m.Zone_Energy_Balance[z, t]] * weight_factor[str(t)])
+        for z in m.LOAD_ZONES
+        for t in tps
+        if m.Zone_Energy_Balance[z, t] in m.dual
+    ]
+    return result, state
+
+
+def write_results(inputs_dir, outputs_dir, results):
+    """
+    Combine results from all windows and save them in outputs_dir, in the
+    same format used by `switch solve`.
+    """
+    windows = [r for segment in results for r in segment]
+    timepoints = read_csv(os.path.join(inputs_dir, "timepoints.csv"))
+    tp_order = {tp: i for i, tp in enumerate(timepoints["timepoint_id"])}
+    tables = [
+        ("DispatchGen", ("GEN_TPS_1", "GEN_TPS_2", "DispatchGen")),
+        ("ChargeStorage", ("STORAGE_GEN_TPS_1", "STORAGE_GEN_TPS_2", "ChargeStorage")),
+        ("StateOfCharge", ("STORAGE_GEN_TPS_1", "STORAGE_GEN_TPS_2", "StateOfCharge")),
+        ("CommitGen", ("GEN_TPS_1", "GEN_TPS_2", "CommitGen")),
+        ("energy_balance_duals", ("load_zone", "timepoint", "dual")),
+    ]
+    for name, headings in tables:
+        rows = [row for w in windows for row in w.get(name, [])]
+        if not rows:
+            continue
+        # sort by project or zone (in order of first appearance), then timepoint
+        first_row = {}
+        for row in rows:
+            first_row.setdefault(row[0], len(first_row))
+        rows.sort(key=lambda r: (first_row[r[0]], tp_order[r[1]]))
+        with open(os.path.join(outputs_dir, name + ".csv"), "w", newline="") as f:
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(headings)
+            w.writerows(rows)
+
+    with open(
+        os.path.join(outputs_dir, "rolling_horizon_windows.csv"), "w", newline=""
+    ) as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(
+            (
+                "window",
+                "period",
+                "first_timeseries",
+                "last_timeseries",
+                "first_reported_timeseries",
+                "last_reported_timeseries",
+                "objective",
+                "solve_time",
+            )
+        )
+        w.writerows(
+            (
+                r["window"],
+                r["period"],
+                r["timeseries"][0],
+                r["timeseries"][-1],
+                r["reported_timeseries"][0],
+                r["reported_timeseries"][-1],
+                r["objective"],
+                round(r["solve_time"], 2),
+            )
+            for r in windows
+        )
@@ -5,6 +5,7 @@ from __future__ import print_function
 
 import logging
 import sys, os, time, shlex, re, inspect, textwrap, types, threading, json, traceback
+import importlib, hashlib
 
 try:
     import IPython
@@ -26,6 +27,7 @@ except NameError:
     pass
 
 from pyomo.environ import *
+from pyomo.common.collections import ComponentSet
 from pyomo.opt import SolverFactory, SolverStatus, TerminationCondition
 import pyomo.version
 
@@ -42,6 +44,7 @@ from switch_model.utilities import (
     rewrap,
 )
 from switch_model.upgrade import do_inputs_need_upgrade, upgrade_inputs
+from switch_model.reporting import save_results_db
 
 
 def main(args=None, return_model=False, return_instance=False):
@@ -171,10 +174,12 @@ def main(args=None, return_model=False, return_instance=False):
         # This must be done before the model is constructed.
         patch_pyomo()
 
-        # Define the model
-        model = create_model(modules, args=args, logger=logger)
-        # Add any suffixes specified on the command line (usually only iis)
-        add_extra_suffixes(model)
+        # Define the model, or reuse one defined earlier in this process
+        model, data = get_cached_model(modules, args, logger)
+        if model is None:
+            model = create_model(modules, args=args, logger=logger)
+            # Add any suffixes specified on the command line (usually only iis)
+            add_extra_suffixes(model)
 
         logger.info("Model defined in {:.2f} s.".format(timer.step_time()))
 
@@ -186,17 +191,38 @@ def main(args=None, return_model=False, return_instance=False):
             # Fail quickly if the prior solution file is not available.
             # TODO: allow a directory to be specified after --reload-prior-solution,
             # otherwise use outputs_dir.
+            # Solutions saved by older versions of Switch are in results.pickle.
             prior_solution_file = os.path.join(
-                model.options.outputs_dir, "results.pickle"
+                model.options.outputs_dir, solution_manifest_file
             )
+            if not os.path.exists(prior_solution_file):
+                prior_solution_file = os.path.join(
+                    model.options.outputs_dir, "results.pickle"
+                )
             if not os.path.exists(prior_solution_file):
                 raise IOError(
-                    "Prior solution {} does not exist.".format(prior_solution_file)
+                    "Prior solution {} does not exist.".format(
+                        os.path.join(model.options.outputs_dir, solution_manifest_file)
+                    )
                 )
 
+        if model.options.estimate:
+            # construct only the sets and parameters and report model size
+            logger.info("\nLoading inputs...")
+            instance = model.load_inputs(data=data)
+            estimate = model.report_size_estimate(instance)
+            logger.info(f"Estimated model size in {timer.step_time():.2f} s.")
+            return estimate
+
         # create an instance (also reports time spent reading data and loading into model)
         logger.info("\nLoading inputs...")
-        instance = model.load_inputs()
+        instance = model.load_inputs(data=data)
+        if model_cache is not None:
+            model_cache.clear()
+            model_cache[model_cache_key(modules, model.options)] = (
+                model,
+                instance.DataPortal,
+            )
 
         #### Below here, we refer to instance instead of model ####
 
@@ -222,7 +248,10 @@ def main(args=None, return_model=False, return_instance=False):
 
         if instance.options.reload_prior_solution:
             logger.info("Loading prior solution...")
-            reload_prior_solution_from_pickle(instance, prior_solution_file)
+            if prior_solution_file.endswith(".pickle"):
+                reload_prior_solution_from_pickle(instance, prior_solution_file)
+            else:
+                reload_prior_solution(instance, instance.options.outputs_dir)
             logger.info(
                 f"Loaded previous results into model instance in {timer.step_time():.2f} s."
             )
@@ -554,6 +583,8 @@ def iterate(m, depth=0):
             m.iteration_node = m.iteration_node[:depth] + (j,)
             for module in current_modules:
                 converged = iterate_module_func(m, module, "post_iterate", converged)
+            # save any tables reported during this iteration in --results-db
+            save_results_db(m)
 
             j += 1
         if converged:
@@ -677,6 +708,93 @@ def define_arguments(argparser):
         default=None,
         help="Method for Pyomo to use to communicate with solver",
     )
+    argparser.add_argument(
+        "--persistent-solver",
+        default=False,
+        action="store_true",
+        help="""
+            Keep the model loaded in a persistent solver (Pyomo's APPSI
+            interface, e.g., --solver highs) between solves, instead of writing
+            a new problem file and starting a new solver process each time.
+            When the model is solved repeatedly (e.g., with iterated demand
+            response), only the changes are sent to the solver and it can
+            reuse its previous solution as a starting point. Modules must call
+            model.mark_changed() for any components they alter in place
+            between solves.
+        """,
+    )
+    argparser.add_argument(
+        "--fast-writer",
+        default=False,
+        action="store_true",
+        help="""
+            Extract the model's linear constraints directly into a sparse
+            matrix and pass it to the solver in bulk, instead of using Pyomo's
+            problem writers. This is available for linear models with --solver
+            highs (passed in memory via highspy) or cbc (via an LP file with
+            generic names, or component names if --symbolic-solver-labels is
+            specified). Solutions, duals and reduced costs are loaded back into
+            the model as usual. This mainly saves time with HiGHS, since the
+            matrix is still built by walking each constraint expression.
+        """,
+    )
+    argparser.add_argument(
+        "--benders",
+        default=False,
+        action="store_true",
+        help="""
+            Solve the model by Benders decomposition (see
+            switch_model.benders), with investment decisions in a master
+            problem and independent groups of dispatch decisions (usually
+            timeseries) in subproblems that are solved in parallel. Requires
+            highspy.
+        """,
+    )
+    argparser.add_argument(
+        "--benders-master-vars",
+        nargs="+",
+        default=[],
+        help="""
+            Names of additional variables to include in the Benders master
+            problem (e.g., integer variables that would otherwise link
+            subproblems). Build variables are always included.
+        """,
+    )
+    argparser.add_argument(
+        "--benders-tolerance",
+        type=float,
+        default=1e-6,
+        help="""
+            Stop Benders iteration when the gap between the upper and lower
+            bounds is less than this fraction of the upper bound (default is
+            1e-6).
+        """,
+    )
+    argparser.add_argument(
+        "--benders-max-iterations",
+        type=int,
+        default=200,
+        help="Maximum number of Benders iterations (default is 200).",
+    )
+    argparser.add_argument(
+        "--benders-jobs",
+        type=int,
+        default=1,
+        help="""
+            Number of worker processes to use for Benders subproblems
+            (default is 1, i.e., solve them in the main process).
+        """,
+    )
+    argparser.add_argument(
+        "--benders-penalty",
+        type=float,
+        default=None,
+        help="""
+            Cost per unit for Benders subproblems to violate constraints that
+            include master-problem variables. Default is 10 times the
+            largest cost coefficient in the model.
+        """,
+    )
     # note: pyomo has a --solver-options option but it is not clear
     # whether that does the same thing as --solver-options-string so we don't reuse the same name.
     argparser.add_argument(
@@ -767,6 +885,66 @@ def define_arguments(argparser):
             studies with alternative inputs.
         """,
     )
+    argparser.add_argument(
+        "--input-engine",
+        default="dataportal",
+        choices=["dataportal", "columnar"],
+        help="""
+            Method to use for reading .csv/.tab input files. "dataportal"
+            (default) uses Pyomo's standard DataPortal.load(); "columnar"
+            reads each table in bulk with pandas, which is much faster for
+            large inputs. Per-file read times are reported with --log-level
+            debug.
+        """,
+    )
+    argparser.add_argument(
+        "--input-cache",
+        default=False,
+        action="store_true",
+        help="""
+            Save the data read from each input file in a cache and reuse it on
+            later runs that read identical files, to save time parsing large
+            inputs. Entries are stored in the directory given by
+            --input-cache-dir and removed after 30 days without use.
+        """,
+    )
+    argparser.add_argument(
+        "--input-cache-dir",
+        default=None,
+        help="""
+            Directory to use for --input-cache (default is a switch/input_cache
+            directory in the user's standard cache directory, e.g.,
+            ~/.cache/switch/input_cache on Linux).
+        """,
+    )
+    argparser.add_argument(
+        "--profile-construction",
+        type=int,
+        nargs="?",
+        const=20,
+        default=None,
+        metavar="N",
+        help="""
+            Record the time, memory (via tracemalloc) and number of elements
+            used to construct each model component, save them in
+            construction_profile.csv in the outputs directory, and report the
+            N components that took the most time and memory (default 20).
+            Tracking memory slows down construction considerably.
+        """,
+    )
+    argparser.add_argument(
+        "--estimate",
+        default=False,
+        action="store_true",
+        help="""
+            Estimate the number of variables, constraints and nonzeros in the
+            model and the memory needed to construct it, then exit without
+            solving. Only the sets and parameters are constructed; the size of
+            each constraint and expression is extrapolated from a sample of
+            its indices. The estimate is reported for each module and saved in
+            model_size_estimate.csv in the outputs directory.
+        """,
+    )
     argparser.add_argument(
         "--outputs-dir",
         default="outputs",
@@ -781,6 +959,17 @@ def define_arguments(argparser):
             functions).
         """,
     )
+    argparser.add_argument(
+        "--post-solve-workers",
+        type=int,
+        default=1,
+        help="""
+            Number of worker processes to use to run post-solve code for
+            different modules at the same time (default is 1, i.e., run them
+            one by one in the main process). Requires an operating system
+            that can fork processes (e.g., Linux or macOS).
+        """,
+    )
     argparser.add_argument(
         "--reload-prior-solution",
         default=False,
@@ -1040,6 +1229,111 @@ def get_option_file_args(dir=".", extra_args=[]):
 # if we want to make these standard parts of Switch.
 
 
+# Model and input data most recently defined in this process, keyed by
+# model_cache_key(). This is None (disabled) unless a caller such as
+# solve_scenarios --jobs sets it to a dict before calling main() repeatedly.
+model_cache = None
+
+# Options that only affect how a model instance is solved or reported, not
+# the components defined in the model or the data loaded into it. Models in
+# model_cache can be reused for scenarios that differ only in these.
+run_only_options = {
+    "scenario_name",
+    "outputs_dir",
+    "sorted_output",
+    "max_iter",
+    "tee",
+    "keepfiles",
+    "symbolic_solver_labels",
+    "tempdir",
+    "no_post_solve",
+    "post_solve_workers",
+    "no_save_solution",
+    "results_db",
+    "reload_prior_solution",
+    "interact",
+    "interact_color",
+    "input_engine",
+    "input_cache",
+    "input_cache_dir",
+    "profile_construction",
+    "estimate",
+    "fast_writer",
+    "benders",
+    "benders_tolerance",
+    "benders_max_iterations",
+    "benders_jobs",
+    "benders_penalty",
+    "log_run_to_file",
+    "logs_dir",
+    "log_level",
+    "verbose",
+    "debug",
+    "full_traceback",
+}
+
+
+def model_cache_key(modules, options):
+    return repr(
+        (
+            tuple(modules),
+            sorted(
+                (k, v) for k, v in vars(options).items() if k not in run_only_options
+            ),
+        )
+    )
+
+
+def parse_model_options(modules, args):
+    """
+    Return the options that create_model() would set for a model with these
+    modules and arguments, without defining the model.
+    """
+    argparser = _ArgumentParser(allow_abbrev=False)
+    for m in modules:
+        module = importlib.import_module(m)
+        if hasattr(module, "define_arguments"):
+            module.define_arguments(argparser)
+    return argparser.parse_args(args)
+
+
+def get_model_cache_key(args):
+    """
+    Return the model_cache_key() that main() would use for these arguments.
+    solve_scenarios uses this to decide whether a scenario can run in the
+    same process as the previous one.
+    """
+    modules = get_module_list(args)
+    return model_cache_key(modules, parse_model_options(modules, args))
+
+
+def get_cached_model(modules, args, logger):
+    """
+    Return the model and DataPortal in model_cache if they were defined with
+    the same modules and model options as the current arguments, or (None,
+    None) otherwise. The cached model gets the options and logger for the
+    current run, so instances created from it will use those.
+    """
+    if not model_cache:
+        return (None, None)
+    options = parse_model_options(modules, args)
+    options.verbose = logger.isEnabledFor(logging.INFO)
+    try:
+        model, data = model_cache[model_cache_key(modules, options)]
+    except KeyError:
+        return (None, None)
+    model.options = options
+    model.logger = logger
+    logger.info(
+        "Reusing model defined for a previous scenario with arguments:\n"
+        + wrap(
+            ", ".join(k + "=" + repr(v) for k, v in vars(options).items() if v),
+            indent=4,
+        )
+    )
+    return (model, data)
+
+
 def add_extra_suffixes(model):
     """
     Add any suffix objects requested in the configuration options.
@@ -1054,6 +1348,15 @@ def add_extra_suffixes(model):
 
 
 def solve(model):
+    if (model.options.fast_writer or model.options.benders) and not hasattr(
+        model, "solver"
+    ):
+        # solved by switch_model.fast_writer or switch_model.benders instead of
+        # a Pyomo solver object
+        model.solver = None
+    elif model.options.persistent_solver and not hasattr(model, "solver"):
+        model.solver = get_persistent_solver(model)
+
     if not hasattr(model, "solver"):
         # Create a solver object the first time in. We don't do this until a solve is
         # requested, because sometimes a different solve function may be used,
@@ -1121,7 +1424,14 @@ def solve(model):
         model.logger.info("-" * 33 + " solver output " + "-" * 32)
 
     try:
-        results = model.solver_manager.solve(model, opt=model.solver, **solver_args)
+        if model.options.benders:
+            results = solve_benders(model)
+        elif model.options.fast_writer:
+            results = solve_fast_writer(model)
+        elif model.options.persistent_solver:
+            results = solve_persistent(model)
+        else:
+            results = model.solver_manager.solve(model, opt=model.solver, **solver_args)
     except ValueError as err:
         # show the solver status for obscure errors if possible
         model.logger.error("\n" + "=" * 80 + "\nError during solve:\n")
@@ -1228,6 +1538,161 @@ def solve(model):
     return results
 
 
+def get_persistent_solver(model):
+    """
+    Create a persistent solver object for this model, using Pyomo's APPSI
+    interface for the solver specified by --solver.
+    """
+    from pyomo.version import version_info
+
+    # APPSI was added in Pyomo 6.0, but its HiGHS interface and the update
+    # settings used below only arrived in 6.4.1
+    if version_info[:3] < (6, 4, 1):
+        raise ValueError(
+            "The --persistent-solver option requires Pyomo 6.4.1 or later; "
+            f"Pyomo {'.'.join(map(str, version_info[:3]))} is installed."
+        )
+    solver_name = model.options.solver
+    if not solver_name.startswith("appsi_"):
+        solver_name = "appsi_" + solver_name
+    solver = SolverFactory(solver_name)
+    if not solver.available(exception_flag=False):
+        raise ValueError(
+            rewrap(
+                f"""
+                Persistent solver {solver_name} is not available. Pyomo's APPSI
+                interface supports highs (install with 'pip install highspy'),
+                cbc, gurobi, cplex and ipopt as persistent solvers.
+                """
+            )
+        )
+    # Check for new or removed components on each solve, but don't
+    # re-examine the body of every existing constraint or named expression;
+    # modules report those changes via model.mark_changed().
+    config = solver.update_config
+    config.check_for_new_or_removed_constraints = True
+    config.check_for_new_or_removed_vars = True
+    config.check_for_new_or_removed_params = True
+    config.check_for_new_objective = True
+    config.update_constraints = False
+    config.update_vars = True
+    config.update_params = True
+    config.update_named_expressions = False
+    model.logger.info(f"Using persistent solver {solver_name}.")
+    return solver
+
+
+def solve_fast_writer(model):
+    """
+    Solve the model via switch_model.fast_writer and load the solution into
+    model.solutions, the same way as solver_manager.solve().
+    """
+    from switch_model.fast_writer import solve_fast
+
+    options = _options_string_to_dict(model.options.solver_options_string or "")
+    options["tee"] = model.options.tee
+    results = solve_fast(model, options)
+    if len(results.solution) > 0:
+        model.solutions.load_from(results)
+    return results
+
+
+def solve_benders(model):
+    """
+    Solve the model via switch_model.benders and load the solution into
+    model.solutions, the same way as solver_manager.solve().
+    """
+    from switch_model import benders
+
+    results = benders.solve_benders(model)
+    if len(results.solution) > 0:
+        model.solutions.load_from(results)
+    return results
+
+
+def solve_persistent(model):
+    """
+    Solve the model with the persistent solver in model.solver, first sending
+    any components that have been marked as changed via model.mark_changed()
+    since the last solve. Returns a standard Pyomo results object, and loads
+    the solution into model.solutions the same way as solver_manager.solve().
+    """
+    solver = model.solver
+    changed = getattr(model, "_changed_components", [])
+    model._changed_components = []
+    if hasattr(model, "_persistent_constraints"):
+        # model has already been sent to the solver; resend changed constraints
+        # (reconstructed components with new data objects would be caught
+        # anyway, but some may reuse the same ones).
+        # Constraints that have been deactivated or are new will be removed or
+        # added by the solver's own update.
+        sent = model._persistent_constraints
+        resend = []
+        for c in changed:
+            if c.ctype is Constraint:
+                resend.extend(cd for cd in c.values() if cd.active and cd in sent)
+            elif c.ctype is Objective:
+                solver.set_objective(c)
+        if resend:
+            solver.remove_constraints(resend)
+            solver.add_constraints(resend)
+        # named expressions may be used in any constraint, so check them all
+        # if any were changed
+        solver.update_config.update_named_expressions = any(
+            c.ctype is Expression for c in changed
+        )
+
+    # The APPSI legacy interface raises an error if asked for duals or reduced
+    # costs for a MIP, and doesn't load reduced costs correctly when returning
+    # results without loading them, so we turn off importing for these
+    # suffixes while solving and load reduced costs ourselves.
+    is_mip = model.has_discrete_variables()
+    suffixes = {}
+    for name in ["dual", "rc"]:
+        suffix = getattr(model, name, None)
+        if isinstance(suffix, Suffix) and suffix.import_enabled():
+            suffixes[name] = (suffix, get_suffix_direction(suffix))
+            if is_mip or name == "rc":
+                set_suffix_direction(suffix, Suffix.LOCAL)
+    try:
+        results = solver.solve(
+            model,
+            tee=model.options.tee,
+            load_solutions=False,
+            options=_options_string_to_dict(model.options.solver_options_string or ""),
+        )
+    finally:
+        for suffix, direction in suffixes.values():
+            set_suffix_direction(suffix, direction)
+    # remember which constraints the solver has now, so we can tell which
+    # changed ones need to be resent next time
+    model._persistent_constraints = ComponentSet(
+        model.component_data_objects(Constraint, active=True)
+    )
+
+    if len(results.solution) > 0:
+        # load into model.solutions, which is used by save_results()
+        model.solutions.load_from(results)
+        if "rc" in suffixes and not is_mip:
+            suffixes["rc"][0].update(solver.get_reduced_costs())
+    return results
+
+
+def get_suffix_direction(suffix):
+    # Pyomo 6.7 replaced Suffix.get_direction() with a direction property
+    if isinstance(getattr(Suffix, "direction", None), property):
+        return suffix.direction
+    else:
+        return suffix.get_direction()
+
+
+def set_suffix_direction(suffix, direction):
+    if isinstance(getattr(Suffix, "direction", None), property):
+        suffix.direction = direction
+    else:
+        suffix.set_direction(direction)
+
+
 instance_number = 0
 instance_number_lock = threading.Lock()
 
@@ -1327,21 +1792,148 @@ def _options_string_to_dict(istr):
     return ans
 
 
+# Files used to store solutions. The data file holds all the saved values as
+# one flat array of float64s. The manifest is a small JSON file that identifies
+# the section of the array holding the values for each component, in the
+# order of the component's index, and a hash of the index (to check that the
+# model matches when reloading).
+solution_manifest_file = "solution.json"
+solution_data_file = "solution.bin"
+solution_format_version = 1
+
+
+def index_hash(component):
+    return hashlib.sha1(repr(list(component.keys())).encode()).hexdigest()
+
+
 def save_results(instance, outdir):
     """
     Save model solution for later reuse.
 
-    Note that this pickles a solver results object because the instance itself
-    cannot be pickled -- see
-    https://stackoverflow.com/questions/39941520/pyomo-ipopt-does-not-return-solution
+    This saves the values of all variables and any imported suffixes (e.g.,
+    duals and reduced costs) for variables and active constraints. Missing
+    values are stored as NaN. See solution_manifest_file for the format.
+    """
+    import numpy as np
+
+    arrays = []
+    manifest = {
+        "version": solution_format_version,
+        "dtype": "<f8",
+        "data_file": solution_data_file,
+        "arrays": [],
+    }
+
+    def add_array(component, values, suffix=None):
+        if suffix is not None and all(v is None for v in values):
+            return
+        entry = {
+            "component": component.name,
+            "suffix": suffix,
+            "offset": sum(len(a) for a in arrays),
+            "length": len(values),
+            "index_hash": index_hash(component),
+        }
+        # note positions of any integer values (usually values assigned during
+        # model construction rather than by the solver), so they can be
+        # restored exactly
+        int_positions = [i for i, v in enumerate(values) if type(v) is int]
+        if int_positions:
+            entry["int_positions"] = int_positions
+        manifest["arrays"].append(entry)
+        arrays.append(np.array(values, dtype="<f8"))
+
+    for var in instance.component_objects(Var):
+        add_array(var, [v.value for v in var.values()])
+    for suffix in instance.component_objects(Suffix):
+        if not suffix.import_enabled():
+            continue
+        for component in instance.component_objects(Var):
+            add_array(
+                component, [suffix.get(v) for v in component.values()], suffix.name
+            )
+        for component in instance.component_objects(Constraint, active=True):
+            add_array(
+                component, [suffix.get(c) for c in component.values()], suffix.name
+            )
+
+    with open(os.path.join(outdir, solution_data_file), "wb") as fh:
+        for a in arrays:
+            a.tofile(fh)
+    with open(os.path.join(outdir, solution_manifest_file), "w") as fh:
+        json.dump(manifest, fh, indent=1)
+
+
+def read_solution(outdir, components=None):
+    """
+    Read a solution saved by save_results() from outdir. Returns a dict with
+    entries for each saved array, keyed by (component name, suffix name),
+    where suffix name is None for variable values. If components is
+    provided, only arrays for those component names are returned. Arrays are
+    read-only views into a memory-mapped copy of the data file, so only the
+    parts that are used are read from disk. Each entry is a tuple of (array,
+    index hash, list of positions that held int values).
+    """
+    import numpy as np
+
+    with open(os.path.join(outdir, solution_manifest_file)) as fh:
+        manifest = json.load(fh)
+    if manifest.get("version") != solution_format_version:
+        raise ValueError(
+            f"Solution in {outdir} was saved in an unsupported format "
+            f"(version {manifest.get('version')})."
+        )
+    data_file = os.path.join(outdir, manifest["data_file"])
+    if os.path.getsize(data_file) > 0:
+        data = np.memmap(data_file, dtype=manifest["dtype"], mode="r")
+    else:
+        # mmap can't map empty files
+        data = np.zeros(0, dtype=manifest["dtype"])
+    arrays = {}
+    for a in manifest["arrays"]:
+        if components is None or a["component"] in components:
+            arrays[a["component"], a["suffix"]] = (
+                data[a["offset"] : a["offset"] + a["length"]],
+                a["index_hash"],
+                a.get("int_positions", []),
+            )
+    return arrays
+
+
+def reload_prior_solution(instance, outdir):
     """
-    # First, save the full solution data to the results object, because recent
-    # versions of Pyomo only store execution metadata there by default.
-    instance.solutions.store_to(instance.last_results)
-    with open(os.path.join(outdir, "results.pickle"), "wb") as fh:
-        pickle.dump(instance.last_results, fh, protocol=-1)
-    # remove the solution from the results object, to minimize long-term memory use
-    instance.last_results.solution.clear()
+    Load variable values and suffix values saved by save_results() from
+    outdir into the instance. Values are assigned directly to the variable
+    and constraint data objects in index order; suffixes that are not defined
+    in the instance are skipped.
+    """
+    solution = read_solution(outdir)
+    for (name, suffix_name), (values, saved_hash, int_positions) in solution.items():
+        component = instance.component(name)
+        if component is None:
+            raise ValueError(
+                f"Saved solution includes {name}, which is not in the model."
+            )
+        if len(component) != len(values) or index_hash(component) != saved_hash:
+            raise ValueError(
+                f"Index of {name} does not match the saved solution; the "
+                "solution may have been created from different inputs or modules."
+            )
+        values = [None if v != v else v for v in values.tolist()]  # nan -> None
+        for i in int_positions:
+            values[i] = int(values[i])
+        if suffix_name is None:
+            for v, val in zip(component.values(), values):
+                if not v.fixed:
+                    v.set_value(val, skip_validation=True)
+        else:
+            suffix = instance.component(suffix_name)
+            if suffix is None:
+                continue
+            for c, val in zip(component.values(), values):
+                if val is not None:
+                    suffix[c] = val
+    return instance
 
 
 def query_yes_no(question, default="yes"):
@@ -20,7 +20,7 @@ scenarios_to_run() in separate processes to select the next job to run.
 
 from __future__ import print_function, absolute_import
 import sys, os, time
-import argparse, shlex, socket, io, glob, multiprocessing
+import argparse, shlex, socket, io, glob, multiprocessing, contextlib
 from collections import OrderedDict
 
 from .utilities import _ArgumentParser
@@ -49,6 +49,15 @@ parser.add_argument(
 parser.add_argument("--scenario-list", default="scenarios.txt")
 parser.add_argument("--scenario-queue", default="scenario_queue")
 parser.add_argument("--job-id", default=None)
+parser.add_argument(
+    "--jobs",
+    type=int,
+    default=1,
+    help="Number of scenarios to solve in parallel. Each parallel job takes "
+    "scenarios from the queue and solves them in a subprocess, which is kept "
+    "running to reuse the model and inputs from its previous scenario when the "
+    "next one uses the same modules and model options (default is 1).",
+)
 
 # import pdb; pdb.set_trace()
 # get a namespace object with successfully parsed scenario manager arguments
@@ -154,17 +163,26 @@ def main(args=None):
     except OSError:
         pass  # directory probably exists already
 
+    if scenario_manager_args.jobs > 1:
+        # start long-lived workers that each solve scenarios from the queue
+        workers = [
+            multiprocessing.Process(
+                target=run_worker, args=(job_id, i, scenario_manager_args.jobs)
+            )
+            for i in range(scenario_manager_args.jobs)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return
+
     # remove lock directories for any scenarios that were
     # previously being solved by this job but were interrupted
     unlock_running_scenarios()
 
     for (scenario_name, args) in scenarios_to_run():
-        logger.warn(  # not strictly a warning, but often nice to see in the log
-            "\n\n=======================================================================\n"
-            + "running scenario {s}\n".format(s=scenario_name)
-            + "arguments: {}\n".format(args)
-            + "=======================================================================\n"
-        )
+        report_scenario(scenario_name, args)
 
         # call the standard solve module with the arguments for this particular scenario
         # We run this in its own process to avoid sharing module state info between
@@ -184,11 +202,100 @@ def main(args=None):
 
         mark_completed(scenario_name)
 
+
+def report_scenario(scenario_name, args):
+    logger.warn(  # not strictly a warning, but often nice to see in the log
+        "\n\n=======================================================================\n"
+        + "running scenario {s}\n".format(s=scenario_name)
+        + "arguments: {}\n".format(args)
+        + "=======================================================================\n"
+    )
+
+
+def run_worker(base_job_id, worker_number, n_workers):
+    """
+    Solve scenarios one after another for one of the --jobs workers. Each
+    worker has its own job id, so it only requeues scenarios that it was
+    running itself when interrupted. Scenarios are solved in a subprocess, as
+    usual, but the subprocess is kept running for the next scenario if that
+    uses the same modules and model options (see solve.get_model_cache_key()),
+    so it can reuse the model and input data from the previous scenario (see
+    solve.model_cache). Otherwise the subprocess is stopped and a fresh one is
+    started, so module state never carries over to a different kind of model.
+    """
+    global job_id, running_scenarios_file, requested_scenarios
+    job_id = "{}_{}".format(base_job_id, worker_number)
+    running_scenarios_file = os.path.join(scenario_queue_dir, job_id + "_running.txt")
+    # split explicitly requested scenarios among the workers (these don't
+    # go through the queue)
+    requested_scenarios = requested_scenarios[worker_number::n_workers]
+    if scenario_manager_args.scenarios and not requested_scenarios:
+        return
+
+    unlock_running_scenarios()
+
+    process, connection, process_key = None, None, None
+    for (scenario_name, args) in scenarios_to_run():
+        report_scenario(scenario_name, args)
+        try:
+            # bad arguments will be reported when the scenario is solved
+            with contextlib.redirect_stderr(io.StringIO()):
+                key = solve.get_model_cache_key(args)
+        except (Exception, SystemExit):
+            key = None
+        if process is not None and (key is None or key != process_key):
+            stop_scenario_server(process, connection)
+            process = None
+        if process is None:
+            connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_scenario_server, args=(child_connection,)
+            )
+            process.start()
+            process_key = key
+        connection.send(args)
+        try:
+            connection.recv()  # wait until the scenario is finished
+        except EOFError:
+            # subprocess crashed
+            process.join()
+            process = None
+        mark_completed(scenario_name)
+    if process is not None:
+        stop_scenario_server(process, connection)
+
+
+def run_scenario_server(connection):
+    """
+    Solve scenarios whose arguments are received from the connection until
+    None is received, keeping solved models in solve.model_cache to reuse for
+    the next scenario (used by run_worker()).
+    """
+    # reactivate stdin in subprocess (see run_scenario())
+    sys.stdin = os.fdopen(0)
+    solve.model_cache = {}
+    while True:
+        args = connection.recv()
+        if args is None:
+            break
+        solve_scenario(args)
+        connection.send(True)
+
+
+def stop_scenario_server(process, connection):
+    connection.send(None)
+    process.join()
+
+
 def run_scenario(args):
     # reactivate stdin in subprocess
     # from https://stackoverflow.com/questions/30134297/python-multiprocessing-stdin-input
     # also see refs to stdin in https://docs.python.org/3/library/multiprocessing.html
     sys.stdin = os.fdopen(0)
+    solve_scenario(args)
+
+
+def solve_scenario(args):
     try:
         solve.main(args)
     except:
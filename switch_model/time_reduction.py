@@ -0,0 +1,312 @@
+# Copyright (c) 2015-2022 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2.0, which is in the LICENSE file.
+
+"""
+Select representative timeseries (e.g., sample days) from a full set of
+inputs, to reduce the size of capacity-expansion models.
+
+This is run as `switch reduce-time` before solving. It reads the timeseries
+in an inputs directory, clusters them based on their load and variable
+capacity factor profiles, and writes a new inputs directory that contains
+only one representative timeseries from each cluster. ts_scale_to_period for
+each representative is set to the total weight of the timeseries in its
+cluster, so each period still has the same number of hours (as required by
+timescales.validate_time_weights). All other tables indexed by timepoint or
+timeseries are filtered to match, and other files are copied unchanged.
+
+Timeseries are only clustered with others in the same period that have the
+same number and duration of timepoints. Each timeseries is described by its
+loads (loads.csv) and variable capacity factors (variable_capacity_factors.csv)
+at each timepoint, with each zone or project scaled by its largest absolute
+value. Clustering uses k-medoids or k-means; in the latter case, the
+timeseries closest to each cluster's center is used as its representative.
+
+The approximation error for each period is reported and saved in
+time_reduction_summary.csv in the new inputs directory.
+"""
+
+import argparse, os, shutil
+
+import numpy as np
+import pandas as pd
+
+# columns that identify the timepoint or timeseries in other input tables
+timepoint_columns = {"timepoint", "timepoints"}
+timeseries_columns = {"timeseries"}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Create an inputs directory with representative timeseries."
+    )
+    add_parser_args(parser)
+    args = parser.parse_args(args)
+    if not os.path.isdir(args.inputs_dir):
+        print("Error: Input directory {} does not exist.".format(args.inputs_dir))
+        return -1
+    reduce_time(
+        args.inputs_dir,
+        args.reduced_inputs_dir,
+        args.num_timeseries,
+        method=args.method,
+        seed=args.seed,
+    )
+
+
+def add_parser_args(parser):
+    parser.add_argument(
+        "--inputs-dir",
+        default="inputs",
+        help='Directory with the full set of inputs (default is "inputs").',
+    )
+    parser.add_argument(
+        "--reduced-inputs-dir",
+        required=True,
+        help="Directory to create with the reduced set of inputs.",
+    )
+    parser.add_argument(
+        "--num-timeseries",
+        type=int,
+        default=12,
+        help="Number of representative timeseries to select for each period "
+        "(and each combination of timeseries length and timepoint duration). "
+        "Default is 12.",
+    )
+    parser.add_argument(
+        "--method",
+        choices=["kmedoids", "kmeans"],
+        default="kmedoids",
+        help="Clustering method (default is kmedoids).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for the random choice of initial cluster centers.",
+    )
+
+
+def read_csv(path):
+    # read everything as text, so the files can be written back unchanged
+    return pd.read_csv(path, dtype=str, na_filter=False)
+
+
+def timeseries_profiles(inputs_dir, timepoints):
+    """
+    Return an array with one row per timepoint (in the same order as
+    timepoints) and one column per load zone or variable generator,
+    scaled so the largest absolute value in each column is 1.
+    """
+    tables = []
+    for file, columns in [
+        ("loads.csv", ["LOAD_ZONE", "TIMEPOINT", "zone_demand_mw"]),
+        (
+            "variable_capacity_factors.csv",
+            ["GENERATION_PROJECT", "timepoint", "gen_max_capacity_factor"],
+        ),
+    ]:
+        path = os.path.join(inputs_dir, file)
+        if os.path.exists(path):
+            df = pd.read_csv(path, usecols=columns, dtype={columns[1]: str})
+            tables.append(
+                df.pivot_table(
+                    index=columns[1], columns=columns[0], values=columns[2]
+                ).add_prefix(file + ":")
+            )
+    if not tables:
+        raise ValueError(
+            f"No loads.csv or variable_capacity_factors.csv found in {inputs_dir}; "
+            "unable to compare timeseries."
+        )
+    profiles = pd.concat(tables, axis=1).reindex(timepoints).fillna(0.0)
+    scale = profiles.abs().max()
+    scale[scale == 0] = 1.0
+    return (profiles / scale).to_numpy(dtype=float)
+
+
+def kmeans_plus_plus(features, k, rng):
+    """Choose k initial centers (row numbers) spread out across the features."""
+    centers = [rng.integers(len(features))]
+    dist = ((features - features[centers[0]]) ** 2).sum(axis=1)
+    while len(centers) < k:
+        if dist.sum() == 0:
+            # all remaining points duplicate existing centers
+            centers.append(next(i for i in range(len(features)) if i not in centers))
+        else:
+            centers.append(rng.choice(len(features), p=dist / dist.sum()))
+        dist = np.minimum(dist, ((features - features[centers[-1]]) ** 2).sum(axis=1))
+    return centers
+
+
+def squared_distances(a, b):
+    """
+    Return an array with the squared Euclidean distance between each row of a
+    and each row of b. This uses |a|^2 + |b|^2 - 2 a.b, so memory use is
+    proportional to the number of pairs rather than pairs times features.
+    """
+    dist = (a**2).sum(axis=1)[:, None] + (b**2).sum(axis=1)[None, :] - 2 * a @ b.T
+    # clip small negative values due to rounding
+    return np.maximum(dist, 0.0)
+
+
+def cluster(features, weights, k, method="kmedoids", seed=0, max_iter=100):
+    """
+    Cluster the rows of features into k groups, counting each row with the
+    specified weight. Returns (assignment, representatives), where
+    assignment gives the cluster number for each row and representatives
+    gives the row number chosen to represent each cluster.
+    """
+    n = len(features)
+    if k >= n:
+        return np.arange(n), np.arange(n)
+    rng = np.random.default_rng(seed)
+    reps = np.array(kmeans_plus_plus(features, k, rng))
+    centers = features[reps]
+    for _ in range(max_iter):
+        # squared distance from every row to every center
+        dist = squared_distances(features, centers)
+        assignment = dist.argmin(axis=1)
+        new_centers = centers.copy()
+        for c in range(k):
+            members = np.flatnonzero(assignment == c)
+            if not len(members):
+                continue
+            if method == "kmeans":
+                new_centers[c] = np.average(
+                    features[members], axis=0, weights=weights[members]
+                )
+            else:
+                # medoid: member with the lowest weighted distance to the others
+                d = squared_distances(features[members], features[members])
+                new_centers[c] = features[members[(d @ weights[members]).argmin()]]
+        if np.array_equal(new_centers, centers):
+            break
+        centers = new_centers
+
+    dist = squared_distances(features, centers)
+    assignment = dist.argmin(axis=1)
+    # use the member closest to each center as its representative (for
+    # k-medoids, this is the medoid itself); drop any empty clusters
+    reps = []
+    for c in range(k):
+        members = np.flatnonzero(assignment == c)
+        if len(members):
+            reps.append(members[dist[members, c].argmin()])
+    reps = np.array(reps)
+    # reassign each row to the nearest representative
+    dist = squared_distances(features, features[reps])
+    return dist.argmin(axis=1), reps
+
+
+def reduce_time(
+    inputs_dir, reduced_inputs_dir, num_timeseries, method="kmedoids", seed=0
+):
+    timeseries = read_csv(os.path.join(inputs_dir, "timeseries.csv"))
+    timepoints = read_csv(os.path.join(inputs_dir, "timepoints.csv"))
+    ts_tps = timepoints.groupby("timeseries", sort=False)["timepoint_id"].apply(list)
+
+    all_tps = timepoints["timepoint_id"].tolist()
+    tp_row = {tp: i for i, tp in enumerate(all_tps)}
+    profiles = timeseries_profiles(inputs_dir, all_tps)
+
+    new_scale = {}  # representative timeseries -> new ts_scale_to_period
+    summary = []
+    groups = timeseries.groupby(
+        ["ts_period", "ts_duration_of_tp", "ts_num_tps"], sort=False
+    )
+    for (period, duration, num_tps), group in groups:
+        names = group["TIMESERIES"].tolist()
+        weights = group["ts_scale_to_period"].astype(float).to_numpy()
+        features = np.array(
+            [profiles[[tp_row[tp] for tp in ts_tps[ts]]].ravel() for ts in names]
+        )
+        assignment, reps = cluster(
+            features, weights, num_timeseries, method=method, seed=seed
+        )
+        for r, rep in enumerate(reps):
+            new_scale[names[rep]] = weights[assignment == r].sum()
+
+        # approximation error: distance between each timeseries and its
+        # representative, and error in weighted average of each profile
+        approx = features[reps[assignment]]
+        rmse = np.sqrt(
+            np.average(((features - approx) ** 2).mean(axis=1), weights=weights)
+        )
+        mean_full = np.average(features, axis=0, weights=weights)
+        mean_approx = np.average(approx, axis=0, weights=weights)
+        summary.append(
+            {
+                "period": period,
+                "ts_duration_of_tp": duration,
+                "ts_num_tps": num_tps,
+                "timeseries": len(names),
+                "representative_timeseries": len(reps),
+                "rmse": rmse,
+                "max_mean_error": np.abs(mean_full - mean_approx).max(),
+            }
+        )
+
+    timeseries = timeseries[timeseries["TIMESERIES"].isin(new_scale)].copy()
+    timeseries["ts_scale_to_period"] = [
+        repr(float(new_scale[ts])) for ts in timeseries["TIMESERIES"]
+    ]
+    timepoints = timepoints[timepoints["timeseries"].isin(new_scale)]
+    write_filtered_inputs(inputs_dir, reduced_inputs_dir, timeseries, timepoints)
+
+    summary = pd.DataFrame(summary)
+    summary.to_csv(
+        os.path.join(reduced_inputs_dir, "time_reduction_summary.csv"), index=False
+    )
+    print(
+        f"Selected {len(new_scale)} of {len(ts_tps)} timeseries; saved inputs in "
+        f"{reduced_inputs_dir}.\n"
+        "Approximation error in scaled load and capacity factor profiles "
+        "(rmse: weighted root-mean-square difference between each timeseries "
+        "and its representative; max_mean_error: largest error in the "
+        "weighted average of any profile):"
+    )
+    print(summary.to_string(index=False))
+
+
+def write_filtered_inputs(inputs_dir, new_inputs_dir, timeseries, timepoints):
+    """
+    Copy inputs_dir to new_inputs_dir, using the specified timeseries and
+    timepoints tables (pandas DataFrames) and keeping only the rows of other
+    tables that refer to these timeseries or timepoints.
+    """
+    # copy everything except the input cache, then rewrite the time-indexed files
+    if os.path.exists(new_inputs_dir):
+        raise ValueError(
+            f"{new_inputs_dir} already exists; please remove it or choose "
+            "a different directory."
+        )
+    shutil.copytree(inputs_dir, new_inputs_dir)
+    write_csv(timeseries, os.path.join(new_inputs_dir, "timeseries.csv"))
+    write_csv(timepoints, os.path.join(new_inputs_dir, "timepoints.csv"))
+
+    kept_tps = set(timepoints["timepoint_id"])
+    kept_ts = set(timeseries["TIMESERIES"])
+    for file in sorted(os.listdir(new_inputs_dir)):
+        if not file.endswith(".csv") or file in {"timeseries.csv", "timepoints.csv"}:
+            continue
+        path = os.path.join(new_inputs_dir, file)
+        with open(path) as f:
+            header = f.readline().strip().split(",")
+        for col in header:
+            if col.lower() in timepoint_columns:
+                keep = kept_tps
+            elif col.lower() in timeseries_columns:
+                keep = kept_ts
+            else:
+                continue
+            df = read_csv(path)
+            write_csv(df[df[col].isin(keep)], path)
+            break
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False, lineterminator="\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# Copyright (c) 2015-2022 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2.0, which is in the LICENSE file.
+
+"""
+Defines a zonal DC power flow model for transmission dispatch, as an
+alternative to switch_model.transmission.transport.dispatch. Transmission
+lines and capacity are defined by switch_model.transmission.transport.build.
+
+Flows on all lines are determined by the net injection into the network at
+each load zone, via power transfer distribution factors (PTDFs), which are
+calculated once from the line reactances when the model is built. Line
+flow limits are added as needed rather than for every line and timepoint:
+the model is first solved with no flow limits, then limits are added for all
+lines and timepoints where the flow exceeded the available capacity, and the
+model is solved again, until no limits are violated. For this to happen,
+this module must be listed in iterate.txt (or the file given by
+--iterate-list) as well as modules.txt. If the model is solved with a
+persistent solver (--persistent-solver), each solve starts from the previous
+solution.
+
+The DC power flow is lossless, so trans_efficiency is ignored, and the PTDFs
+are calculated for the full set of lines in transmission_lines.csv, whether
+or not they have any capacity. Lines with no capacity will be held to zero
+flow, which constrains flows on parallel paths; lines that should not be
+part of the network should be omitted from the inputs.
+"""
+
+import os
+import numpy as np
+from pyomo.environ import *
+from switch_model.reporting import write_table
+
+dependencies = (
+    "switch_model.timescales",
+    "switch_model.balancing.load_zones",
+    "switch_model.financials",
+    "switch_model.transmission.transport.build",
+)
+
+
+def define_arguments(argparser):
+    group = argparser.add_argument_group(__name__)
+    group.add_argument(
+        "--dc-flow-tolerance",
+        type=float,
+        default=1e-3,
+        help=(
+            "Amount (MW) by which flows may exceed line capacity before a "
+            "flow limit is added for that line and timepoint (default is 0.001)."
+        ),
+    )
+
+
+def define_components(mod):
+    """
+    trans_reactance[tx in TRANSMISSION_LINES] is the reactance of each
+    transmission line, in any consistent units (only the relative values
+    matter). This optional parameter defaults to trans_length_km.
+
+    TXPowerNet[z in LOAD_ZONES, t in TIMEPOINTS] is a decision variable for
+    the net power received by each load zone from the transmission network
+    (negative if the zone sends power into the network). This is added to
+    the Zone_Power_Injections list.
+
+    TX_ISLANDS is a set of groups of load zones connected by transmission
+    lines, and ZONES_IN_TX_ISLAND[i in TX_ISLANDS] shows the zones in each
+    one. Each island is named for its first load zone. Tx_Island_Balance[i
+    in TX_ISLANDS, t in TIMEPOINTS] requires that TXPowerNet sums to zero
+    across each island.
+
+    DC_FLOW_LIMITS is a set of (tx, t, direction) tuples for which the flow
+    on line tx in timepoint t is limited to the available capacity in the
+    specified direction (1 for flow from trans_lz1 to trans_lz2, -1 for the
+    reverse). This set is initially empty; elements are added by
+    post_iterate() when flows exceed the available capacity.
+    Enforce_DC_Flow_Limit[(tx, t, direction) in DC_FLOW_LIMITS] is the
+    constraint that enforces each of these limits.
+    """
+    mod.trans_reactance = Param(
+        mod.TRANSMISSION_LINES,
+        within=PositiveReals,
+        default=lambda m, tx: m.trans_length_km[tx],
+    )
+    mod.TXPowerNet = Var(mod.LOAD_ZONES, mod.TIMEPOINTS, within=Reals)
+    # Register net transmission as contributing to zonal energy balance
+    mod.Zone_Power_Injections.append("TXPowerNet")
+
+    mod.TX_ISLANDS = Set(dimen=1, initialize=lambda m: list(dc_network(m).island_zones))
+    mod.ZONES_IN_TX_ISLAND = Set(
+        mod.TX_ISLANDS,
+        dimen=1,
+        initialize=lambda m, i: dc_network(m).island_zones[i],
+    )
+    mod.Tx_Island_Balance = Constraint(
+        mod.TX_ISLANDS,
+        mod.TIMEPOINTS,
+        rule=lambda m, i, t: (
+            sum(m.TXPowerNet[z, t] for z in m.ZONES_IN_TX_ISLAND[i]) == 0
+        ),
+    )
+
+    mod.DC_FLOW_LIMITS = Set(dimen=3, initialize=[])
+    mod.Enforce_DC_Flow_Limit = Constraint(mod.DC_FLOW_LIMITS, rule=dc_flow_limit_rule)
+
+
+def dc_flow_limit_rule(m, tx, t, direction):
+    return (
+        direction * dc_flow_expr(m, tx, t)
+        <= m.TxCapacityNameplateAvailable[tx, m.tp_period[t]]
+    )
+
+
+def dc_flow_expr(m, tx, t):
+    """Return an expression for the flow on line tx in timepoint t."""
+    net = dc_network(m)
+    row = net.ptdf[net.line_index[tx]]
+    # injection into the network is the negative of TXPowerNet
+    return -sum(
+        row[i] * m.TXPowerNet[z, t] for i, z in enumerate(net.zones) if row[i] != 0
+    )
+
+
+class DCNetwork(object):
+    """
+    Power transfer distribution factors for the transmission network.
+    ptdf[l, z] is the flow on line l (from trans_lz1 to trans_lz2) per MW
+    injected at zone z and withdrawn at the first zone in the same island.
+    Since net injections sum to zero within each island, ptdf @ injections
+    gives the flows regardless of which zone is used as the reference.
+    """
+
+    def __init__(self, m):
+        self.zones = list(m.LOAD_ZONES)
+        self.lines = list(m.TRANSMISSION_LINES)
+        self.line_index = {tx: l for l, tx in enumerate(self.lines)}
+        zone_index = {z: i for i, z in enumerate(self.zones)}
+        # line-zone incidence matrix, weighted by susceptance
+        incidence = np.zeros((len(self.lines), len(self.zones)))
+        for l, tx in enumerate(self.lines):
+            incidence[l, zone_index[m.trans_lz1[tx]]] = 1
+            incidence[l, zone_index[m.trans_lz2[tx]]] = -1
+        susceptance = np.array([1 / m.trans_reactance[tx] for tx in self.lines])
+        weighted = susceptance[:, None] * incidence
+        b_bus = incidence.T @ weighted
+
+        # find groups of connected zones, labeling each zone with the lowest
+        # zone number in its group
+        label = np.arange(len(self.zones))
+        changed = True
+        while changed:
+            changed = False
+            for tx in self.lines:
+                i, j = zone_index[m.trans_lz1[tx]], zone_index[m.trans_lz2[tx]]
+                if label[i] != label[j]:
+                    label[i] = label[j] = min(label[i], label[j])
+                    changed = True
+        self.island_zones = {}
+        for i, z in enumerate(self.zones):
+            self.island_zones.setdefault(self.zones[label[i]], []).append(z)
+
+        self.ptdf = np.zeros((len(self.lines), len(self.zones)))
+        for island, zones in self.island_zones.items():
+            others = [zone_index[z] for z in zones[1:]]
+            if others:
+                self.ptdf[:, others] = weighted[:, others] @ np.linalg.inv(
+                    b_bus[np.ix_(others, others)]
+                )
+
+    def flows(self, m):
+        """
+        Return an array of flows on each line (rows) in each timepoint
+        (columns), based on the current values of TXPowerNet.
+        """
+        net_power = np.array(
+            [
+                [m.TXPowerNet[z, t].value or 0.0 for t in m.TIMEPOINTS]
+                for z in self.zones
+            ]
+        )
+        return -self.ptdf @ net_power
+
+
+def dc_network(m):
+    """
+    Return the DCNetwork object for model instance m, creating it the first
+    time this is called.
+    """
+    try:
+        return m._dc_network
+    except AttributeError:
+        m._dc_network = DCNetwork(m)
+        return m._dc_network
+
+
+def line_capacity(m):
+    """Return an array of available capacity on each line in each timepoint."""
+    net = dc_network(m)
+    return np.array(
+        [
+            [
+                value(m.TxCapacityNameplateAvailable[tx, m.tp_period[t]])
+                for t in m.TIMEPOINTS
+            ]
+            for tx in net.lines
+        ]
+    )
+
+
+def pre_solve(m):
+    if not any(__name__ in level for level in m.iterate_modules):
+        m.logger.warning(
+            f"WARNING: {__name__} is not in the iteration list (e.g., "
+            "iterate.txt), so no transmission flow limits will be enforced."
+        )
+
+
+def post_iterate(m):
+    """
+    Add flow limits for all lines and timepoints where the flow exceeds the
+    available capacity. Returns True (converged) if there are none.
+    """
+    net = dc_network(m)
+    flows = net.flows(m)
+    capacity = line_capacity(m)
+    excess = np.abs(flows) - capacity
+    violated = np.argwhere(excess > m.options.dc_flow_tolerance)
+    timepoints = list(m.TIMEPOINTS)
+    for l, t in violated.tolist():
+        index = (net.lines[l], timepoints[t], 1 if flows[l, t] > 0 else -1)
+        m.DC_FLOW_LIMITS.add(index)
+        m.Enforce_DC_Flow_Limit.add(index, dc_flow_limit_rule(m, *index))
+    m.logger.info(
+        f"Added {len(violated)} transmission flow limits ({len(m.DC_FLOW_LIMITS)} "
+        f"total); largest excess flow was {max(excess.max(initial=0), 0):.4g} MW."
+    )
+    return len(violated) == 0
+
+
+def post_solve(m, outdir):
+    """
+    Save flows on each line in each timepoint to dc_flow.csv.
+    """
+    net = dc_network(m)
+    flows = net.flows(m)
+    capacity = line_capacity(m)
+    tp_index = {t: i for i, t in enumerate(m.TIMEPOINTS)}
+    write_table(
+        m,
+        m.TRANSMISSION_LINES,
+        m.TIMEPOINTS,
+        output_file=os.path.join(outdir, "dc_flow.csv"),
+        headings=(
+            "TRANSMISSION_LINE",
+            "timepoint",
+            "trans_lz1",
+            "trans_lz2",
+            "flow_mw",
+            "available_capacity_mw",
+            "limit_enforced",
+        ),
+        values=lambda m, tx, t: (
+            tx,
+            t,
+            m.trans_lz1[tx],
+            m.trans_lz2[tx],
+            flows[net.line_index[tx], tp_index[t]],
+            capacity[net.line_index[tx], tp_index[t]],
+            int((tx, t, 1) in m.DC_FLOW_LIMITS or (tx, t, -1) in m.DC_FLOW_LIMITS),
+        ),
+    )
+
+
+def load_inputs(mod, switch_data, inputs_dir):
+    """
+    Import line reactances. The following file is optional.
+
+    transmission_lines.csv
+        TRANSMISSION_LINE, trans_reactance
+    """
+    switch_data.load_aug(
+        filename=os.path.join(inputs_dir, "transmission_lines.csv"),
+        optional_params=["trans_reactance"],
+        param=(mod.trans_reactance,),
+    )
@@ -15,6 +15,7 @@ import os
 
 import pandas as pd
 from pyomo.environ import *
+from switch_model.reporting import record_data_frame
 
 dependencies = (
     "switch_model.timescales",
@@ -273,6 +274,7 @@ def post_solve(instance, outdir):
     if instance.options.sorted_output:
         wide_df.sort_index(inplace=True)
     wide_df.to_csv(os.path.join(outdir, "local_td_energy_balance_wide.csv"))
+    record_data_frame(instance, "local_td_energy_balance_wide", wide_df)
 
     normalized_dat = []
     for z, t in instance.ZONE_TIMEPOINTS:
@@ -299,3 +301,4 @@ def post_solve(instance, outdir):
     if instance.options.sorted_output:
         df.sort_index(inplace=True)
     df.to_csv(os.path.join(outdir, "local_td_energy_balance.csv"))
+    record_data_frame(instance, "local_td_energy_balance", df)
@@ -12,6 +12,7 @@ import pandas as pd
 from pyomo.environ import *
 
 from switch_model.financials import capital_recovery_factor as crf
+from switch_model.reporting import record_data_frame
 from switch_model.utilities import unique_list
 
 dependencies = (
@@ -365,3 +366,4 @@ def post_solve(instance, outdir):
     if instance.options.sorted_output:
         tx_build_df.sort_index(inplace=True)
     tx_build_df.to_csv(os.path.join(outdir, "transmission.csv"))
+    record_data_frame(instance, "transmission", tx_build_df)
@@ -7,8 +7,13 @@ Utility functions for Switch.
 from __future__ import print_function, division
 
 import argparse
+import concurrent.futures
+import csv
 import datetime
+import hashlib
 import importlib
+import itertools
+import multiprocessing
 import os
 import re
 import sys
@@ -16,10 +21,14 @@ import logging
 import time
 import types
 import textwrap
+import tracemalloc
 
 from pyomo.environ import *
+from pyomo.core.base.expression import IndexedExpression
 import pyomo.opt, pyomo.version
 
+from switch_model.version import __version__ as switch_model_version
+
 try:
     # sentinel for no value (at least for Param.default()) in newer versions of Pyomo
     NoValue = Param.NoValue
@@ -147,16 +156,20 @@ class SwitchAbstractModel(AbstractModel):
             self.logger.info("\nIteration modules:" + wrap(str(self.iterate_modules)))
         self.logger.info("=" * 80 + "\n")
 
-        # Define model components
-        for module in self.get_modules():
-            if hasattr(module, "define_dynamic_lists"):
-                module.define_dynamic_lists(self)
-        for module in self.get_modules():
-            if hasattr(module, "define_components"):
-                module.define_components(self)
-        for module in self.get_modules():
-            if hasattr(module, "define_dynamic_components"):
-                module.define_dynamic_components(self)
+        # Define model components, noting which module defined each one
+        self.component_modules = {}
+        for method in [
+            "define_dynamic_lists",
+            "define_components",
+            "define_dynamic_components",
+        ]:
+            for module in self.get_modules():
+                if hasattr(module, method):
+                    existing = set(self.component_map())
+                    getattr(module, method)(self)
+                    for name in self.component_map():
+                        if name not in existing:
+                            self.component_modules[name] = module.__name__
 
     def get_modules(self):
         """Return a list of loaded module objects for this model."""
@@ -197,9 +210,15 @@ class SwitchAbstractModel(AbstractModel):
     def _initialize_component(self, *args, **kwargs):
         """
         This method is called to initialize each Pyomo component; we hook onto
-        it to report construction progress
+        it to report construction progress and optionally profile construction
+        of each component
         """
-        AbstractModel._initialize_component(self, *args, **kwargs)
+        if getattr(self.options, "estimate", False):
+            self.initialize_component_for_estimate(*args, **kwargs)
+        elif getattr(self.options, "profile_construction", None) is None:
+            AbstractModel._initialize_component(self, *args, **kwargs)
+        else:
+            self.profile_component_construction(*args, **kwargs)
 
         try:
             self.__n_components_constructed = self.__n_components_constructed + 1
@@ -221,31 +240,237 @@ class SwitchAbstractModel(AbstractModel):
             )
             self.__next_report_components_construction = next_report + 0.1
 
-    def load_inputs(self, inputs_dir=None, attach_data_portal=True):
+    def profile_component_construction(self, *args, **kwargs):
+        """
+        Construct a component via the standard Pyomo method and record the
+        time, memory and number of elements used for it in
+        self.construction_profile.
+        """
+        # the name of the component is the third argument (after the data
+        # portal and namespaces)
+        name = args[2] if len(args) > 2 else kwargs["component_name"]
+        mem_start = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        AbstractModel._initialize_component(self, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+        mem_end, mem_peak = tracemalloc.get_traced_memory()
+        component = self.component(name)
+        if component.ctype in (BuildAction, BuildCheck):
+            n_elements = None
+        else:
+            n_elements = len(component)
+        self.construction_profile.append(
+            {
+                "component": name,
+                "type": component.ctype.__name__,
+                "module": getattr(self, "component_modules", {}).get(name, ""),
+                "elements": n_elements,
+                "time_s": round(elapsed, 6),
+                "memory_mb": round((mem_end - mem_start) / 2**20, 4),
+                "peak_memory_mb": round((mem_peak - mem_start) / 2**20, 4),
+            }
+        )
+
+    def initialize_component_for_estimate(self, *args, **kwargs):
+        """
+        Prepare a component for report_size_estimate() without constructing
+        its elements. Sets, parameters and build actions are constructed
+        normally, since they are needed to find the size of everything else.
+        Elements of indexed variables and expressions are created when they are
+        first used, and constraints and objectives are not constructed at all.
+        """
+        name = args[2] if len(args) > 2 else kwargs["component_name"]
+        component = self.component(name)
+        if component.ctype in (Constraint, Objective):
+            return
+        if component.ctype is Expression and component.is_indexed():
+            # elements will be created from the rule when they are used
+            component._constructed = True
+            return
+        if component.ctype is Var:
+            component._dense = False
+        existing = set(self.component_map())
+        AbstractModel._initialize_component(self, *args, **kwargs)
+        # credit any components added by build actions to the same module
+        for new_name in set(self.component_map()) - existing:
+            self.component_modules[new_name] = self.component_modules.get(name, "")
+
+    def report_size_estimate(self, instance):
+        """
+        Estimate the number of variables, constraints, nonzeros and memory
+        needed for each component of instance (created with --estimate), save
+        them to model_size_estimate.csv in the outputs directory and report
+        the totals for each module.
+        """
+        estimate = []
+        for component in instance.component_objects(
+            (Var, Constraint, Expression, Set, Param)
+        ):
+            if isinstance(component, ReportExpression):
+                # only constructed if used by another component
+                continue
+            try:
+                elements, terms = estimate_component_size(component)
+            except Exception as e:
+                self.logger.warning(
+                    f"Unable to sample elements of {component.name} for size "
+                    f"estimate ({type(e).__name__}: {e}); counting all indices."
+                )
+                elements = len(component.index_set()) if component.is_indexed() else 1
+                terms = None
+            estimate.append(
+                {
+                    "component": component.name,
+                    "type": component.ctype.__name__,
+                    "module": instance.component_modules.get(component.name, ""),
+                    "elements": elements,
+                    "nonzeros": terms,
+                    "memory_mb": round(
+                        (
+                            elements * estimate_bytes_per_element[component.ctype]
+                            + (terms or 0) * estimate_bytes_per_term
+                        )
+                        / 2**20,
+                        4,
+                    ),
+                }
+            )
+
+        if not estimate:
+            # use warning level so this is shown by default when requested
+            self.logger.warning(
+                "Nothing to estimate: the model has no variables, constraints, "
+                "expressions, sets or parameters. Check the module list for "
+                "this model (e.g., modules.txt)."
+            )
+            return estimate
+
+        os.makedirs(self.options.outputs_dir, exist_ok=True)
+        output_file = os.path.join(self.options.outputs_dir, "model_size_estimate.csv")
+        with open(output_file, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(estimate[0]), lineterminator="\n")
+            w.writeheader()
+            w.writerows(estimate)
+
+        totals = {r["module"]: [0, 0, 0, 0.0] for r in estimate}
+        totals["total"] = [0, 0, 0, 0.0]
+        for r in estimate:
+            for module in [r["module"], "total"]:
+                t = totals[module]
+                if r["type"] == "Var":
+                    t[0] += r["elements"]
+                elif r["type"] == "Constraint":
+                    t[1] += r["elements"]
+                    t[2] += r["nonzeros"] or 0
+                t[3] += r["memory_mb"]
+        # use warning level so this is shown by default when requested
+        self.logger.warning(
+            "\nEstimated model size by module (memory is for the Pyomo model; "
+            "the solver will need more):\n"
+            f"{'variables':>12} {'constraints':>12} {'nonzeros':>12} "
+            f"{'memory':>11}  module\n"
+            + "\n".join(
+                f"{v:12,d} {c:12,d} {nz:12,d} {mb:8,.1f} MB  {module}"
+                for module, (v, c, nz, mb) in totals.items()
+            )
+        )
+        self.logger.info(f"Saved model size estimate to {output_file}.")
+        return estimate
+
+    def report_construction_profile(self, instance):
+        """
+        Save the construction profile for instance to construction_profile.csv
+        in the outputs directory and log the components that took the most
+        time and memory.
+        """
+        profile = instance.construction_profile
+        os.makedirs(self.options.outputs_dir, exist_ok=True)
+        output_file = os.path.join(self.options.outputs_dir, "construction_profile.csv")
+        with open(output_file, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(profile[0]), lineterminator="\n")
+            w.writeheader()
+            w.writerows(profile)
+
+        n = self.options.profile_construction
+        for key, label in [("time_s", "time"), ("memory_mb", "memory")]:
+            top = sorted(profile, key=lambda r: r[key], reverse=True)[:n]
+            # use warning level so this is shown by default when requested
+            self.logger.warning(
+                f"\nComponents using the most construction {label}:\n"
+                + "\n".join(
+                    f"{r['time_s']:8.2f} s {r['memory_mb']:9.1f} MB "
+                    f"{'' if r['elements'] is None else r['elements']:>9} "
+                    f"{r['component']} ({r['module']})"
+                    for r in top
+                )
+            )
+        self.logger.info(f"Saved construction profile to {output_file}.")
+
+    def load_inputs(self, inputs_dir=None, attach_data_portal=True, data=None):
         """
         Load input data using the appropriate modules and return a model
         instance. This is implemented by calling the load_inputs() function of
-        each module, if the module has that function.
+        each module, if the module has that function. If data is provided (a
+        DataPortal previously loaded for this model), it is used instead of
+        reading the input files again.
         """
         if inputs_dir is None:
             inputs_dir = getattr(self.options, "inputs_dir", "inputs")
 
-        # Load data; add a fancier load function to the data portal
         timer = StepTimer()
-        data = DataPortal(model=self)
-        data.load_aug = types.MethodType(load_aug, data)
-        for module in self.get_modules():
-            if hasattr(module, "load_inputs"):
-                module.load_inputs(self, data, inputs_dir)
-
-        self.logger.info(f"Data read in {timer.step_time():.2f} s.")
+        if data is not None:
+            self.logger.info("Reusing data read for a previous scenario.")
+        else:
+            # Load data; add a fancier load function to the data portal
+            data = DataPortal(model=self)
+            data.load_aug = types.MethodType(load_aug, data)
+            for module in self.get_modules():
+                if hasattr(module, "load_inputs"):
+                    module.load_inputs(self, data, inputs_dir)
+            # let modules revise the combined data from all modules
+            for module in self.get_modules():
+                if hasattr(module, "post_load_inputs"):
+                    module.post_load_inputs(self, data)
+
+            if self.options.input_cache:
+                clean_input_cache(self)
+            self.logger.info(f"Data read in {timer.step_time():.2f} s.")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            read_times = getattr(data, "read_times", {})
+            self.logger.debug(
+                "Time spent reading each file "
+                f"(using {self.options.input_engine} engine):\n"
+                + "\n".join(
+                    f"{t:8.2f} s  {path}"
+                    for path, t in sorted(
+                        read_times.items(), key=lambda x: x[1], reverse=True
+                    )
+                )
+            )
         self.logger.info(f"\nConstructing model instance from data and rules...")
 
+        profile = getattr(self.options, "profile_construction", None) is not None
+        profile = profile and not getattr(self.options, "estimate", False)
+        if profile:
+            # create_instance copies this list to the instance, which adds
+            # an entry as each component is constructed
+            self.construction_profile = []
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+
         if self.logger.isEnabledFor(logging.DEBUG):
             instance = self.create_instance(data, report_timing=True)
         else:
             instance = self.create_instance(data, report_timing=False)
 
+        if profile:
+            if not tracing:
+                tracemalloc.stop()
+            self.report_construction_profile(instance)
+
         if attach_data_portal:
             instance.DataPortal = data
 
@@ -287,6 +512,22 @@ class SwitchConcreteModel(ConcreteModel):
             for v in all_elements(variable)
         )
 
+    def mark_changed(self, *components):
+        """
+        Record that the specified components have been reconstructed or
+        otherwise altered since the last solve (e.g., during pre_iterate()),
+        so that solve() can resend them when using a persistent solver
+        (--persistent-solver). Other changes to existing constraints are not
+        detected in that mode. Components that are added to the model, and
+        changes to variable bounds, fixed variables and mutable params, are
+        detected automatically.
+        """
+        try:
+            changed = self._changed_components
+        except AttributeError:
+            changed = self._changed_components = []
+        changed.extend(components)
+
     def preprocess(self, *args, **kwargs):
         # continue to use in Pyomo 5 but avoid deprecation warning in Pyomo 6+
         if pyomo.version.version_info[:2] < (6, 0):
@@ -307,15 +548,117 @@ class SwitchConcreteModel(ConcreteModel):
         Call post-solve function (if present) in all modules used to compose
         this model. This method can be used to report or save results from the
         solved model.
+
+        If --post-solve-workers is more than 1, the post-solve functions are
+        run in parallel, in worker processes forked from this one, each of
+        which has a frozen copy of the solved model. Modules whose
+        post_solve() alters the model or uses files written by earlier
+        modules should set parallel_post_solve = False; their post_solve() is
+        run in this process after all earlier modules have finished and
+        before any later ones start.
         """
         if outputs_dir is None:
             outputs_dir = getattr(self.options, "outputs_dir", "outputs")
         if not os.path.exists(outputs_dir):
             os.makedirs(outputs_dir)
 
-        for module in self.get_modules():
-            if hasattr(module, "post_solve"):
-                module.post_solve(self, outputs_dir)
+        modules = [m for m in self.get_modules() if hasattr(m, "post_solve")]
+        workers = getattr(self.options, "post_solve_workers", 1)
+        context = None
+        if workers > 1:
+            try:
+                context = multiprocessing.get_context("fork")
+            except ValueError:
+                self.logger.warning(
+                    "WARNING: --post-solve-workers requires the 'fork' start "
+                    "method for new processes, which is not available on this "
+                    "platform. Post-solve functions will be run serially."
+                )
+                workers = 1
+
+        times = {}
+        batch = []  # modules waiting to be run in parallel
+        for module in modules:
+            if workers > 1 and getattr(module, "parallel_post_solve", True):
+                batch.append(module)
+                continue
+            # finish any waiting modules, then run this one on its own
+            times.update(
+                parallel_post_solve(self, batch, outputs_dir, workers, context)
+            )
+            batch = []
+            timer = StepTimer()
+            module.post_solve(self, outputs_dir)
+            times[module.__name__] = timer.step_time()
+        times.update(parallel_post_solve(self, batch, outputs_dir, workers, context))
+
+        self.logger.info("Post-solve time by module:")
+        for module in modules:
+            self.logger.info(f"    {module.__name__}: {times[module.__name__]:.2f} s")
+
+        # save tables in the --results-db database, if requested
+        from switch_model.reporting import save_results_db
+
+        save_results_db(self)
+
+
+# model whose post_solve() functions are being run by parallel_post_solve();
+# this is inherited by the worker processes when they are forked
+post_solve_model = None
+
+
+def parallel_post_solve(model, modules, outputs_dir, workers, context):
+    """
+    Run post_solve() for the specified modules in worker processes forked
+    from this one (using multiprocessing context), and return a dict of the
+    time taken by each one. Any tables that the workers record for
+    --results-db are returned to this process, to be saved with the rest.
+    """
+    if not modules:
+        return {}
+    global post_solve_model
+    post_solve_model = model
+    # flush output so buffered text is not repeated by the workers
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            min(workers, len(modules)), mp_context=context
+        ) as executor:
+            futures = [
+                executor.submit(post_solve_worker, module.__name__, outputs_dir)
+                for module in modules
+            ]
+            results = [f.result() for f in futures]
+    finally:
+        post_solve_model = None
+
+    times = {}
+    for module, (elapsed, tables) in zip(modules, results):
+        times[module.__name__] = elapsed
+        if tables:
+            try:
+                model._results_db_tables.update(tables)
+            except AttributeError:
+                model._results_db_tables = dict(tables)
+    return times
+
+
+def post_solve_worker(module_name, outputs_dir):
+    """
+    Run post_solve() for one module in a worker process, using the copy of
+    the model inherited from the parent process. Returns the time taken and
+    any tables recorded for --results-db.
+    """
+    m = post_solve_model
+    # only return tables recorded by this module
+    m._results_db_tables = {}
+    timer = StepTimer()
+    sys.modules[module_name].post_solve(m, outputs_dir)
+    elapsed = timer.step_time()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return elapsed, m._results_db_tables
 
 
 def create_model(*args, **kwargs):
@@ -323,6 +666,81 @@ def create_model(*args, **kwargs):
     return SwitchAbstractModel(*args, **kwargs)
 
 
+# approximate memory used by Pyomo for each element of each type of component
+# and for each variable term in constraints and expressions (measured with
+# tracemalloc on Pyomo 6.7)
+estimate_bytes_per_element = {
+    Var: 160,
+    Constraint: 250,
+    Expression: 250,
+    Set: 240,
+    Param: 110,
+}
+estimate_bytes_per_term = 120
+
+
+def estimate_component_size(component, samples=20):
+    """
+    Return the number of elements in component and the number of variable
+    terms in them (None for components other than constraints and
+    expressions). Sets and parameters must already be constructed. For
+    constraints and expressions, the rule is called for up to `samples`
+    indices spread through the index set, and the share of indices that are
+    skipped and the number of terms per element are extrapolated from these.
+    """
+    from pyomo.core.base.set import SetOperator
+    from pyomo.core.expr.numvalue import native_types
+    from pyomo.core.expr.visitor import identify_variables
+
+    if component.ctype is Set:
+        if component.is_indexed():
+            return sum(len(s) for s in component.values()), None
+        elif isinstance(component, SetOperator):
+            # virtual set, e.g., cross product of two other sets
+            return 0, None
+        else:
+            return len(component), None
+    if component.ctype is Param:
+        return (len(component.sparse_keys()) if component.is_indexed() else 1), None
+
+    index = component.index_set() if component.is_indexed() else [None]
+    n_indices = len(index)
+    if component.ctype is Var:
+        return n_indices, None
+    rule = component.rule if component.ctype is Constraint else component._rule
+    if rule is None or n_indices == 0:
+        return 0, 0
+
+    step = -(-n_indices // samples)  # ceiling division
+    block = component.parent_block()
+    n_sampled = n_kept = n_terms = 0
+    for idx in itertools.islice(index, 0, None, step):
+        n_sampled += 1
+        if component.ctype is Constraint:
+            expr = rule(block, idx)
+        else:
+            # create the element as usual (only once), since some rules
+            # expect to be called only once for each index
+            try:
+                expr = component[idx].expr
+            except KeyError:  # rule returned Expression.Skip
+                continue
+        if expr is Constraint.Skip or isinstance(expr, bool):
+            continue
+        n_kept += 1
+        variables = set()
+        for e in expr if isinstance(expr, tuple) else (expr,):
+            if e is not None and type(e) not in native_types:
+                variables.update(
+                    id(v) for v in identify_variables(e, include_fixed=False)
+                )
+        n_terms += len(variables)
+    return (
+        round(n_indices * n_kept / n_sampled),
+        round(n_indices * n_terms / n_sampled),
+    )
+
+
 def unique_list(seq):
     """
     Create a list with the unique elements from seq, preserving original order.
@@ -350,6 +768,77 @@ def make_iterable(item):
     return i
 
 
+class ReportExpression(IndexedExpression):
+    """
+    An indexed Expression that is constructed when it is first used (e.g., by
+    a constraint or the objective function), rather than when the model is
+    constructed. This can be used for expressions that are often only needed
+    for reporting, to save time and memory when constructing the model.
+
+    This accepts the same arguments as Expression, plus an optional values
+    argument, which should be a function that accepts the model and returns a
+    dict with the numerical value of the expression for each index, based on
+    the current values of the variables. evaluate() uses this (or the rule)
+    to report values for an expression that has not been constructed, without
+    constructing it.
+    """
+
+    def __init__(self, *args, values=None, **kwargs):
+        self._values_rule = values
+        IndexedExpression.__init__(self, *args, **kwargs)
+
+    def construct(self, data=None):
+        # postpone construction until the expression is used
+        pass
+
+    def evaluate(self):
+        """
+        Return a dict with the value of this expression for each index.
+        """
+        if self._constructed:
+            return {k: value(e) for k, e in self.items()}
+        m = self.parent_block()
+        if self._values_rule is not None:
+            return self._values_rule(m)
+        else:
+            return {k: value(self._rule(m, k)) for k in self.index_set()}
+
+    @property
+    def active(self):
+        # Stay inactive until constructed, so solvers and writers skip this
+        # when checking that all active components of the model are
+        # constructed.
+        return self._constructed
+
+    def _construct_on_demand(self):
+        if not self._constructed:
+            IndexedExpression.construct(self)
+
+    def __getitem__(self, index):
+        self._construct_on_demand()
+        return IndexedExpression.__getitem__(self, index)
+
+    def __len__(self):
+        self._construct_on_demand()
+        return IndexedExpression.__len__(self)
+
+    def __contains__(self, index):
+        self._construct_on_demand()
+        return IndexedExpression.__contains__(self, index)
+
+    def keys(self, *args, **kwargs):
+        self._construct_on_demand()
+        return IndexedExpression.keys(self, *args, **kwargs)
+
+    def values(self, *args, **kwargs):
+        self._construct_on_demand()
+        return IndexedExpression.values(self, *args, **kwargs)
+
+    def items(self, *args, **kwargs):
+        self._construct_on_demand()
+        return IndexedExpression.items(self, *args, **kwargs)
+
+
 class StepTimer(object):
     """
     Keep track of elapsed time for steps of a process.
@@ -650,6 +1139,7 @@ def load_aug(switch_data, optional=False, optional_params=[], **kwargs):
     # also support auto-documenting of parameters and input files.
 
     # convert filename if needed
+    standard_path = kwargs["filename"]
     kwargs["filename"] = apply_input_aliases(switch_data, kwargs["filename"])
     # store filename in local variable for easier access
     path = kwargs["filename"]
@@ -797,9 +1287,15 @@ def load_aug(switch_data, optional=False, optional_params=[], **kwargs):
         # validated the file's column headings.
         return
     # All done with cleaning optional bits. Pass the updated arguments
-    # into the DataPortal.load() function.
+    # into the DataPortal.load() function (or our columnar equivalent).
+    timer = StepTimer()
     try:
-        switch_data.load(**kwargs)
+        if switch_data._model.options.input_cache:
+            load_cached(switch_data, separator, standard_path, **kwargs)
+        elif switch_data._model.options.input_engine == "columnar":
+            merge_input_data(switch_data, read_columnar(separator, **kwargs))
+        else:
+            switch_data.load(**kwargs)
     except Exception as e:
         # Pyomo error messages can be very cryptic, so we at least make sure to
         # show which file is being read. Users can use --debug to try to dig a
@@ -827,6 +1323,432 @@ def load_aug(switch_data, optional=False, optional_params=[], **kwargs):
             )
         raise
 
+    # keep a record of how long each file took to read, for reporting by
+    # SwitchAbstractModel.load_inputs() (some files are read more than once)
+    try:
+        read_times = switch_data.read_times
+    except AttributeError:
+        read_times = switch_data.read_times = dict()
+    read_times[path] = read_times.get(path, 0.0) + timer.step_time()
+
+
+# regular expression used by Pyomo to identify numbers in data files
+_number_pattern = re.compile(r"^[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?$")
+
+
+def _parse_token(token):
+    """
+    Convert a single text cell to the same Python value that Pyomo's data
+    file parser would produce: bool for true/false, int for numbers without a
+    decimal point that have an integral value, float for other numbers and
+    str for everything else (with any enclosing double quotes removed).
+    """
+    if token in {"True", "true", "TRUE"}:
+        return True
+    elif token in {"False", "false", "FALSE"}:
+        return False
+    elif len(token) > 1 and token[0] == '"' and token[-1] == '"':
+        return token[1:-1]
+    elif _number_pattern.match(token):
+        num = float(token)
+        if "." not in token and int(num) == num:
+            return int(num)
+        return num
+    else:
+        return token
+
+
+def _parse_column(column):
+    """
+    Convert a pandas Series of text cells into a list of Python values,
+    matching _parse_token(). Columns that are entirely numeric (apart from "."
+    placeholders for missing values) are converted in bulk; other columns
+    are converted once per unique value. Missing values are returned as ".".
+    """
+    import numpy as np
+
+    text = column.to_numpy(dtype=object)
+    missing = text == "."
+    present = text[~missing]
+    if len(present) and column[~missing].str.match(_number_pattern).all():
+        nums = present.astype(float)
+        # Pyomo only treats a number as an integer if it doesn't have a
+        # decimal point and has an integral value (e.g., 2 or 2e3, not 2.0)
+        is_int = ~column[~missing].str.contains(".", regex=False).to_numpy()
+        is_int &= nums == np.floor(nums)
+        values = [int(n) if i else n for n, i in zip(nums.tolist(), is_int)]
+        if not missing.any():
+            return values
+        result = ["."] * len(text)
+        for pos, val in zip(np.flatnonzero(~missing).tolist(), values):
+            result[pos] = val
+        return result
+    else:
+        lookup = {token: _parse_token(token) for token in set(text.tolist())}
+        return [lookup[token] for token in text.tolist()]
+
+
+def read_columnar(separator, **kwargs):
+    """
+    Alternative to DataPortal.load() used by load_aug() when the user
+    specifies --input-engine columnar. This reads the whole table at once with
+    pandas, converts each column to Python values in bulk, then returns a
+    dict of sets and params in the same form that DataPortal.load() would
+    store in the DataPortal (see merge_input_data()). This avoids Pyomo's
+    token-by-token parsing of the data, which can be very slow for large
+    tables (e.g., hourly data for thousands of projects).
+
+    This only supports the arguments that load_aug() passes to
+    DataPortal.load(): filename, select, param, index and set.
+    """
+    import pandas as pd
+
+    path = kwargs["filename"]
+    df = pd.read_csv(
+        path,
+        sep=separator,
+        dtype=str,
+        keep_default_na=False,
+        na_filter=False,
+        skip_blank_lines=True,
+    )
+    # short rows come back as NaN, even with na_filter=False
+    if df.isna().to_numpy().any() or (df == "").to_numpy().any():
+        raise InputError(
+            rewrap(
+                f"""
+                Empty cells found in {path}. Please ensure there are no empty
+                cells (,, on row or , at end of line with nothing after it) or
+                rows with the wrong number of cells. Cells with no data should
+                have a single period (.) rather than being left empty.
+                """
+            )
+        )
+
+    name = lambda c: c if isinstance(c, string_types) else c.local_name
+    data = dict()
+
+    if kwargs.get("set") is not None:
+        # DataPortal.load() stores every column of the file in the set
+        # (ignoring select), using tuples for multi-dimensional sets
+        columns = [_parse_column(df[col]) for col in df.columns]
+        if len(columns) == 1:
+            members = columns[0]
+        else:
+            members = list(zip(*columns))
+        data[name(kwargs["set"])] = {None: members}
+        return data
+
+    params = [name(p) for p in kwargs.get("param", [])]
+    select = list(kwargs["select"]) if kwargs.get("select") else list(df.columns)
+    num_indexes = len(select) - len(params)
+    columns = [_parse_column(df[col]) for col in select]
+    index_columns = columns[:num_indexes]
+    if num_indexes == 0:
+        keys = [None] * len(df)
+    elif num_indexes == 1:
+        keys = index_columns[0]
+    else:
+        keys = list(zip(*index_columns))
+
+    if kwargs.get("index") is not None:
+        data[name(kwargs["index"])] = {None: keys}
+    for param, values in zip(params, columns[num_indexes:]):
+        param_data = data.setdefault(param, {})
+        param_data.update((k, v) for k, v in zip(keys, values) if v != ".")
+    return data
+
+
+def merge_input_data(switch_data, data):
+    """
+    Add sets and params from a dict like {name: {index: value}} to the
+    DataPortal, following the same rules as DataPortal.load(): data for each
+    param is added to any data already read for that param, and sets (stored
+    as {None: [members]}) replace any previous members.
+    """
+    portal_data = switch_data._data.setdefault(None, {})
+    for name, values in data.items():
+        portal_data.setdefault(name, {}).update(values)
+
+
+# Input cache: if the user specifies --input-cache, the sets and params read
+# from each input file are saved in a per-user cache directory (see
+# default_input_cache_dir()), so later runs can skip parsing files that
+# haven't changed. Entries are named by a hash of the contents of the source
+# file, the components being loaded from it and the cache format, so changed
+# files never match an old entry and identical files in different inputs
+# directories share one. Each entry is an uncompressed .npz file with one
+# array per column of each component, plus a JSON manifest describing how to
+# rebuild the components. Entries are memory-mapped when read and never hold
+# pickled objects, so reading the cache cannot run code.
+input_cache_version = 2
+# entries that haven't been used for this many days are removed
+input_cache_max_age_days = 30
+
+
+def default_input_cache_dir():
+    """Return the directory for the input cache in the user's cache directory."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(
+            os.path.join("~", "AppData", "Local")
+        )
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+            os.path.join("~", ".cache")
+        )
+    return os.path.join(base, "switch", "input_cache")
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# types of values that can be stored in the cache, in order of their type
+# codes for columns that mix several types
+_input_cache_types = [int, float, str, type(None)]
+
+
+def _cache_column_arrays(values):
+    """
+    Return a dict of arrays to store a column of input data: {"": array} if
+    all values are ints, floats or strings, or {"": array of strings, "types":
+    array of type codes} if they are mixed.
+    """
+    import numpy as np
+
+    types = {type(v) for v in values}
+    if types <= {int}:
+        return {"": np.array(values, dtype=np.int64)}
+    elif types == {float}:
+        return {"": np.array(values, dtype=np.float64)}
+    elif types == {str}:
+        return {"": np.array(values, dtype=str)}
+    elif types <= set(_input_cache_types):
+        return {
+            "": np.array(
+                [repr(v) if type(v) is float else str(v) for v in values], dtype=str
+            ),
+            "types": np.array(
+                [_input_cache_types.index(type(v)) for v in values], dtype=np.uint8
+            ),
+        }
+    else:
+        raise TypeError(f"Values of type {types} cannot be cached.")
+
+
+def _cache_column_values(arrays, name):
+    """Return the list of values stored by _cache_column_arrays()."""
+    values = arrays[name].tolist()
+    if name + "types" in arrays:
+        values = [
+            None if t is type(None) else t(v)
+            for v, t in zip(
+                values,
+                (_input_cache_types[c] for c in arrays[name + "types"].tolist()),
+            )
+        ]
+    return values
+
+
+def _split_columns(items):
+    """
+    Split a list of scalars, tuples or Nones into columns. Returns the form of
+    the items ("scalar", "tuple" or "none") and the list of columns.
+    """
+    forms = {
+        "none" if x is None else "tuple" if isinstance(x, tuple) else "scalar"
+        for x in items
+    }
+    if len(forms) > 1 or (forms == {"tuple"} and len({len(x) for x in items}) > 1):
+        raise TypeError("Items with mixed dimensions cannot be cached.")
+    form = forms.pop() if forms else "scalar"
+    if form == "tuple":
+        return form, [list(c) for c in zip(*items)]
+    elif form == "scalar":
+        return form, [list(items)]
+    else:
+        return form, []
+
+
+def _join_columns(form, columns, count):
+    if form == "tuple":
+        return list(zip(*columns))
+    elif form == "scalar":
+        return columns[0]
+    else:
+        return [None] * count
+
+
+def write_input_cache(entry_path, data):
+    """
+    Save a dict of sets and params like {name: {index: value}} (see
+    merge_input_data()) as an input cache entry. Raises TypeError if the data
+    can't be stored in arrays.
+    """
+    import json
+    import numpy as np
+
+    manifest, arrays = [], {}
+    for i, (name, values) in enumerate(data.items()):
+        if list(values) == [None] and isinstance(values[None], list):
+            # set, stored as {None: [members]}
+            kind = "set"
+            form, columns = _split_columns(values[None])
+            num_keys, count = len(columns), len(values[None])
+        else:
+            # param, stored as {index: value}
+            kind = "param"
+            form, columns = _split_columns(list(values.keys()))
+            columns.append(list(values.values()))
+            num_keys, count = len(columns) - 1, len(values)
+        for j, column in enumerate(columns):
+            for suffix, array in _cache_column_arrays(column).items():
+                arrays[f"{i}.{j}.{suffix}"] = array
+        manifest.append([name, kind, form, num_keys, count])
+    arrays["manifest"] = np.array(json.dumps(manifest))
+
+    # write to a temporary file then move into place, so other processes
+    # (e.g., parallel solve_scenarios workers) never see a partial entry
+    temp_path = "{}.{}.tmp".format(entry_path, os.getpid())
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, entry_path)
+
+
+def read_input_cache(entry_path):
+    """
+    Return data from an input cache entry, or None if it is missing or
+    unreadable. Each array in the entry is memory-mapped from the file (the
+    .npz members are stored uncompressed), then converted to Python values.
+    """
+    import json
+    import struct
+    import zipfile
+    import numpy as np
+
+    try:
+        arrays = {}
+        with open(entry_path, "rb") as f:
+            for info in zipfile.ZipFile(f).infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    return None
+                # member data follows the local file header, which has a
+                # 30-byte fixed part, then the file name and extra field
+                f.seek(info.header_offset + 26)
+                name_len, extra_len = struct.unpack("<HH", f.read(4))
+                f.seek(info.header_offset + 30 + name_len + extra_len)
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    header = np.lib.format.read_array_header_1_0(f)
+                else:
+                    header = np.lib.format.read_array_header_2_0(f)
+                shape, fortran_order, dtype = header
+                if dtype.hasobject:
+                    return None
+                name = info.filename[: -len(".npy")]
+                if dtype.itemsize * int(np.prod(shape)) == 0:
+                    arrays[name] = np.empty(shape, dtype=dtype)
+                else:
+                    arrays[name] = np.memmap(
+                        f,
+                        dtype=dtype,
+                        mode="r",
+                        offset=f.tell(),
+                        shape=shape,
+                        order="F" if fortran_order else "C",
+                    )
+        data = {}
+        manifest = json.loads(arrays["manifest"][()].item())
+        for i, (name, kind, form, num_keys, count) in enumerate(manifest):
+            columns = [
+                _cache_column_values(arrays, f"{i}.{j}.")
+                for j in range(num_keys + (kind == "param"))
+            ]
+            if kind == "set":
+                data[name] = {None: _join_columns(form, columns, count)}
+            else:
+                keys = _join_columns(form, columns[:-1], count)
+                data[name] = dict(zip(keys, columns[-1]))
+    except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile):
+        # missing, empty or corrupt entry
+        return None
+    # mark the entry as recently used (see clean_input_cache())
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+    return data
+
+
+def load_cached(switch_data, separator, standard_path, **kwargs):
+    """
+    Load data from an input file into the DataPortal, using a copy saved in
+    the input cache if available. Otherwise read the file with the selected
+    input engine and save the result in the cache for next time. This is
+    called by load_aug() if the user specifies --input-cache.
+    """
+    model = switch_data._model
+    path = kwargs["filename"]
+    name = lambda c: c if isinstance(c, string_types) else c.local_name
+    key = (
+        input_cache_version,
+        switch_model_version,
+        _file_hash(path),
+        tuple(kwargs.get("select") or ()),
+        tuple(name(p) for p in kwargs.get("param", [])),
+        name(kwargs["index"]) if kwargs.get("index") is not None else None,
+        name(kwargs["set"]) if kwargs.get("set") is not None else None,
+    )
+    cache_dir = model.options.input_cache_dir or default_input_cache_dir()
+    entry_path = os.path.join(
+        cache_dir, hashlib.sha256(repr(key).encode()).hexdigest()[:32] + ".npz"
+    )
+    data = read_input_cache(entry_path)
+    if data is not None:
+        model.logger.debug(f"Using cached data for {path}.")
+    else:
+        if model.options.input_engine == "columnar":
+            data = read_columnar(separator, **kwargs)
+        else:
+            # read into a scratch DataPortal so we can tell what came from
+            # this file
+            scratch = DataPortal(model=model)
+            scratch.load(**kwargs)
+            data = scratch._data.get(None, {})
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            write_input_cache(entry_path, data)
+        except (OSError, TypeError, OverflowError) as e:
+            # e.g., read-only cache directory; just run without caching
+            model.logger.debug(f"Unable to save {path} in input cache: {e}")
+    merge_input_data(switch_data, data)
+
+
+def clean_input_cache(model):
+    """
+    Remove files from the input cache directory (entries or stray temporary
+    files) that haven't been used for input_cache_max_age_days.
+    """
+    cache_dir = model.options.input_cache_dir or default_input_cache_dir()
+    cutoff = time.time() - input_cache_max_age_days * 24 * 60 * 60
+    try:
+        entries = os.listdir(cache_dir)
+    except OSError:
+        return
+    for entry in entries:
+        entry_path = os.path.join(cache_dir, entry)
+        try:
+            if os.stat(entry_path).st_mtime < cutoff:
+                os.remove(entry_path)
+        except OSError:
+            pass
+
 
 # Define an argument parser that accepts the allow_abbrev flag to
 # prevent partial matches, even on versions of Python before 3.5.
@@ -0,0 +1,21 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import unittest
+
+from pyomo.environ import value
+
+from tests.helpers import solve_example
+
+
+class BendersTest(unittest.TestCase):
+    def test_benders(self):
+        m = solve_example(
+            self, "3zone_toy", ["--benders", "--suffix", "dual"], solver_args=[]
+        )
+        self.assertAlmostEqual(value(m.SystemCost) / 134733088.43, 1, places=6)
+        self.assertTrue(any(m.dual.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import unittest
+
+from testfixtures import compare
+
+
+class ClusterTest(unittest.TestCase):
+    def test_gen_clusters(self):
+        from switch_model.generators.core import cluster
+
+        data = {
+            "GENERATION_PROJECTS": {None: ["A", "B", "C", "D"]},
+            "gen_dbid": {"A": 1, "B": 2, "C": 3, "D": 4},
+            "gen_tech": {"A": "GT", "B": "GT", "C": "GT", "D": "CC"},
+            "gen_capacity_limit_mw": {"A": 5, "B": 10, "C": 5, "D": 5},
+            "gen_full_load_heat_rate": {"A": 10, "B": 10, "C": 11, "D": 7},
+            "build_gen_predetermined": {("A", 2000): 1, ("B", 2000): 3},
+            "CAPACITY_LIMITED_GENS": {None: ["A", "B", "C", "D"]},
+        }
+        clusters = cluster.find_gen_clusters(data)
+        compare(clusters, {"cluster_A": ["A", "B"]})
+        compare(
+            cluster.cluster_shares(data, clusters),
+            {("cluster_A", "A"): 0.25, ("cluster_A", "B"): 0.75},
+        )
+        cluster.apply_gen_clusters(data, clusters)
+        compare(data["GENERATION_PROJECTS"], {None: ["cluster_A", "C", "D"]})
+        compare(data["gen_dbid"], {"cluster_A": 1, "C": 3, "D": 4})
+        compare(data["gen_capacity_limit_mw"], {"cluster_A": 15, "C": 5, "D": 5})
+        compare(data["build_gen_predetermined"], {("cluster_A", 2000): 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
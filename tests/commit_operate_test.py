@@ -0,0 +1,58 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import unittest
+
+from pyomo.environ import value
+from testfixtures import compare
+
+from tests.helpers import solve_example
+
+
+class CommitOperateTest(unittest.TestCase):
+    def test_min_up_down_running_total(self):
+        from pyomo.environ import ConcreteModel, Param, Set
+        from switch_model.generators.core.commit.operate import (
+            time_window,
+            window_sum,
+        )
+
+        m = ConcreteModel()
+        m.TIMESERIES = Set(initialize=["a", "b"])
+        tps = {"a": [1, 2, 3, 4, 5, 6], "b": [7, 8, 9]}
+        m.TPS_IN_TS = Set(m.TIMESERIES, initialize=tps)
+        m.ts_duration_of_tp = Param(m.TIMESERIES, initialize={"a": 2, "b": 4})
+        m.tp_ts = Param(
+            [t for ts in tps for t in tps[ts]],
+            initialize={t: ts for ts in tps for t in tps[ts]},
+            within=m.TIMESERIES,
+        )
+        startups = {t: 10 ** (t - 1) for ts in tps for t in tps[ts]}
+        running_total = {}
+        for ts in tps:
+            total = 0
+            for t in tps[ts]:
+                total += startups[t]
+                running_total["g", t] = total
+        # windows shorter than, equal to and longer than each timeseries,
+        # including ones that wrap around the start
+        for t in m.tp_ts:
+            for hrs in range(0, 30, 2):
+                compare(
+                    window_sum(m, running_total, "g", t, hrs),
+                    sum(startups[tp] for tp in time_window(m, t, hrs)),
+                )
+
+        costs = []
+        for formulation in ["window", "running-total"]:
+            m = solve_example(
+                self,
+                ("production_cost_models", "unit_commit"),
+                ["--min-up-down-formulation", formulation],
+            )
+            costs.append(value(m.SystemCost))
+        self.assertAlmostEqual(costs[1] / costs[0], 1, places=8)
+
+
+if __name__ == "__main__":
+    unittest.main()
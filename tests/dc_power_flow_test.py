@@ -0,0 +1,62 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import unittest
+
+from pyomo.environ import Var
+from testfixtures import compare
+
+
+class DCPowerFlowTest(unittest.TestCase):
+    def test_dc_network(self):
+        from pyomo.environ import ConcreteModel, Param, Set
+        from switch_model.transmission.dc_power_flow import DCNetwork
+
+        m = ConcreteModel()
+        m.LOAD_ZONES = Set(initialize=["A", "B", "C", "D", "E"], ordered=True)
+        m.TIMEPOINTS = Set(initialize=[1], ordered=True)
+        lines = {
+            "A-B": ("A", "B"),
+            "B-C": ("B", "C"),
+            "A-C": ("A", "C"),
+            "D-E": ("D", "E"),
+        }
+        m.TRANSMISSION_LINES = Set(initialize=list(lines), ordered=True)
+        m.trans_lz1 = Param(
+            m.TRANSMISSION_LINES,
+            within=m.LOAD_ZONES,
+            initialize={tx: lines[tx][0] for tx in lines},
+        )
+        m.trans_lz2 = Param(
+            m.TRANSMISSION_LINES,
+            within=m.LOAD_ZONES,
+            initialize={tx: lines[tx][1] for tx in lines},
+        )
+        m.trans_reactance = Param(m.TRANSMISSION_LINES, initialize=0.1)
+        m.TXPowerNet = Var(m.LOAD_ZONES, m.TIMEPOINTS)
+
+        net = DCNetwork(m)
+        compare(net.island_zones, {"A": ["A", "B", "C"], "D": ["D", "E"]}, strict=False)
+        # no zone affects flows on lines in another island
+        for tx in ["A-B", "B-C", "A-C"]:
+            for z in ["D", "E"]:
+                self.assertEqual(net.ptdf[net.line_index[tx], net.zones.index(z)], 0)
+        for z in ["A", "B", "C"]:
+            self.assertEqual(net.ptdf[net.line_index["D-E"], net.zones.index(z)], 0)
+
+        # inject 1 MW at A and withdraw it at C (TXPowerNet is the power
+        # delivered to each zone by the network), plus 1 MW from E to D
+        for z, v in {"A": -1, "B": 0, "C": 1, "D": 1, "E": -1}.items():
+            m.TXPowerNet[z, 1].value = v
+        flows = {tx: net.flows(m)[net.line_index[tx], 0] for tx in lines}
+        for tx, expected in {
+            "A-B": 1 / 3,
+            "B-C": 1 / 3,
+            "A-C": 2 / 3,
+            "D-E": -1,
+        }.items():
+            self.assertAlmostEqual(flows[tx], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
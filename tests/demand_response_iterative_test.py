@@ -0,0 +1,324 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import contextlib
+import io
+import logging
+import unittest
+
+from testfixtures import compare
+
+
+class DemandResponseIterativeTest(unittest.TestCase):
+    def test_dr_bid_all(self):
+        import numpy as np
+        from switch_model.balancing.demand_response.iterative import (
+            constant_elasticity_demand_system as demand_system,
+        )
+
+        m, base_data = dr_demand_system_model()
+        demand_system.calibrate(m, base_data)
+        zones, timeseries = list(m.LOAD_ZONES), list(m.TIMESERIES)
+        rng = np.random.RandomState(0)
+        prices = rng.uniform(50, 300, (len(zones), len(timeseries), 4)).round(-1)
+        demand, wtp = demand_system.bid_all(
+            m,
+            zones,
+            timeseries,
+            {
+                prod: prices if prod == "energy" else 0 * prices
+                for prod in m.DR_PRODUCTS
+            },
+        )
+        for i, z in enumerate(zones):
+            for j, ts in enumerate(timeseries):
+                n = len(m.TPS_IN_TS[ts])
+                ref_demand, ref_wtp = reference_bid(z, ts, prices[i, j, :n], base_data)
+                np.testing.assert_allclose(
+                    demand["energy"][i, j, :n], ref_demand, rtol=1e-11
+                )
+                self.assertFalse(demand["energy"][i, j, n:].any())
+                self.assertFalse(demand["energy up"][i, j].any())
+                self.assertAlmostEqual(wtp[i, j] / ref_wtp, 1, places=11)
+
+    def test_dr_flat_prices(self):
+        import numpy as np
+        import scipy.optimize
+        from unittest import mock
+        from switch_model.balancing.demand_response import iterative
+        from switch_model.balancing.demand_response.iterative import (
+            constant_elasticity_demand_system as demand_system,
+        )
+
+        m, base_data = dr_demand_system_model()
+        demand_system.calibrate(m, base_data)
+        zones, periods = list(m.LOAD_ZONES), list(m.PERIODS)
+        rng = np.random.RandomState(1)
+        dynamic_prices = {
+            (z, ts): {
+                prod: list(rng.uniform(50, 300, len(m.TPS_IN_TS[ts])))
+                if prod == "energy"
+                else [0.0] * len(m.TPS_IN_TS[ts])
+                for prod in m.DR_PRODUCTS
+            }
+            for z in zones
+            for ts in m.TIMESERIES
+        }
+        price_guess = np.full((len(zones), len(periods)), 150.0)
+        with mock.patch.object(iterative, "np", np, create=True), mock.patch.object(
+            iterative, "demand_module", demand_system
+        ):
+            flat_prices = iterative.solve_flat_prices(
+                m, zones, dynamic_prices, price_guess
+            )
+
+        # compare to a separate search for each zone and period, using the
+        # original per-timeseries bid calculation
+        def revenue_imbalance(flat_price, z, p):
+            imbalance = 0.0
+            for ts in m.TIMESERIES:
+                if m.ts_period[ts] == p:
+                    n = len(m.TPS_IN_TS[ts])
+                    demand, wtp = reference_bid(z, ts, [flat_price] * n, base_data)
+                    imbalance += sum(
+                        (mc - flat_price) * d
+                        for mc, d in zip(dynamic_prices[z, ts]["energy"], demand)
+                    ) * (m.ts_duration_of_tp[ts] * m.ts_scale_to_year[ts])
+            return imbalance
+
+        for i, z in enumerate(zones):
+            for j, p in enumerate(periods):
+                expected = scipy.optimize.newton(
+                    revenue_imbalance, price_guess[i, j], args=(z, p)
+                )
+                self.assertAlmostEqual(flat_prices[i, j] / expected, 1, places=8)
+
+    def test_dr_bid_pool(self):
+        import numpy as np
+        from unittest import mock
+        from switch_model.balancing.demand_response import iterative
+
+        m = dr_bid_pool_model(slots=3, prune_iterations=2)
+        tps = {"a": [1, 2], "b": [3, 4]}
+
+        def add_bids(levels):
+            with contextlib.redirect_stdout(io.StringIO()):
+                iterative.add_bids(
+                    m,
+                    [
+                        (
+                            z,
+                            ts,
+                            {prod: [100.0] * 2 for prod in m.DR_PRODUCTS},
+                            {
+                                prod: [level if prod == "energy" else 0.0] * 2
+                                for prod in m.DR_PRODUCTS
+                            },
+                            0.0,
+                        )
+                        for z in m.LOAD_ZONES
+                        for ts, level in levels.items()
+                    ],
+                )
+
+        def solve(weights):
+            # assign weights to the bids in each timeseries instead of solving
+            for ts, bid_weights in weights.items():
+                compare(set(bid_weights), set(m.dr_bid_slot[ts]))
+                for b, w in bid_weights.items():
+                    for z in m.LOAD_ZONES:
+                        m.DRBidWeight[m.dr_bid_slot[ts][b], z, ts].value = w
+
+        def check_slots(expected):
+            compare(m.dr_bid_slot, expected)
+            for ts in m.TIMESERIES:
+                active_slots = set(m.dr_bid_slot[ts].values())
+                for s in m.DR_BID_SLOTS:
+                    for z in m.LOAD_ZONES:
+                        self.assertEqual(
+                            m.DRBidWeight[s, z, ts].fixed, s not in active_slots
+                        )
+
+        with mock.patch.object(iterative, "np", np, create=True):
+            add_bids({"a": 1, "b": 1})
+            check_slots({"a": {1: 1}, "b": {1: 1}})
+            self.assertIsNone(m.DRBidWeight[1, "N", "a"].value)
+            solve({"a": {1: 1}, "b": {1: 1}})
+
+            # bid 2 is new in timeseries a but matches bid 1 in b
+            iterative.update_bid_pool(m)
+            add_bids({"a": 2, "b": 1})
+            check_slots({"a": {1: 1, 2: 2}, "b": {1: 1}})
+            compare(m.dr_current_bid, {"a": 2, "b": 1})
+            solve({"a": {1: 0, 2: 1}, "b": {1: 1}})
+
+            iterative.update_bid_pool(m)
+            add_bids({"a": 3, "b": 3})
+            check_slots({"a": {1: 1, 2: 2, 3: 3}, "b": {1: 1, 3: 2}})
+            solve({"a": {1: 0, 2: 0.2, 3: 0.8}, "b": {1: 0.6, 3: 0.4}})
+
+            # bid 1 has had zero weight in timeseries a for two iterations
+            iterative.update_bid_pool(m)
+            check_slots({"a": {2: 2, 3: 3}, "b": {1: 1, 3: 2}})
+            add_bids({"a": 4, "b": 4})
+            check_slots({"a": {2: 2, 3: 3, 4: 1}, "b": {1: 1, 3: 2, 4: 3}})
+            solve({"a": {2: 0.1, 3: 0.4, 4: 0.5}, "b": {1: 0.1, 3: 0.2, 4: 0.7}})
+
+            # all slots are full, so the bids with the lowest weight make way
+            # for bid 1 (restored from the pruned bids) and bid 5
+            iterative.update_bid_pool(m)
+            add_bids({"a": 1, "b": 5})
+            check_slots({"a": {1: 2, 3: 3, 4: 1}, "b": {3: 2, 4: 3, 5: 1}})
+            compare(m.dr_current_bid, {"a": 1, "b": 5})
+            compare(len(m.DR_BID_SLOTS), 3)
+            solve({"a": {1: 1, 3: 0, 4: 0}, "b": {3: 0, 4: 0, 5: 1}})
+
+            # pruned bid 2 would now cost less than the current solution in
+            # timeseries a, so it is restored there
+            m.options.dr_bid_prune_iterations = 1
+            for z in m.LOAD_ZONES:
+                for tp in tps["a"]:
+                    m.prev_demand[z, tp, "energy"] = 10.0
+            iterative.update_bid_pool(m)
+            check_slots({"a": {1: 2, 2: 1}, "b": {5: 1}})
+            compare(sorted(m.dr_bid_data["a"]), [1, 2, 3, 4])
+            compare(sorted(m.dr_bid_data["b"]), [1, 3, 4, 5])
+
+
+def dr_demand_system_model():
+    """
+    Return a small model and base data for testing the constant-elasticity
+    demand system, with timeseries of different lengths in two periods.
+    """
+    import numpy as np
+    from types import SimpleNamespace
+    from pyomo.environ import ConcreteModel, Param, Set
+
+    tps = {"t1": [1, 2, 3, 4], "t2": [5, 6, 7], "t3": [8, 9, 10, 11]}
+    m = ConcreteModel()
+    m.options = SimpleNamespace(dr_elasticity_scenario=3)
+    m.logger = logging.getLogger("switch_test")
+    m.LOAD_ZONES = Set(initialize=["N", "S"])
+    m.PERIODS = Set(initialize=[2020, 2030])
+    m.TIMESERIES = Set(initialize=list(tps))
+    m.TPS_IN_TS = Set(m.TIMESERIES, initialize=tps)
+    m.ts_period = Param(m.TIMESERIES, initialize={"t1": 2020, "t2": 2020, "t3": 2030})
+    m.ts_duration_of_tp = Param(m.TIMESERIES, initialize={"t1": 6, "t2": 8, "t3": 6})
+    m.ts_scale_to_year = Param(
+        m.TIMESERIES, initialize={"t1": 300, "t2": 50, "t3": 365}
+    )
+    m.DR_PRODUCTS = Set(initialize=["energy", "energy up", "energy down"])
+    rng = np.random.RandomState(2)
+    base_data = [
+        (
+            z,
+            ts,
+            list(rng.uniform(500, 1000, len(tps[ts]))),
+            list(rng.uniform(100, 200, len(tps[ts]))),
+        )
+        for z in m.LOAD_ZONES
+        for ts in m.TIMESERIES
+    ]
+    return m, base_data
+
+
+def reference_bid(load_zone, time_series, prices, base_data):
+    """
+    Calculate a bid for one load zone and timeseries, the way the constant
+    elasticity demand system did before bid_all() was added.
+    """
+    import numpy as np
+
+    elasticity = 0.1
+    shiftable_share = 0.1 * 3
+
+    p = np.maximum(1.0, np.array(prices, float))
+    for (z, ts, base_loads, base_prices) in base_data:
+        if (z, ts) == (load_zone, time_series):
+            bl = np.array(base_loads, float)
+            bp = np.array(base_prices, float)
+
+    mins = p == np.min(p)
+    shiftable_load = np.zeros(len(p))
+    shiftable_load[mins] = bl[mins] * shiftable_share * np.sum(bl) / sum(bl[mins])
+
+    elastic_base_load = (1.0 - shiftable_share) * bl
+    elastic_load = elastic_base_load * (p / bp) ** (-elasticity)
+    elastic_load_cs_diff = np.sum(
+        (1 - (p / bp) ** (1 - elasticity)) * bp * elastic_base_load / (1 - elasticity)
+    )
+    base_elastic_load_paid = np.sum(bp * elastic_base_load)
+    elastic_load_paid = np.sum(p * elastic_load)
+    elastic_load_paid_diff = elastic_load_paid - base_elastic_load_paid
+
+    demand = shiftable_load + elastic_load
+    wtp = elastic_load_cs_diff + elastic_load_paid_diff
+    return (demand, wtp)
+
+
+def dr_bid_pool_model(slots, prune_iterations):
+    """
+    Return a model with the demand response bid slots and the data needed to
+    manage them, for two load zones and two timeseries with two timepoints
+    each.
+    """
+    from types import SimpleNamespace
+    from pyomo.environ import ConcreteModel, NonNegativeReals, Param, Set, Var
+
+    tps = {"a": [1, 2], "b": [3, 4]}
+    m = ConcreteModel()
+    m.options = SimpleNamespace(
+        dr_bid_slots=slots,
+        dr_bid_prune_iterations=prune_iterations,
+        dr_bid_dedupe_tolerance=1e-6,
+    )
+    m.logger = logging.getLogger("switch_test")
+    m.LOAD_ZONES = Set(initialize=["N", "S"])
+    m.TIMESERIES = Set(initialize=list(tps))
+    m.TPS_IN_TS = Set(m.TIMESERIES, initialize=tps)
+    m.TIMEPOINTS = Set(initialize=[tp for ts in tps for tp in tps[ts]])
+    m.DR_PRODUCTS = Set(initialize=["energy", "energy up", "energy down"])
+    m.DR_BID_SLOTS = Set(initialize=range(1, slots + 1))
+    m.dr_bid = Param(
+        m.DR_BID_SLOTS, m.LOAD_ZONES, m.TIMEPOINTS, m.DR_PRODUCTS, mutable=True
+    )
+    m.dr_price = Param(
+        m.DR_BID_SLOTS, m.LOAD_ZONES, m.TIMEPOINTS, m.DR_PRODUCTS, mutable=True
+    )
+    m.dr_bid_benefit = Param(m.DR_BID_SLOTS, m.LOAD_ZONES, m.TIMESERIES, mutable=True)
+    m.DRBidWeight = Var(
+        m.DR_BID_SLOTS, m.LOAD_ZONES, m.TIMESERIES, within=NonNegativeReals
+    )
+    m.dr_bid_group = Param(
+        m.TIMESERIES, within=m.TIMESERIES, initialize=lambda m, ts: ts
+    )
+    m.DR_BID_GROUPS = Set(initialize=list(tps))
+    m.TS_IN_DR_BID_GROUP = Set(m.DR_BID_GROUPS, initialize=lambda m, g: [g])
+
+    # empty bid pool, as set up by update_demand()
+    for w in m.DRBidWeight.values():
+        w.fix(0)
+    m.dr_bid_data = {g: dict() for g in m.DR_BID_GROUPS}
+    m.dr_bid_vector = {g: dict() for g in m.DR_BID_GROUPS}
+    m.dr_bid_slot = {g: dict() for g in m.DR_BID_GROUPS}
+    m.dr_bid_zero_weight_iterations = {g: dict() for g in m.DR_BID_GROUPS}
+    m.dr_current_bid = dict()
+    m.dr_bid_rounds = 0
+
+    # costs of the last solution, used to decide whether to restore bids
+    m.prev_marginal_cost = {
+        (z, tp, prod): 1.0
+        for z in m.LOAD_ZONES
+        for tp in m.TIMEPOINTS
+        for prod in m.DR_PRODUCTS
+    }
+    m.prev_demand = {key: 0.0 for key in m.prev_marginal_cost}
+    m.DR_Welfare_Cost = {tp: 0.0 for tp in m.TIMEPOINTS}
+    m.bring_timepoint_costs_to_base_year = {tp: 1.0 for tp in m.TIMEPOINTS}
+    m.tp_duration_hrs = {tp: 1.0 for tp in m.TIMEPOINTS}
+    m.ts_num_tps = {ts: len(tps[ts]) for ts in tps}
+    return m
+
+
+if __name__ == "__main__":
+    unittest.main()
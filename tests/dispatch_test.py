@@ -0,0 +1,97 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import math
+import unittest
+
+from pyomo.environ import value
+from testfixtures import compare
+
+import switch_model.solve
+from tests.helpers import example_inputs, solve_example
+
+
+class DispatchTest(unittest.TestCase):
+    def test_dispatch_emissions(self):
+        m = solve_example(self, "3zone_toy")
+        emissions = m.DispatchEmissions.evaluate()
+        keys = list(m.GEN_TP_FUELS)
+        self.assertEqual(list(emissions), keys)
+        for k in keys:
+            self.assertAlmostEqual(
+                emissions[k],
+                value(m.GenFuelUseRate[k])
+                * value(m.f_co2_intensity[k[2]] + m.f_upstream_co2_intensity[k[2]]),
+            )
+
+        # solvers sometimes report -0.0 for fuel use; emissions should be 0.0
+        k = keys[0]
+        m.GenFuelUseRate[k].value = -0.0
+        e = m.DispatchEmissions.evaluate()[k]
+        self.assertEqual(e, 0.0)
+        self.assertEqual(math.copysign(1, e), 1)
+
+        # missing values are an error, as with value()
+        m.GenFuelUseRate[k].value = None
+        with self.assertRaisesRegex(ValueError, "GenFuelUseRate"):
+            m.DispatchEmissions.evaluate()
+
+    def test_gen_index_sets(self):
+        # sets sliced from the shared index maps match the ones built with
+        # the temporary dicts used before, including their order
+        for example in ["3zone_toy", "discrete_and_min_build", "carbon_cap"]:
+            m = switch_model.solve.main(
+                args=["--inputs-dir", example_inputs(example), "--log-level", "error"],
+                return_instance=True,
+            )
+            self.assertFalse(hasattr(m, "_gen_index_maps"))
+
+            tps_for_gen = {
+                g: [t for p in m.PERIODS_FOR_GEN[g] for t in m.TPS_IN_PERIOD[p]]
+                for g in m.GENERATION_PROJECTS
+            }
+            tps_for_gen_in_period = dict()
+            for g in m.GENERATION_PROJECTS:
+                for t in tps_for_gen[g]:
+                    tps_for_gen_in_period.setdefault((g, m.tp_period[t]), []).append(t)
+            gens_for_rfm_period = dict()
+            for g in m.FUEL_BASED_GENS:
+                for f in m.FUELS_FOR_GEN[g]:
+                    if (m.gen_load_zone[g], f) in m.zone_fuel_rfm:
+                        rfm = m.zone_fuel_rfm[m.gen_load_zone[g], f]
+                        for p in m.PERIODS_FOR_GEN[g]:
+                            gens_for_rfm_period.setdefault((rfm, p), []).append(g)
+
+            compare(
+                list(m.GEN_TPS),
+                [(g, t) for g in m.GENERATION_PROJECTS for t in tps_for_gen[g]],
+            )
+            compare(
+                {k: list(m.TPS_FOR_GEN_IN_PERIOD[k]) for k in m.TPS_FOR_GEN_IN_PERIOD},
+                {
+                    (g, p): tps_for_gen_in_period.get((g, p), [])
+                    for g in m.GENERATION_PROJECTS
+                    for p in m.PERIODS
+                },
+            )
+            compare(
+                list(m.GEN_TP_FUELS),
+                [
+                    (g, t, f)
+                    for g in m.FUEL_BASED_GENS
+                    for t in tps_for_gen[g]
+                    for f in m.FUELS_FOR_GEN[g]
+                ],
+            )
+            compare(
+                {k: list(m.GENS_FOR_RFM_PERIOD[k]) for k in m.GENS_FOR_RFM_PERIOD},
+                {
+                    (rfm, p): gens_for_rfm_period.get((rfm, p), [])
+                    for rfm in m.REGIONAL_FUEL_MARKETS
+                    for p in m.PERIODS
+                },
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
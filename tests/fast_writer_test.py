@@ -0,0 +1,71 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import unittest
+from unittest import mock
+
+import numpy as np
+from pyomo.environ import (
+    ConcreteModel,
+    Constraint,
+    Expression,
+    NonNegativeReals,
+    Objective,
+    Param,
+    Var,
+    value,
+)
+
+import switch_model.fast_writer as fast_writer
+from tests.helpers import solve_example
+
+
+class FastWriterTest(unittest.TestCase):
+    def test_fast_writer(self):
+        m = solve_example(
+            self,
+            "storage",
+            ["--suffix", "dual"],
+            solver_args=["--solver", "highs", "--fast-writer"],
+        )
+        self.assertAlmostEqual(value(m.SystemCost) / 24484908.913, 1, places=6)
+        self.assertTrue(any(m.dual.values()))
+
+    def test_matrix_model(self):
+        m = ConcreteModel()
+        m.p = Param(initialize=2)
+        m.unused = Var()
+        m.x = Var([1, 2], bounds=(0, 10))
+        m.y = Var(within=NonNegativeReals)
+        m.e = Expression(expr=m.p * m.x[2] + 0.5 * m.y)
+        m.c1 = Constraint(expr=m.e + m.x[1] - 3 * m.y >= m.p)
+        m.c2 = Constraint(expr=(1, m.x[1] + 1, 5))
+        m.fixed = Var(initialize=1)
+        m.fixed.fix()
+        m.trivial = Constraint(expr=m.fixed <= 5)
+        m.obj = Objective(expr=3 * m.y + m.x[2] + 4)
+        # same matrix with Pyomo's linear walker and generate_standard_repn()
+        for visitor in [fast_writer.LinearRepnVisitor, None]:
+            with mock.patch.object(fast_writer, "LinearRepnVisitor", visitor):
+                mm = fast_writer.MatrixModel(m)
+            # columns may be in any order
+            cols = [["x[1]", "x[2]", "y"].index(v.name) for v in mm.vars]
+            self.assertEqual(sorted(cols), [0, 1, 2])
+            self.assertEqual([c.name for c in mm.constraints], ["c1", "c2"])
+            self.assertEqual(mm.obj_constant, 4)
+            np.testing.assert_array_equal(mm.obj_coef, np.array([0, 1, 3])[cols])
+            np.testing.assert_array_equal(mm.col_lower, [0, 0, 0])
+            np.testing.assert_array_equal(
+                mm.col_upper, np.array([10, 10, np.inf])[cols]
+            )
+            np.testing.assert_array_equal(mm.row_lower, [2, 0])
+            np.testing.assert_array_equal(mm.row_upper, [np.inf, 4])
+            matrix = np.zeros((2, 3))
+            for c in range(3):
+                for k in range(mm.col_start[c], mm.col_start[c + 1]):
+                    matrix[mm.row_index[k], cols[c]] = mm.coef[k]
+            np.testing.assert_array_equal(matrix, [[1, 2, -2.5], [1, 0, 0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+"""
+Shared helpers for tests that load or solve the example models.
+"""
+
+import os
+
+import switch_model.solve
+
+
+def example_inputs(*example):
+    """Return the inputs directory for one of the examples, e.g., "3zone_toy"."""
+    return os.path.join(os.path.dirname(__file__), "..", "examples", *example, "inputs")
+
+
+def require_highs(test):
+    """Skip the current test if the HiGHS solver (highspy) is not installed."""
+    try:
+        import highspy
+    except ImportError:
+        test.skipTest("highspy is not available")
+
+
+def solve_example(test, example, args=(), solver_args=None):
+    """
+    Construct and solve the model for one of the examples with HiGHS (or skip
+    the test if it is not installed), and return the solved instance. By
+    default the persistent HiGHS interface is used; solver_args can specify
+    other options, e.g., ["--solver", "highs", "--fast-writer"]. example can be
+    a name or a tuple of nested directory names.
+    """
+    require_highs(test)
+    if solver_args is None:
+        solver_args = ["--solver", "highs", "--persistent-solver"]
+    if isinstance(example, str):
+        example = (example,)
+    m = switch_model.solve.main(
+        args=["--inputs-dir", example_inputs(*example), "--log-level", "error"]
+        + list(solver_args)
+        + list(args),
+        return_instance=True,
+    )
+    switch_model.solve.solve(m)
+    return m
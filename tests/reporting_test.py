@@ -0,0 +1,201 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import argparse
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import switch_model.solve
+from pyomo.environ import ConcreteModel, Expression, Param, Set, Var, value
+from testfixtures import compare
+
+from tests.helpers import example_inputs
+
+
+def old_format_row(row, digits=6):
+    """Format a row for write_table() cell by cell, as before format_rows()."""
+    row = [value(v) for v in row]
+    sig_digits = "{0:." + str(digits) + "g}"
+    for (i, v) in enumerate(row):
+        if isinstance(v, float):
+            if abs(v) < 1e-10:
+                row[i] = 0
+            else:
+                row[i] = sig_digits.format(v)
+    return tuple(row)
+
+
+def formatting_test_model():
+    """
+    Return a small model with assorted values for testing write_table() and
+    save_generic_results().
+    """
+    m = ConcreteModel()
+    m.options = argparse.Namespace(
+        sorted_output=False,
+        results_db=None,
+        scenario_name=None,
+        save_expressions=[],
+        generic_output_formats=["csv"],
+    )
+    m.S = Set(initialize=["a", "b", "c", "d", "e", "f"], dimen=1)
+    vals = {"a": 1.23456789, "b": 1e-12, "c": -0.0, "d": 3, "e": 1e20, "f": -42.5}
+    m.x = Var(m.S, initialize=vals)
+    m.x["d"].value = 3  # int value
+    m.unset = Var(m.S)
+    m.unset["a"].value = 2.5
+    m.y = Var(initialize=7.123456789)
+    m.p = Param(m.S, initialize={k: i for i, k in enumerate(m.S)})
+    m.e = Expression(m.S, rule=lambda m, s: m.x[s] * 2 + m.p[s])
+    return m
+
+
+class ReportingTest(unittest.TestCase):
+    def test_write_table_format(self):
+        from switch_model.reporting import write_table
+
+        m = formatting_test_model()
+        headings = ("s", "x", "unset", "y", "p", "e", "text", "none", "int", "nan")
+
+        def values(m, s):
+            return (
+                s,
+                m.x[s],
+                m.unset[s].value,
+                m.y,
+                m.p[s],
+                m.e[s],
+                f"text {s}, quoted",
+                None,
+                len(s),
+                float("nan"),
+            )
+
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            output_file = os.path.join(temp_dir, "table.csv")
+            write_table(
+                m, m.S, output_file=output_file, headings=headings, values=values
+            )
+            expected_file = os.path.join(temp_dir, "expected.csv")
+            with open(expected_file, "w") as f:
+                w = csv.writer(f, dialect="switch-csv")
+                w.writerow(list(headings))
+                w.writerows(old_format_row(values(m, s)) for s in m.S)
+            with open(output_file, "rb") as f, open(expected_file, "rb") as g:
+                compare(f.read(), g.read())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_generic_results_format(self):
+        from switch_model.reporting import get_value, save_generic_results
+
+        m = formatting_test_model()
+        m.options.save_expressions = ["e"]
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            save_generic_results(m, temp_dir, sorted_output=False)
+            for c in [m.x, m.unset, m.y, m.e]:
+                # write the file the way it was written before get_values()
+                expected_file = os.path.join(temp_dir, f"expected_{c.name}.csv")
+                with open(expected_file, "w") as fh:
+                    writer = csv.writer(fh, dialect="switch-csv")
+                    if c.is_indexed():
+                        writer.writerow(["S_1", c.name])
+                        for key, obj in c.items():
+                            writer.writerow((key, get_value(obj, [])))
+                    else:
+                        writer.writerow([c.name])
+                        writer.writerow([get_value(c, [])])
+                with open(os.path.join(temp_dir, f"{c.name}.csv"), "rb") as f:
+                    with open(expected_file, "rb") as g:
+                        compare(f.read(), g.read())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_generic_output_formats(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow is not available")
+        import pandas as pd
+        from switch_model.reporting import save_generic_results
+
+        m = formatting_test_model()
+        m.options.save_expressions = ["e"]
+        m.options.generic_output_formats = ["csv", "parquet", "feather"]
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            save_generic_results(m, temp_dir, sorted_output=False)
+            for name in ["x", "unset", "y", "e"]:
+                expected = pd.read_csv(os.path.join(temp_dir, f"{name}.csv"))
+                for df in [
+                    pd.read_parquet(os.path.join(temp_dir, f"{name}.parquet")),
+                    pd.read_feather(os.path.join(temp_dir, f"{name}.feather")),
+                ]:
+                    pd.testing.assert_frame_equal(df, expected)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_results_db(self):
+        import sqlite3
+        from switch_model.reporting import (
+            record_table,
+            save_generic_results,
+            save_results_db,
+        )
+
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            db = os.path.join(temp_dir, "results.sqlite")
+            inputs_dir = example_inputs("3zone_toy")
+            for scenario, val in [("a", 1.0), ("b", 2.0), ("a", 3.0)]:
+                m = switch_model.solve.main(
+                    args=["--inputs-dir", inputs_dir, "--log-level", "error"]
+                    + ["--scenario-name", scenario, "--results-db", db],
+                    return_instance=True,
+                )
+                output_file = os.path.join(temp_dir, f"test_{scenario}.csv")
+                headings = ("period", "Wind", "wind")
+                record_table(m, output_file, headings, [(2020, val, m.PERIODS.first())])
+                save_generic_results(m, temp_dir, sorted_output=False)
+                save_results_db(m)
+            with sqlite3.connect(db) as con:
+                compare(
+                    con.execute("SELECT * FROM test ORDER BY scenario").fetchall(),
+                    [("a", None, 2020, 3.0, 2020), ("b", None, 2020, 2.0, 2020)],
+                )
+                compare(
+                    [r[1] for r in con.execute("PRAGMA table_info(test)")],
+                    ["scenario", "iteration", "period", "Wind", "wind_2"],
+                )
+                compare(
+                    sorted(r[1] for r in con.execute("PRAGMA index_list(test)")),
+                    ["test_period", "test_scenario"],
+                )
+                # index columns of generic results are identified from the
+                # index sets, e.g., GEN_TPS = (generator, timepoint)
+                for table, columns in [
+                    ("DispatchGen", ["GEN_TPS_2"]),
+                    ("DispatchTx", [f"TRANS_TIMEPOINTS_{i}" for i in (1, 2, 3)]),
+                    (
+                        "BuildLocalTD",
+                        ["SetProduct_OrderedSet_1", "SetProduct_OrderedSet_2"],
+                    ),
+                    ("BuildGen", []),
+                ]:
+                    compare(
+                        sorted(
+                            r[1] for r in con.execute(f"PRAGMA index_list({table})")
+                        ),
+                        sorted(f"{table}_{c}" for c in columns + ["scenario"]),
+                    )
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import unittest
+
+from testfixtures import compare
+
+from tests.helpers import example_inputs
+
+
+class RollingHorizonTest(unittest.TestCase):
+    def test_rolling_horizon_windows(self):
+        from switch_model.rolling_horizon import define_windows
+
+        inputs_dir = example_inputs("3zone_toy")
+        segments = define_windows(inputs_dir, 1, 1, 2)
+        compare(
+            [
+                [(w["timeseries"], w["reported_timeseries"]) for w in s]
+                for s in segments
+            ],
+            [
+                [(["2020_01winter", "2020_06summer"], ["2020_01winter"])],
+                [(["2020_01winter", "2020_06summer"], ["2020_06summer"])],
+                [(["2030_all"], ["2030_all"])],
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
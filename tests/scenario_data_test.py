@@ -0,0 +1,178 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from testfixtures import compare
+
+
+class ScenarioDataTest(unittest.TestCase):
+    def test_scenario_data_query_tables(self):
+        import sqlite3
+        from unittest import mock
+        from switch_model.hawaii import scenario_data
+
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        db = os.path.join(temp_dir, "data.sqlite")
+        with sqlite3.connect(db) as con:
+            con.execute(
+                "CREATE TABLE fuel (fuel TEXT, period INT, cost REAL, note TEXT)"
+            )
+            con.executemany(
+                "INSERT INTO fuel VALUES (?, ?, ?, ?)",
+                [
+                    ("LSFO", 2020, 1.5, None),
+                    ("Diesel, ULSD", 2020, 2.25, 'say "hi"'),
+                    ("LNG", 2030, 10.0, "it's"),
+                ],
+            )
+            con.execute("CREATE TABLE hours (hour INT, load REAL)")
+            con.executemany(
+                "INSERT INTO hours VALUES (?, ?)", [(h, h * 1.5) for h in range(25)]
+            )
+        executed = []
+        fetched = []
+
+        class Cursor:
+            # stand-in for a psycopg2 server-side cursor
+            itersize = 2000
+
+            def __init__(self, con):
+                self.cur = con.con.cursor()
+                self.connection = con
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.cur.close()
+
+            def execute(self, query):
+                self.cur.execute(query)
+
+            @property
+            def description(self):
+                return self.cur.description
+
+            def fetchmany(self, size):
+                rows = self.cur.fetchmany(size)
+                fetched.append(len(rows))
+                return rows
+
+            def __iter__(self):
+                while True:
+                    rows = self.fetchmany(self.itersize)
+                    if not rows:
+                        return
+                    yield from rows
+
+        class Connection:
+            # stand-in for a psycopg2 connection
+            def __init__(self):
+                self.con = sqlite3.connect(db, check_same_thread=False)
+                self.con.set_trace_callback(executed.append)
+                self.autocommit = True
+
+            def cursor(self, name=None):
+                if name is not None and self.autocommit:
+                    raise ValueError("server-side cursors need a transaction")
+                return Cursor(self)
+
+            def rollback(self):
+                self.con.rollback()
+
+            def close(self):
+                self.con.close()
+
+        class Pool:
+            def __init__(self, n_connections):
+                pass
+
+            def getconn(self):
+                return Connection()
+
+            def putconn(self, con):
+                con.close()
+
+            def closeall(self):
+                pass
+
+        def get_queries(args):
+            return [
+                (
+                    "fuel_cost.csv",
+                    f"SELECT * FROM fuel WHERE cost < {args['max_cost']}",
+                ),
+                ("periods.csv", "SELECT DISTINCT period FROM fuel ORDER BY period"),
+                ("fuels.csv", "SELECT fuel, note FROM fuel ORDER BY fuel"),
+                ("hours.csv", "SELECT * FROM hours ORDER BY hour"),
+            ]
+
+        outputs = {}
+        connection = Connection()
+        try:
+            for n in [1, 3]:
+                executed.clear()
+                inputs_dir = os.path.join(temp_dir, str(n))
+                fetched.clear()
+                with mock.patch.object(
+                    scenario_data, "db_cursor", lambda: Cursor(connection)
+                ), mock.patch.object(
+                    scenario_data, "query_itersize", 4
+                ), mock.patch.object(
+                    scenario_data, "connection_pool", Pool
+                ), mock.patch.object(
+                    scenario_data, "get_queries", get_queries
+                ), contextlib.redirect_stdout(
+                    io.StringIO()
+                ):
+                    scenario_data.write_tables(
+                        {"inputs_dir": inputs_dir, "max_cost": 20, "db_connections": n},
+                        alt_args=[{"tag": "cheap", "max_cost": 2}],
+                    )
+                outputs[n] = {}
+                for file in sorted(os.listdir(inputs_dir)):
+                    with open(os.path.join(inputs_dir, file)) as f:
+                        outputs[n][file] = f.read()
+                # alternative tables are only written for changed queries
+                compare(
+                    sorted(q for q in executed if q.startswith("SELECT")),
+                    sorted(
+                        [q for t, q in get_queries({"max_cost": 20})]
+                        + ["SELECT * FROM fuel WHERE cost < 2"]
+                    ),
+                )
+                # rows are fetched in batches
+                compare(max(fetched), 4)
+        finally:
+            connection.close()
+            shutil.rmtree(temp_dir)
+        compare(
+            sorted(outputs[1]),
+            [
+                "fuel_cost.cheap.csv",
+                "fuel_cost.csv",
+                "fuels.csv",
+                "hours.csv",
+                "periods.csv",
+                "switch_inputs_version.txt",
+            ],
+        )
+        compare(
+            outputs[1]["fuels.csv"],
+            'fuel,note\n"Diesel, ULSD","say ""hi"""\nLNG,"it\'s"\nLSFO,.\n',
+        )
+        compare(
+            outputs[1]["hours.csv"],
+            "hour,load\n" + "".join(f"{h},{h * 1.5}\n" for h in range(25)),
+        )
+        compare(outputs[3], outputs[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from testfixtures import compare
+
+from tests.helpers import example_inputs, require_highs
+
+
+class SolveScenariosTest(unittest.TestCase):
+    def test_jobs(self):
+        require_highs(self)
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            # with two jobs, a and c are solved by the first worker and b and
+            # d by the second one; only c can reuse the model from the
+            # previous scenario
+            scenarios = {
+                "a": [],
+                "b": ["--suffixes", "dual"],
+                "c": [],
+                "d": ["--suffixes", "rc"],
+            }
+            with open(os.path.join(temp_dir, "scenarios.txt"), "w") as f:
+                for s, args in scenarios.items():
+                    f.write(
+                        " ".join(
+                            ["--scenario-name", s, "--outputs-dir", f"outputs/{s}"]
+                            + args
+                        )
+                        + "\n"
+                    )
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(
+                [os.path.join(os.path.dirname(__file__), "..")]
+                + env.get("PYTHONPATH", "").split(os.pathsep)
+            )
+            result = subprocess.run(
+                [sys.executable, "-m", "switch_model.main", "solve-scenarios"]
+                + ["--jobs", "2", "--scenarios"]
+                + list(scenarios)
+                + ["--inputs-dir", os.path.abspath(example_inputs("3zone_toy"))]
+                + ["--solver", "highs", "--persistent-solver", "--log-level", "info"],
+                cwd=temp_dir,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+            )
+            costs = {}
+            for s in scenarios:
+                with open(os.path.join(temp_dir, "outputs", s, "total_cost.txt")) as f:
+                    costs[s] = round(float(f.read()), 2)
+            compare(costs, {s: 134733088.43 for s in scenarios})
+            compare(
+                result.stdout.count("Reusing model defined for a previous scenario"),
+                1,
+            )
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
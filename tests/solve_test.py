@@ -0,0 +1,123 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import shutil
+import tempfile
+import unittest
+
+import switch_model.solve
+from pyomo.environ import Constraint, Var, value
+from testfixtures import compare
+
+from tests.helpers import example_inputs, solve_example
+
+
+class SolveTest(unittest.TestCase):
+    def test_persistent_solver(self):
+        m = solve_example(self, "3zone_toy")
+        self.assertAlmostEqual(value(m.SystemCost) / 134733088.43, 1, places=6)
+        # add a constraint that forces a different solution, then resolve
+        # with the model still loaded in the solver
+        gen = ("C-NG_CC", 2030)
+        limit = value(m.BuildGen[gen]) / 2
+        m.Limit_Build = Constraint(expr=m.BuildGen[gen] <= limit)
+        switch_model.solve.solve(m)
+        self.assertLessEqual(value(m.BuildGen[gen]), limit + 1e-6)
+        self.assertGreater(value(m.SystemCost), 134733088.43 + 1)
+
+    def test_suffix_direction(self):
+        from unittest import mock
+        from pyomo.environ import ConcreteModel, Suffix
+        from switch_model.solve import get_suffix_direction, set_suffix_direction
+
+        m = ConcreteModel()
+        m.dual = Suffix(direction=Suffix.IMPORT)
+        compare(get_suffix_direction(m.dual), Suffix.IMPORT)
+        set_suffix_direction(m.dual, Suffix.LOCAL)
+        compare(get_suffix_direction(m.dual), Suffix.LOCAL)
+
+        # Pyomo before 6.7 only has get_direction() and set_direction()
+        class OldSuffix:
+            def __init__(self, direction):
+                self._direction = direction
+
+            def get_direction(self):
+                return self._direction
+
+            def set_direction(self, direction):
+                self._direction = direction
+
+        with mock.patch.object(switch_model.solve, "Suffix", OldSuffix):
+            suffix = OldSuffix(Suffix.IMPORT)
+            set_suffix_direction(suffix, Suffix.LOCAL)
+            compare(get_suffix_direction(suffix), Suffix.LOCAL)
+            self.assertFalse(hasattr(suffix, "direction"))
+
+    def test_model_cache(self):
+        from unittest import mock
+
+        args = ["--inputs-dir", example_inputs("3zone_toy"), "--log-level", "error"]
+        args += ["--solver", "glpk"]
+        with mock.patch.object(
+            switch_model.solve, "model_cache", {}
+        ), mock.patch.object(
+            switch_model.solve, "create_model", wraps=switch_model.solve.create_model
+        ) as create_model:
+            m1 = switch_model.solve.main(
+                args=args + ["--outputs-dir", "a"], return_instance=True
+            )
+            compare(
+                list(switch_model.solve.model_cache),
+                [switch_model.solve.get_model_cache_key(args)],
+            )
+            # options that only affect solving or reporting can differ
+            m2 = switch_model.solve.main(
+                args=args + ["--outputs-dir", "b", "--sorted-output"],
+                return_instance=True,
+            )
+            compare(create_model.call_count, 1)
+            compare(m2.options.outputs_dir, "b")
+            compare(m2.DataPortal.data(), m1.DataPortal.data())
+            # model options can't
+            switch_model.solve.main(
+                args=args + ["--suffixes", "dual"], return_instance=True
+            )
+            compare(create_model.call_count, 2)
+            self.assertNotEqual(
+                switch_model.solve.get_model_cache_key(args + ["--suffixes", "dual"]),
+                switch_model.solve.get_model_cache_key(args),
+            )
+
+    def test_save_and_reload_solution(self):
+        args = [
+            "--inputs-dir",
+            example_inputs("3zone_toy"),
+            "--suffix",
+            "dual",
+        ]
+        m = switch_model.solve.main(args=args, return_instance=True)
+        # assign arbitrary values instead of solving
+        for i, v in enumerate(m.component_data_objects(Var)):
+            if not v.fixed:
+                v.value = i / 7 if i % 3 else None
+        for i, c in enumerate(m.Zone_Energy_Balance.values()):
+            m.dual[c] = i * 10.5
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            switch_model.solve.save_results(m, temp_dir)
+            m2 = switch_model.solve.main(args=args, return_instance=True)
+            switch_model.solve.reload_prior_solution(m2, temp_dir)
+            compare(
+                [v.value for v in m2.component_data_objects(Var)],
+                [v.value for v in m.component_data_objects(Var)],
+            )
+            compare(
+                [m2.dual.get(c) for c in m2.Zone_Energy_Balance.values()],
+                [m.dual.get(c) for c in m.Zone_Energy_Balance.values()],
+            )
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
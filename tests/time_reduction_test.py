@@ -0,0 +1,120 @@
+# Copyright 2015 The Switch Authors. All rights reserved.
+# Licensed under the Apache License, Version 2, which is in the LICENSE file.
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from switch_model.utilities import SwitchAbstractModel
+from testfixtures import compare
+
+
+class TimeReductionTest(unittest.TestCase):
+    def test_reduce_time(self):
+        import numpy as np
+        import pandas as pd
+        from switch_model.time_reduction import cluster, reduce_time
+
+        # two well-separated groups of rows; one representative from each
+        rng = np.random.default_rng(1)
+        features = np.vstack([rng.normal(0, 0.1, (5, 8)), rng.normal(5, 0.1, (7, 8))])
+        weights = np.arange(1.0, 13.0)
+        for method in ["kmedoids", "kmeans"]:
+            assignment, reps = cluster(features, weights, 2, method=method)
+            compare(sorted(r >= 5 for r in reps), [False, True])
+            compare(list(assignment), [assignment[0]] * 5 + [assignment[5]] * 7)
+
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            inputs_dir = os.path.join(temp_dir, "inputs")
+            os.makedirs(inputs_dir)
+            days = [f"d{d}" for d in range(6)]
+            tps = [(f"{ts}_{h}", ts) for ts in days for h in range(2)]
+            pd.DataFrame(
+                {
+                    "TIMESERIES": days,
+                    "ts_period": 2020,
+                    "ts_duration_of_tp": 12,
+                    "ts_num_tps": 2,
+                    # 10 years of 24-hour days
+                    "ts_scale_to_period": [500.0, 550.0, 600.0, 650.0, 700.0, 652.5],
+                }
+            ).to_csv(os.path.join(inputs_dir, "timeseries.csv"), index=False)
+            pd.DataFrame(
+                {
+                    "timepoint_id": [tp for tp, ts in tps],
+                    "timestamp": range(len(tps)),
+                    "timeseries": [ts for tp, ts in tps],
+                }
+            ).to_csv(os.path.join(inputs_dir, "timepoints.csv"), index=False)
+            pd.DataFrame(
+                {
+                    "LOAD_ZONE": "z",
+                    "TIMEPOINT": [tp for tp, ts in tps],
+                    # low load on even days, high load on odd days
+                    "zone_demand_mw": [
+                        10 + 100 * (int(ts[1]) % 2) + int(tp[-1]) for tp, ts in tps
+                    ],
+                }
+            ).to_csv(os.path.join(inputs_dir, "loads.csv"), index=False)
+            pd.DataFrame(
+                {
+                    "GENERATION_PROJECT": "pv",
+                    "timepoint": [tp for tp, ts in tps],
+                    "gen_max_capacity_factor": 0.5,
+                }
+            ).to_csv(
+                os.path.join(inputs_dir, "variable_capacity_factors.csv"), index=False
+            )
+            with open(os.path.join(inputs_dir, "periods.csv"), "w") as f:
+                f.write("INVESTMENT_PERIOD,period_start,period_end\n2020,2020,2029\n")
+
+            reduced_dir = os.path.join(temp_dir, "reduced")
+            with contextlib.redirect_stdout(io.StringIO()):
+                reduce_time(inputs_dir, reduced_dir, 2)
+
+            def read(d, file):
+                return pd.read_csv(os.path.join(d, file), dtype={"timepoint": str})
+
+            ts = read(reduced_dir, "timeseries.csv")
+            self.assertEqual(len(ts), 2)
+            # one representative each for low- and high-load days
+            compare(sorted(int(d[1]) % 2 for d in ts["TIMESERIES"]), [0, 1])
+            self.assertAlmostEqual(
+                ts["ts_scale_to_period"].sum(),
+                read(inputs_dir, "timeseries.csv")["ts_scale_to_period"].sum(),
+            )
+            kept_tps = set(read(reduced_dir, "timepoints.csv")["timepoint_id"])
+            compare(
+                kept_tps,
+                {tp for tp, d in tps if d in set(ts["TIMESERIES"])},
+            )
+            compare(set(read(reduced_dir, "loads.csv")["TIMEPOINT"]), kept_tps)
+            compare(
+                set(read(reduced_dir, "variable_capacity_factors.csv")["timepoint"]),
+                kept_tps,
+            )
+            # the reduced inputs can be loaded, including the new scale factors
+            model = SwitchAbstractModel(
+                module_list=["switch_model.solve", "switch_model.timescales"],
+                args=["--inputs-dir", reduced_dir],
+            )
+            instance = model.load_inputs()
+            compare(
+                {ts: instance.ts_scale_to_period[ts] for ts in instance.TIMESERIES},
+                dict(zip(ts["TIMESERIES"], ts["ts_scale_to_period"])),
+            )
+            with open(os.path.join(reduced_dir, "periods.csv")) as f:
+                compare(
+                    f.read(),
+                    "INVESTMENT_PERIOD,period_start,period_end\n2020,2020,2029\n",
+                )
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 # Copyright 2015 The Switch Authors. All rights reserved.
 # Licensed under the Apache License, Version 2, which is in the LICENSE file.
 
+import csv
 import logging
 import os
 import shutil
@@ -9,9 +10,11 @@ import unittest
 
 import switch_model.utilities as utilities
 import switch_model.solve
-from pyomo.environ import DataPortal
+from pyomo.environ import Constraint, DataPortal, Var
 from testfixtures import compare
 
+from tests.helpers import example_inputs, solve_example
+
 
 class UtilitiesTest(unittest.TestCase):
     def test_approx_equal(self):
@@ -76,6 +79,229 @@ class UtilitiesTest(unittest.TestCase):
         finally:
             shutil.rmtree(temp_dir)
 
+    def test_parallel_post_solve(self):
+        import sqlite3
+
+        m = solve_example(self, "3zone_toy")
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            results, tables = {}, {}
+            for workers in [1, 4]:
+                m.options.post_solve_workers = workers
+                outputs_dir = os.path.join(temp_dir, str(workers))
+                m.options.results_db = os.path.join(temp_dir, f"{workers}.sqlite")
+                m.post_solve(outputs_dir)
+                results[workers] = {}
+                for file in sorted(os.listdir(outputs_dir)):
+                    with open(os.path.join(outputs_dir, file)) as f:
+                        results[workers][file] = f.read()
+                with sqlite3.connect(m.options.results_db) as con:
+                    tables[workers] = {
+                        name: con.execute(f'SELECT * FROM "{name}"').fetchall()
+                        for (name,) in con.execute(
+                            "SELECT name FROM sqlite_master WHERE type = 'table'"
+                        )
+                    }
+            self.assertIn("dispatch.csv", results[1])
+            compare(results[4], results[1])
+            self.assertIn("dispatch", tables[1])
+            compare(tables[4], tables[1])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_estimate(self):
+        inputs_dir = example_inputs("3zone_toy")
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            args = ["--inputs-dir", inputs_dir, "--log-level", "error"]
+            estimate = switch_model.solve.main(
+                args=args + ["--estimate", "--outputs-dir", temp_dir]
+            )
+            self.assertTrue(
+                os.path.exists(os.path.join(temp_dir, "model_size_estimate.csv"))
+            )
+        finally:
+            shutil.rmtree(temp_dir)
+        m = switch_model.solve.main(args=args, return_instance=True)
+        for ctype in [Var, Constraint]:
+            compare(
+                sum(r["elements"] for r in estimate if r["type"] == ctype.__name__),
+                sum(1 for c in m.component_data_objects(ctype)),
+            )
+
+    def test_estimate_empty_model(self):
+        # no modules.txt, so there are no components to estimate
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            with self.assertLogs(level="WARNING") as logs:
+                estimate = switch_model.solve.main(args=["--estimate"])
+            compare(estimate, [])
+            self.assertTrue(any("Nothing to estimate" in line for line in logs.output))
+            compare(os.listdir(temp_dir), [])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(temp_dir)
+
+    def test_profile_construction(self):
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            m = switch_model.solve.main(
+                args=["--inputs-dir", example_inputs("3zone_toy")]
+                + ["--log-level", "error", "--outputs-dir", temp_dir]
+                + ["--profile-construction", "5"],
+                return_instance=True,
+            )
+            with open(os.path.join(temp_dir, "construction_profile.csv")) as f:
+                rows = list(csv.DictReader(f))
+        finally:
+            shutil.rmtree(temp_dir)
+        compare(
+            list(rows[0]),
+            [
+                "component",
+                "type",
+                "module",
+                "elements",
+                "time_s",
+                "memory_mb",
+                "peak_memory_mb",
+            ],
+        )
+        # one row per component, in order of construction, credited to the
+        # module that defined it
+        compare(
+            [r["component"] for r in rows],
+            [c.name for c in m.component_objects(descend_into=False)],
+        )
+        for r in rows:
+            c = m.component(r["component"])
+            compare(r["type"], c.ctype.__name__)
+            compare(r["module"], m.component_modules[c.name])
+            self.assertGreaterEqual(float(r["time_s"]), 0)
+            self.assertGreaterEqual(float(r["peak_memory_mb"]), float(r["memory_mb"]))
+        profile = {r["component"]: r for r in rows}
+        for name, module in [
+            ("TIMEPOINTS", "switch_model.timescales"),
+            ("BuildGen", "switch_model.generators.core.build"),
+            ("DispatchGen", "switch_model.generators.core.dispatch"),
+            ("Release_Gen_Index_Maps", "switch_model.generators.core.build"),
+        ]:
+            compare(profile[name]["module"], module)
+        compare(profile["DispatchGen"]["elements"], str(len(m.DispatchGen)))
+        compare(profile["Release_Gen_Index_Maps"]["elements"], "")
+
+    def test_report_expression(self):
+        from pyomo.environ import ConcreteModel, Set
+
+        m = ConcreteModel()
+        m.S = Set(initialize=[1, 2, 3])
+        m.x = Var(m.S, initialize=lambda m, s: s)
+        m.e = utilities.ReportExpression(m.S, rule=lambda m, s: 2 * m.x[s])
+        self.assertFalse(m.e._constructed)
+        compare(m.e.evaluate(), {1: 2, 2: 4, 3: 6})
+        self.assertFalse(m.e._constructed)
+        # the expression stays inactive until it is constructed, so the model
+        # is ready to solve, and cloning the model doesn't construct it
+        self.assertFalse(m.e.is_constructed())
+        self.assertFalse(m.e.active)
+        self.assertTrue(m.is_constructed())
+        m2 = m.clone()
+        self.assertFalse(m.e._constructed)
+        self.assertFalse(m2.e._constructed)
+        compare(m2.e.evaluate(), {1: 2, 2: 4, 3: 6})
+        m.c = Constraint(expr=m.e[2] <= 10)
+        self.assertTrue(m.e._constructed)
+        self.assertTrue(m.e.is_constructed())
+        self.assertTrue(m.e.active)
+        compare(m.e.evaluate(), {1: 2, 2: 4, 3: 6})
+
+    def test_columnar_input_engine(self):
+        inputs_dir = example_inputs("3zone_toy")
+        data = {}
+        for engine in ["dataportal", "columnar"]:
+            model = utilities.create_model(
+                args=["--inputs-dir", inputs_dir, "--input-engine", engine]
+            )
+            instance = model.load_inputs()
+            data[engine] = instance.DataPortal.data()
+        compare(data["columnar"], data["dataportal"])
+
+    def test_input_cache(self):
+        import numpy as np
+        from unittest import mock
+
+        temp_dir = tempfile.mkdtemp(prefix="switch_test_")
+        try:
+            inputs_dir = os.path.join(temp_dir, "inputs")
+            shutil.copytree(example_inputs("3zone_toy"), inputs_dir)
+            input_files = sorted(os.listdir(inputs_dir))
+            cache_dir = os.path.join(temp_dir, "cache")
+
+            # entries preserve the types and shapes of all kinds of data
+            data = {
+                "EMPTY": {None: []},
+                "PAIRS": {None: [(1, "a"), (2, "b")]},
+                "MIXED": {None: [1, "x", 2.5, 10**12]},
+                "scalar": {None: 3.5},
+                "by_pair": {(1, "a"): 1, (2, "b"): 0.1},
+                "by_mixed": {1: "a", "x": 2, 2.5: None},
+            }
+            entry_path = os.path.join(temp_dir, "entry.npz")
+            utilities.write_input_cache(entry_path, data)
+            compare(utilities.read_input_cache(entry_path), data, strict=True)
+
+            def get_data(*args):
+                model = utilities.create_model(
+                    args=["--inputs-dir", inputs_dir, "--input-cache-dir", cache_dir]
+                    + list(args)
+                )
+                return model.load_inputs().DataPortal.data()
+
+            uncached = get_data()
+            self.assertFalse(os.path.exists(cache_dir))
+            for engine in ["dataportal", "columnar"]:
+                # creates cache entries, then reads them back
+                compare(get_data("--input-cache", "--input-engine", engine), uncached)
+            entries = os.listdir(cache_dir)
+            self.assertTrue(entries)
+            with mock.patch.object(
+                utilities, "read_columnar", side_effect=AssertionError
+            ):
+                compare(
+                    get_data("--input-cache", "--input-engine", "columnar"), uncached
+                )
+            compare(sorted(os.listdir(cache_dir)), sorted(entries))
+            # the inputs directory is left alone, and entries can be read
+            # without unpickling anything
+            compare(sorted(os.listdir(inputs_dir)), input_files)
+            for entry in entries:
+                with np.load(os.path.join(cache_dir, entry), allow_pickle=False) as f:
+                    for name in f.files:
+                        f[name]
+
+            # change an input file; cached data should not be used
+            with open(os.path.join(inputs_dir, "loads.csv")) as f:
+                loads = f.read()
+            with open(os.path.join(inputs_dir, "loads.csv"), "w") as f:
+                f.write(loads.replace("North,1,", "North,1,1").rstrip() + "\n")
+            changed = get_data()
+            self.assertNotEqual(changed["zone_demand_mw"], uncached["zone_demand_mw"])
+            compare(get_data("--input-cache"), changed)
+
+            # entries that haven't been used for a while are removed, i.e.,
+            # the ones for the old version of loads.csv
+            all_entries = set(os.listdir(cache_dir))
+            for entry in all_entries:
+                entry_path = os.path.join(cache_dir, entry)
+                old_time = os.stat(entry_path).st_mtime - 31 * 24 * 60 * 60
+                os.utime(entry_path, (old_time, old_time))
+            compare(get_data("--input-cache"), changed)
+            compare(len(all_entries - set(os.listdir(cache_dir))), 1)
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_check_mandatory_components(self):
         from pyomo.environ import ConcreteModel, Param, Set, Any
         from switch_model.utilities import check_mandatory_components